@@ -1,43 +1,357 @@
 """
 Vercel Python Serverless Function
 Optimized for Playwright scraping with memory-efficient browser flags
+
+Chromium is launched lazily and kept alive across warm invocations (see
+WarmBrowser); `playwright install chromium` only runs when a launch finds no
+browser executable.
 """
 
 import json
 import os
+import queue
+import re
 import subprocess
+import threading
+from urllib.parse import parse_qs
+
+from markaz_scraper import (
+    MarkazScrapeSession,
+    extract_markaz_product_id,
+    launch_browser_for_serverless,
+    process_tree_rss_mb,
+    scrape_category_product_urls,
+    scrape_markaz_product,
+)
 
-from markaz_scraper import scrape_markaz_product
+# Recycle the warm browser after this many scrapes, or once this process and
+# Chromium together hold more resident memory than the ceiling.
+WARM_BROWSER_MAX_USES = int(os.getenv('MARKAZ_WARM_BROWSER_MAX_USES', '50'))
+WARM_BROWSER_MAX_RSS_MB = float(os.getenv('MARKAZ_WARM_BROWSER_MAX_RSS_MB', '900'))
 
-# Playwright Browser Fix: Install chromium browser on Vercel
-try:
-    if os.getenv('VERCEL') == '1' or os.getenv('VERCEL_ENV'):
+
+def _install_chromium():
+    """Playwright Browser Fix: install chromium on Vercel when it is missing."""
+    if not (os.getenv('VERCEL') == '1' or os.getenv('VERCEL_ENV')):
+        return False
+    try:
         subprocess.run(
             ['playwright', 'install', 'chromium'],
             capture_output=True,
             timeout=300,
             check=False,
         )
-except Exception:
-    pass
+    except Exception:
+        return False
+    return True
+
+
+class WarmBrowser:
+    """One Chromium shared by every request a warm function instance serves.
+
+    Before each reuse the browser is health-checked (a CDP round trip) and
+    recycled when it crashed, served ``max_uses`` scrapes or the process tree
+    went over ``max_rss_mb``. Sync Playwright objects belong to the thread
+    that started them, so requests on any other thread scrape cold.
+    """
+
+    def __init__(self, max_uses=WARM_BROWSER_MAX_USES, max_rss_mb=WARM_BROWSER_MAX_RSS_MB):
+        self.max_uses = max(1, int(max_uses or 1))
+        self.max_rss_mb = float(max_rss_mb or 0)
+        self.browser = None
+        self.uses = 0
+        self.launches = 0
+        self.recycles = 0
+        self.acquires = 0
+        self._playwright = None
+        self._thread_id = None
+        self._install_tried = False
+        self._lock = threading.Lock()
+
+    def _launch(self):
+        if self._playwright is None:
+            from playwright.sync_api import sync_playwright
+
+            self._playwright = sync_playwright().start()
+            self._thread_id = threading.get_ident()
+        try:
+            browser = launch_browser_for_serverless(self._playwright)
+        except Exception as exc:
+            if self._install_tried or "Executable doesn't exist" not in str(exc):
+                raise
+            self._install_tried = True
+            if not _install_chromium():
+                raise
+            browser = launch_browser_for_serverless(self._playwright)
+        self.browser = browser
+        self.launches += 1
+        return browser
+
+    def healthy(self):
+        if self.browser is None or not self.browser.is_connected():
+            return False
+        try:
+            cdp = self.browser.new_browser_cdp_session()
+            cdp.send('Browser.getVersion')
+            cdp.detach()
+        except Exception:
+            return False
+        return True
+
+    def recycle_reason(self):
+        """Why the current browser should not be reused, or None."""
+        if not self.healthy():
+            return 'unhealthy'
+        if self.uses >= self.max_uses:
+            return 'max_uses'
+        if self.max_rss_mb:
+            rss_mb = process_tree_rss_mb()
+            if rss_mb is not None and rss_mb > self.max_rss_mb:
+                return 'memory'
+        return None
+
+    def recycle(self):
+        if self.browser is not None:
+            try:
+                self.browser.close()
+            except Exception:
+                pass
+            self.browser = None
+            self.recycles += 1
+
+    def acquire(self):
+        """Browser to scrape with: the warm one when it passes the checks, else a new launch."""
+        self.acquires += 1
+        if self.browser is not None and self.recycle_reason() is None:
+            self.uses += 1
+            return self.browser
+        self.recycle()
+        browser = self._launch()
+        self.uses = 1
+        return browser
+
+    def scrape(self, url):
+        """Scrape one product like scrape_markaz_product.
+
+        Returns ``(result, browser_state)`` where browser_state is 'warm',
+        'cold' (Chromium was launched) or 'http' (no browser needed).
+        """
+        with self._lock:
+            if self._thread_id is not None and self._thread_id != threading.get_ident():
+                return scrape_markaz_product(url), 'cold'
+            launches, acquires = self.launches, self.acquires
+            with MarkazScrapeSession(
+                context_pool_size=1,
+                block_resources=False,
+                browser_provider=self.acquire,
+            ) as session:
+                result = session.scrape(url)
+            if self.acquires == acquires:
+                # Served from the scrape cache or the HTTP fast path.
+                return result, 'http'
+            return result, 'cold' if self.launches > launches else 'warm'
+
+
+warm_browser = WarmBrowser()
+
+
+# Batch mode: ?urls=a,b,c (or a JSON "urls" list) or ?category_url=...&start_page=1&end_page=3.
+BATCH_MAX_URLS = int(os.getenv('MARKAZ_BATCH_MAX_URLS', '200'))
+BATCH_MAX_CONCURRENCY = int(os.getenv('MARKAZ_BATCH_MAX_CONCURRENCY', '4'))
+_URL_LIST_SPLIT_PATTERN = re.compile(r'[\s,]+')
+
+
+def _param(query, body, name, default=None):
+    value = query.get(name)
+    if isinstance(value, list):
+        value = value[-1] if value else None
+    if value in (None, ''):
+        value = body.get(name)
+    return default if value in (None, '') else value
+
+
+def _batch_urls(query, body):
+    """Product URLs of a batch request, deduped by Markaz product id, capped at BATCH_MAX_URLS."""
+    raw = body.get('urls') or query.get('urls') or []
+    if isinstance(raw, str):
+        raw = [raw]
+    urls = []
+    seen = set()
+    for chunk in raw:
+        for url in _URL_LIST_SPLIT_PATTERN.split(str(chunk or '')):
+            key = extract_markaz_product_id(url) or url
+            if url and key not in seen:
+                seen.add(key)
+                urls.append(url)
+    return urls[:BATCH_MAX_URLS]
+
+
+def _batch_options(query, body):
+    """(start_page, end_page, concurrency) of a batch request; ValueError when invalid."""
+    try:
+        start_page = int(_param(query, body, 'start_page', 1))
+        end_page = int(_param(query, body, 'end_page', start_page))
+        concurrency = int(_param(query, body, 'concurrency', BATCH_MAX_CONCURRENCY))
+    except (TypeError, ValueError):
+        raise ValueError('start_page, end_page and concurrency must be integers') from None
+    if start_page < 1 or end_page < start_page:
+        raise ValueError('Need 1 <= start_page <= end_page')
+    if concurrency < 1:
+        raise ValueError('concurrency must be at least 1')
+    return start_page, end_page, concurrency
+
 
+def _ndjson(record):
+    return json.dumps(record, ensure_ascii=False) + '\n'
 
-def app(request):
-    """Vercel Python function handler."""
+
+def iter_batch_ndjson(urls, category_url='', start_page=1, end_page=1, concurrency=BATCH_MAX_CONCURRENCY):
+    """Yield one NDJSON line per product as soon as it is scraped.
+
+    A category request first yields a ``{"type": "category"}`` record with the
+    discovered pages. Each product is ``{"type": "product", "index": i, ...result}``
+    (completion order; ``index`` is the position in the URL list) and the
+    stream ends with ``{"type": "summary"}`` carrying scraper stats.
+
+    The 200 status is sent before the stream runs, so a failure part-way ends
+    it with a ``{"type": "error", "status": "error"}`` record instead.
+    """
+    try:
+        yield from _iter_batch_records(urls, category_url, start_page, end_page, concurrency)
+    except Exception as exc:
+        yield _ndjson({'type': 'error', 'status': 'error', 'error': f'Error: {exc}'})
+
+
+def _iter_batch_records(urls, category_url, start_page, end_page, concurrency):
+    from markaz_async_scraper import MarkazConcurrentScraper
+
+    urls = list(urls or [])
+    if category_url:
+        discovery = scrape_category_product_urls(category_url, start_page, end_page)
+        known = {extract_markaz_product_id(url) or url for url in urls}
+        found = [url for url in discovery.get('urls') or [] if (extract_markaz_product_id(url) or url) not in known]
+        urls.extend(found[:max(0, BATCH_MAX_URLS - len(urls))])
+        yield _ndjson({
+            'type': 'category',
+            'category_url': category_url,
+            'status': discovery.get('status'),
+            'count': len(found),
+            'pages': discovery.get('pages') or [],
+            'errors': discovery.get('errors') or [],
+        })
+
+    scraper = MarkazConcurrentScraper(concurrency=max(1, min(int(concurrency or 1), BATCH_MAX_CONCURRENCY)))
+    finished = queue.Queue()
+    done = object()
+    outcome = {}
+
+    def run():
+        try:
+            outcome['results'] = scraper.run(urls, on_result=lambda index, result: finished.put((index, result)))
+        except Exception as exc:
+            outcome['error'] = f'Error: {exc}'
+        finally:
+            finished.put(done)
+
+    # The async scraper runs its own event loop; this thread only relays results.
+    threading.Thread(target=run, daemon=True).start()
+
+    emitted = set()
+    succeeded = 0
+    while True:
+        item = finished.get()
+        if item is done:
+            break
+        index, result = item
+        emitted.add(index)
+        succeeded += result.get('status') == 'success'
+        yield _ndjson({'type': 'product', 'index': index, **result})
+
+    # Pages the scraper gave up on without calling on_result (e.g. Chromium failed to start).
+    for index, result in enumerate(outcome.get('results') or []):
+        if index not in emitted and result is not None:
+            emitted.add(index)
+            succeeded += result.get('status') == 'success'
+            yield _ndjson({'type': 'product', 'index': index, **result})
+
+    yield _ndjson({
+        'type': 'summary',
+        'count': len(urls),
+        'succeeded': succeeded,
+        'failed': len(urls) - succeeded,
+        'error': outcome.get('error'),
+        'stats': scraper.stats(),
+    })
+
+
+def _wsgi_params(environ):
+    query = parse_qs(environ.get('QUERY_STRING') or '')
+    try:
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        length = 0
+    raw_body = environ['wsgi.input'].read(length) if length and environ.get('wsgi.input') else b''
+    try:
+        body = json.loads(raw_body or b'{}')
+    except ValueError:
+        body = {}
+    return query, body if isinstance(body, dict) else {}
+
+
+def app(request, start_response=None):
+    """Vercel Python function handler.
+
+    Called with a request dict it returns a response dict; called WSGI-style
+    (environ, start_response) it writes the same response, streaming the body
+    of batch requests line by line (the dict form returns them joined).
+    """
+    if start_response is not None:
+        response = _handle(*_wsgi_params(request))
+        headers = list(response['headers'].items())
+        start_response(f"{response['statusCode']} {'OK' if response['statusCode'] == 200 else 'Error'}", headers)
+        body = response['body']
+        if isinstance(body, str):
+            return [body.encode('utf-8')]
+        return (line.encode('utf-8') for line in body)
+
+    if isinstance(request, dict):
+        query = request.get('query', {}) or {}
+        body = request.get('body', {}) or {}
+        if isinstance(body, str):
+            try:
+                body = json.loads(body)
+            except json.JSONDecodeError:
+                body = {}
+    else:
+        query = {}
+        body = {}
+    response = _handle(query, body)
+    if not isinstance(response['body'], str):
+        # Dict responses must be serializable: run the batch and join its lines.
+        response['body'] = ''.join(response['body'])
+    return response
+
+
+def _handle(query, body):
     try:
-        if isinstance(request, dict):
-            query = request.get('query', {}) or {}
-            body = request.get('body', {}) or {}
-            if isinstance(body, str):
-                try:
-                    body = json.loads(body)
-                except json.JSONDecodeError:
-                    body = {}
-        else:
-            query = {}
-            body = {}
-
-        url = query.get('url') or body.get('url') or ''
+        batch_urls = _batch_urls(query, body)
+        category_url = str(_param(query, body, 'category_url', '')).strip()
+        if batch_urls or category_url:
+            try:
+                start_page, end_page, concurrency = _batch_options(query, body)
+            except ValueError as exc:
+                return {
+                    'statusCode': 400,
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': json.dumps({'status': 'error', 'error': str(exc)}),
+                }
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/x-ndjson; charset=utf-8'},
+                'body': iter_batch_ndjson(batch_urls, category_url, start_page, end_page, concurrency),
+            }
+
+        url = _param(query, body, 'url', '')
 
         if not url:
             html = """<!DOCTYPE html>
@@ -65,6 +379,8 @@ def app(request):
             <p><strong>Usage:</strong></p>
             <p>Add <code>?url=PRODUCT_URL</code> to scrape a product.</p>
             <p>Example: <code>?url=https://www.markaz.app/shop/product/...</code></p>
+            <p>Batch: <code>?urls=URL1,URL2</code> or <code>?category_url=CATEGORY_URL&amp;start_page=1&amp;end_page=3</code>
+            streams one NDJSON record per product.</p>
         </div>
     </div>
 </body>
@@ -75,11 +391,11 @@ def app(request):
                 'body': html,
             }
 
-        result = scrape_markaz_product(url)
+        result, browser_state = warm_browser.scrape(url)
 
         return {
             'statusCode': 200,
-            'headers': {'Content-Type': 'application/json'},
+            'headers': {'Content-Type': 'application/json', 'X-Markaz-Browser': browser_state},
             'body': json.dumps(result, indent=2),
         }
 
@@ -3,7 +3,6 @@ import pandas as pd
 import re
 import os
 import copy
-import time
 from html import escape
 from pathlib import Path
 
@@ -22,20 +21,34 @@ from shopify_sync import (
     sync_tracked_rows_to_shopify,
 )
 from shopify_publish import publish_products_to_shopify
-from markaz_scraper import canonicalize_markaz_product_url, extract_markaz_product_id
+from markaz_scraper import (
+    canonicalize_markaz_product_url,
+    classify_scrape_failure,
+    extract_markaz_product_id,
+    product_fingerprint,
+)
 from supabase_config import is_supabase_configured
 from supabase_keepalive import maybe_ping_supabase
 from supabase_store import (
+    TRACKED_LIST_COLUMNS,
     batch_upsert_tracked_products,
     count_duplicate_tracked_products,
+    count_tracked_products,
     dedupe_tracked_products,
     delete_tracked_product,
     delete_tracked_products,
+    list_tracked_product_ids,
     list_tracked_products,
+    list_tracked_products_page,
+    list_tracked_products_since,
+    tracked_row_changed,
+    tracked_rows_watermark,
+    update_tracked_content_fingerprints,
     update_tracked_shopify_metadata_batch,
     update_tracked_stock_status,
     upsert_tracked_product,
 )
+from tracked_rows_cache import SHARED_TRACKED_ROWS_CACHE, TrackedRowsCache
 
 _IS_DEMO = os.environ.get('MARKAZ_DEMO_MODE') == '1'
 
@@ -56,15 +69,20 @@ def render_shopify_tab_icon():
 
 if _IS_DEMO:
     from demo_mode.demo_scrape import scrape_markaz_product_demo as scrape_markaz_product
-    from demo_mode.demo_scrape import scrape_product_from_page_demo as scrape_product_from_page
+    from demo_mode.demo_scrape import check_stock_demo as check_stock
+    from demo_mode.demo_scrape import DemoScrapeSession as MarkazScrapeSession
     from demo_mode.demo_scrape import scrape_category_product_urls_demo as scrape_category_product_urls
+    from demo_mode.demo_scrape import (
+        scrape_category_product_urls_incremental_demo as scrape_category_product_urls_incremental,
+    )
 else:
-    from playwright.sync_api import sync_playwright
+    from markaz_async_scraper import MarkazConcurrentScraper
     from markaz_scraper import (
-        launch_browser_for_serverless,
+        MarkazScrapeSession,
+        check_stock,
         scrape_category_product_urls,
+        scrape_category_product_urls_incremental,
         scrape_markaz_product,
-        scrape_product_from_page,
     )
 
 # Playwright Browser Installation: Install chromium browser if missing
@@ -602,14 +620,16 @@ def render_global_pricing_settings():
     st.divider()
 
 
+STOCK_FILTER_VALUES = {
+    'All': None,
+    'In Stock': 'in_stock',
+    'Out of Stock': 'out_of_stock',
+    'Unknown': 'unknown',
+}
+
+
 def get_filtered_tracked_rows(tracked_rows, stock_filter):
-    filter_values = {
-        'All': None,
-        'In Stock': 'in_stock',
-        'Out of Stock': 'out_of_stock',
-        'Unknown': 'unknown',
-    }
-    selected_status = filter_values.get(stock_filter)
+    selected_status = STOCK_FILTER_VALUES.get(stock_filter)
     if not selected_status:
         return tracked_rows
     return [
@@ -729,12 +749,22 @@ def render_shopify_green_field(label, value):
     )
 
 
+def tracked_cache():
+    """Tracked rows / Shopify status cache shared by every session of this process."""
+    if _IS_DEMO:
+        # Demo rows live in each browser's local storage — never share them.
+        if 'demo_tracked_cache' not in st.session_state:
+            st.session_state.demo_tracked_cache = TrackedRowsCache()
+        return st.session_state.demo_tracked_cache
+    return SHARED_TRACKED_ROWS_CACHE
+
+
 def invalidate_shopify_status_cache():
-    st.session_state.pop('shopify_status_map', None)
+    tracked_cache().invalidate_status_map()
 
 
 def invalidate_tracked_rows_cache():
-    st.session_state.pop('tracked_rows_cache', None)
+    tracked_cache().invalidate()
 
 
 def _increment_supabase_fetch_count():
@@ -744,69 +774,166 @@ def _increment_supabase_fetch_count():
 
 
 def patch_tracked_row_in_cache(row):
-    """Update session cache in-place — avoids a full Supabase list refetch."""
+    """Write a saved row through to the shared cache — avoids a full Supabase list refetch."""
     if not row or not row.get('markaz_url'):
         return
-    cache = st.session_state.get('tracked_rows_cache')
-    if cache is None:
-        return
     markaz_url = canonicalize_markaz_product_url(row['markaz_url']) or row['markaz_url']
     product_id = extract_markaz_product_id(markaz_url)
     row = {**row, 'markaz_url': markaz_url}
 
-    for index, existing in enumerate(cache):
-        existing_url = existing.get('markaz_url')
-        same_url = canonicalize_markaz_product_url(existing_url) == markaz_url
-        same_id = (
-            product_id
-            and extract_markaz_product_id(existing_url) == product_id
-        )
-        if same_url or same_id:
-            cache[index] = {**existing, **row}
-            # Drop any other duplicates for same product id from cache.
-            if product_id:
-                st.session_state.tracked_rows_cache = [
-                    r for i, r in enumerate(cache)
-                    if i == index or extract_markaz_product_id(r.get('markaz_url')) != product_id
+    def patch(cache):
+        for index, existing in enumerate(cache):
+            existing_url = existing.get('markaz_url')
+            same_url = canonicalize_markaz_product_url(existing_url) == markaz_url
+            same_id = (
+                product_id
+                and extract_markaz_product_id(existing_url) == product_id
+            )
+            if same_url or same_id:
+                # Drop any other duplicates for same product id from cache.
+                return [
+                    {**existing, **row} if i == index else r
+                    for i, r in enumerate(cache)
+                    if i == index
+                    or not product_id
+                    or extract_markaz_product_id(r.get('markaz_url')) != product_id
                 ]
-            return
-    cache.insert(0, row)
+        return [row, *cache]
+
+    tracked_cache().update(patch)
 
 
 def remove_tracked_rows_from_cache(markaz_urls):
     urls = {url for url in (markaz_urls or []) if url}
     if not urls:
         return
-    cache = st.session_state.get('tracked_rows_cache')
-    if cache is None:
-        return
-    st.session_state.tracked_rows_cache = [
-        row for row in cache if row.get('markaz_url') not in urls
-    ]
+    tracked_cache().update(
+        lambda cache: [row for row in cache if row.get('markaz_url') not in urls]
+    )
 
 
-def set_tracked_rows_cache(rows):
-    st.session_state.tracked_rows_cache = rows or []
+def _tracked_row_key(row):
+    return row.get('id') or row.get('markaz_url')
 
 
-def _merge_tracked_rows_cache(existing_rows, updated_rows):
-    """Merge batch upsert results into cached list without refetching."""
-    by_url = {row.get('markaz_url'): row for row in (existing_rows or []) if row.get('markaz_url')}
+def _merge_tracked_rows_cache(existing_rows, updated_rows, deleted_rows=None):
+    """Merge upsert results / a delta fetch into the cached list without refetching.
+
+    Rows are matched by id (URL for rows without one) and updated in place,
+    deleted rows dropped, and only new rows are sorted — the cached list is
+    already newest first.
+    """
+    deleted_keys = {_tracked_row_key(row) for row in deleted_rows or []}
+    merged = [row for row in existing_rows or [] if _tracked_row_key(row) not in deleted_keys]
+    positions = {_tracked_row_key(row): index for index, row in enumerate(merged)}
+    url_positions = {row.get('markaz_url'): index for index, row in enumerate(merged)}
+    new_rows = {}
+    replaced = set()
     for row in updated_rows or []:
-        url = row.get('markaz_url')
-        if url:
-            by_url[url] = {**by_url.get(url, {}), **row}
-    merged = list(by_url.values())
-    merged.sort(key=lambda row: row.get('created_at') or '', reverse=True)
+        key = _tracked_row_key(row)
+        if not key or key in deleted_keys:
+            continue
+        index = positions.get(key)
+        if index is not None:
+            merged[index] = {**merged[index], **row}
+            continue
+        # A new id under a cached URL replaces that row (re-added or merged duplicate).
+        if row.get('markaz_url') in url_positions:
+            replaced.add(url_positions[row['markaz_url']])
+        new_rows[key] = {**new_rows.get(key, {}), **row}
+    if replaced:
+        merged = [row for index, row in enumerate(merged) if index not in replaced]
+    if not new_rows:
+        return merged
+
+    new_rows = sorted(new_rows.values(), key=lambda row: row.get('created_at') or '', reverse=True)
+    newest_cached = (merged[0].get('created_at') or '') if merged else ''
+    merged = new_rows + merged
+    if (new_rows[-1].get('created_at') or '') < newest_cached:
+        merged.sort(key=lambda row: row.get('created_at') or '', reverse=True)
     return merged
 
 
+def _fetch_all_tracked_rows():
+    rows = list_tracked_products()
+    _increment_supabase_fetch_count()
+    return rows, tracked_rows_watermark(rows)
+
+
 def load_tracked_rows(force_refresh=False):
-    """Load tracked products once per session until Reload or force_refresh."""
-    if force_refresh or 'tracked_rows_cache' not in st.session_state:
-        st.session_state.tracked_rows_cache = list_tracked_products()
-        _increment_supabase_fetch_count()
-    return st.session_state.tracked_rows_cache
+    """Load tracked products once per process until Reload or force_refresh.
+
+    The list is shared by all sessions (see ``tracked_cache``). With a cached
+    list, ``force_refresh`` fetches only rows changed (and tombstones of rows
+    deleted) since the last sync when the store supports it.
+    """
+    cache = tracked_cache()
+    if force_refresh and cache.rows is not None:
+        # Full rows, same as _fetch_all_tracked_rows: the delta replaces cached rows.
+        delta = list_tracked_products_since(cache.watermark, columns=None)
+        if delta is not None:
+            rows = cache.update(
+                lambda rows: _merge_tracked_rows_cache(rows, delta['rows'], delta['deleted']),
+                watermark=delta['watermark'],
+            )
+            if rows is not None:
+                st.session_state['supabase_delta_count'] = st.session_state.get('supabase_delta_count', 0) + 1
+                return rows
+
+    if force_refresh:
+        return cache.reload(_fetch_all_tracked_rows)
+    return cache.load(_fetch_all_tracked_rows)
+
+
+# Tracked Products list view (rows per page).
+TRACKED_PAGE_SIZE = 50
+
+
+def tracked_list_filters(stock_filter, shopify_filter):
+    """Store-side filters for the tab, or None when the filter needs live Shopify status."""
+    if shopify_filter not in ('All', 'Not on Shopify'):
+        return None
+    return {
+        'stock_status': STOCK_FILTER_VALUES.get(stock_filter),
+        'shopify_linked': False if shopify_filter == 'Not on Shopify' else None,
+    }
+
+
+def load_tracked_page(filters, page):
+    """One list page fetched by keyset from Supabase, without loading the full table.
+
+    Counts and page cursors are cached per filter in the session and dropped
+    whenever the shared cache version moves (any session's patch / invalidate). Returns (cache, page) with ``page`` clamped
+    to the pages whose cursor is known (the view only steps one page at a time).
+    """
+    signature = (filters.get('stock_status'), filters.get('shopify_linked'))
+    version = tracked_cache().version
+    cache = st.session_state.get('tracked_page_cache')
+    if not cache or cache.get('signature') != signature or cache.get('version') != version:
+        total = count_tracked_products()
+        filtered = any(value is not None for value in signature)
+        cache = {
+            'signature': signature,
+            'version': version,
+            'total': total,
+            'matching': count_tracked_products(**filters) if filtered else total,
+            'cursors': [None],
+            'pages': {},
+        }
+        st.session_state.tracked_page_cache = cache
+
+    page = min(max(1, page), len(cache['cursors']))
+    if page not in cache['pages']:
+        rows, next_cursor = list_tracked_products_page(
+            limit=TRACKED_PAGE_SIZE,
+            cursor=cache['cursors'][page - 1],
+            columns=TRACKED_LIST_COLUMNS,
+            **filters,
+        )
+        cache['pages'][page] = rows
+        if next_cursor and len(cache['cursors']) == page:
+            cache['cursors'].append(next_cursor)
+    return cache, page
 
 
 def seed_shopify_status_map_from_rows(tracked_rows):
@@ -849,24 +976,30 @@ def load_shopify_status_map(tracked_rows, force_refresh=False):
     if not is_shopify_configured():
         return {}
 
+    cache = tracked_cache()
+
     if force_refresh:
         with st.spinner(
             "Fetching Shopify status (rate-limited ~2 calls/sec; "
             "products with saved IDs load in bulk)..."
         ):
-            previous = st.session_state.get('shopify_status_map') or {}
-            st.session_state.shopify_status_map = fetch_shopify_status_map(
+            return cache.set_status_map(fetch_shopify_status_map(
                 tracked_rows,
-                existing_map=previous,
-            )
-        return st.session_state.shopify_status_map
+                existing_map=cache.status_map or {},
+            ))
 
-    if 'shopify_status_map' not in st.session_state:
-        # First open this session: show linked/not-linked from DB only.
-        # Live Active/Draft comes from "Refresh Shopify Status" (avoids 429 spam).
-        st.session_state.shopify_status_map = seed_shopify_status_map_from_rows(tracked_rows)
+    status_map = cache.status_map
+    # Rows without a snapshot yet (first open, after invalidate, or new after
+    # Reload list): show linked/not-linked from DB only. Live Active/Draft
+    # comes from "Refresh Shopify Status" (avoids 429 spam).
+    unseen = [
+        row for row in tracked_rows or []
+        if (row.get('markaz_url') or row.get('id')) not in (status_map or {})
+    ]
+    if status_map is None or unseen:
+        return cache.add_missing_status(seed_shopify_status_map_from_rows(unseen))
 
-    return st.session_state.shopify_status_map
+    return status_map
 
 
 def refresh_shopify_status_for_row(row):
@@ -874,14 +1007,11 @@ def refresh_shopify_status_for_row(row):
         return False
 
     row_key = row.get('markaz_url') or row.get('id')
-    if 'shopify_status_map' not in st.session_state:
-        st.session_state.shopify_status_map = {}
-
-    previous = st.session_state.shopify_status_map
-    st.session_state.shopify_status_map.update(
-        fetch_shopify_status_map([row], existing_map=previous)
+    cache = tracked_cache()
+    status_map = cache.update_status_map(
+        fetch_shopify_status_map([row], existing_map=cache.status_map or {})
     )
-    snapshot = st.session_state.shopify_status_map.get(row_key) or {}
+    snapshot = status_map.get(row_key) or {}
     # Persist product_id when live lookup found it (speeds future bulk refresh).
     if (
         snapshot.get('on_shopify')
@@ -900,7 +1030,7 @@ def refresh_shopify_status_for_row(row):
             'shopify_product_id': snapshot.get('shopify_product_id'),
             'shopify_handle': snapshot.get('shopify_handle') or row.get('shopify_handle'),
         })
-    return row_key in st.session_state.shopify_status_map
+    return row_key in status_map
 
 
 def render_shopify_status_summary(tracked_rows, shopify_status_map):
@@ -963,10 +1093,14 @@ def render_tracked_products_heading():
         if st.button(
             "Reload list",
             key="reload_tracked_list",
-            help="Force refresh tracked products from Supabase (skips local cache).",
+            help="Force refresh tracked products from Supabase (only changed rows once the list is loaded).",
         ):
-            invalidate_tracked_rows_cache()
-            invalidate_shopify_status_cache()
+            # The live Shopify status map is shared and rate-limited to rebuild,
+            # so only the row list is reloaded; new rows get seeded entries.
+            if tracked_cache().rows is not None:
+                load_tracked_rows(force_refresh=True)
+            else:
+                invalidate_tracked_rows_cache()
             st.rerun()
 
 
@@ -1053,6 +1187,41 @@ def apply_shopify_publish_results(results):
     return created_count, updated_count, failed_results, warning_results
 
 
+# Pricing settings feed the Shopify prices, so a margin change republishes too.
+PUBLISH_FINGERPRINT_EXTRA_FIELDS = ('variant_price_adjustment', 'compare_at_price_adjustment')
+
+
+def skip_unchanged_published_products(products, tracked_rows, force=False):
+    """Drop products already on Shopify whose content matches the last publish.
+
+    Sets ``content_fingerprint`` on every product; returns (products, skipped_count).
+    """
+    rows_by_url = {
+        canonicalize_markaz_product_url(row.get('markaz_url') or '') or row.get('markaz_url'): row
+        for row in tracked_rows
+    }
+    changed = []
+    for product in products:
+        product['content_fingerprint'] = product_fingerprint(product, PUBLISH_FINGERPRINT_EXTRA_FIELDS)
+        row = rows_by_url.get(product.get('url'))
+        if force or not row or not row.get('shopify_product_id') or tracked_row_changed(row, product):
+            changed.append(product)
+    return changed, len(products) - len(changed)
+
+
+def save_published_fingerprints(products, publish_results):
+    if not is_supabase_configured():
+        return
+    fingerprints = {product.get('url'): product.get('content_fingerprint') for product in products}
+    items = []
+    for result in publish_results:
+        markaz_url = canonicalize_markaz_product_url(result.get('markaz_url') or '') or result.get('markaz_url')
+        if result.get('success') and fingerprints.get(markaz_url):
+            items.append({'markaz_url': markaz_url, 'content_fingerprint': fingerprints[markaz_url]})
+    for row in update_tracked_content_fingerprints(items):
+        patch_tracked_row_in_cache(row)
+
+
 def format_shopify_error_message(error_text):
     error_text = error_text or 'Unknown error'
     if 'merchant approval' in error_text.lower():
@@ -1072,12 +1241,13 @@ def format_shopify_error_message(error_text):
     return error_text
 
 
-def store_shopify_publish_feedback(created_count, updated_count, failed_results, warning_results=None):
+def store_shopify_publish_feedback(created_count, updated_count, failed_results, warning_results=None, unchanged_count=0):
     st.session_state.shopify_publish_feedback = {
         'created': created_count,
         'updated': updated_count,
         'failed': failed_results,
         'warnings': warning_results or [],
+        'unchanged': unchanged_count,
     }
 
 
@@ -1092,6 +1262,8 @@ def render_shopify_publish_feedback():
         feedback.get('failed', []),
         feedback.get('warnings', []),
     )
+    if feedback.get('unchanged'):
+        st.caption(f"Skipped **{feedback['unchanged']}** product(s) unchanged since their last publish.")
     if st.button('Dismiss publish results', key='dismiss_shopify_publish_feedback'):
         st.session_state.shopify_publish_feedback = None
         st.rerun()
@@ -1140,7 +1312,52 @@ def show_shopify_publish_summary(created_count, updated_count, failed_results, w
         )
 
 
-def fetch_markaz_products_from_tracked_rows(tracked_rows):
+def record_scrape_batch_stats(label, scrape_session):
+    """Keep the last batch scrape timing so it survives the st.rerun() after a batch."""
+    stats = scrape_session.stats()
+    if not stats.get('pages'):
+        return
+    st.session_state.last_scrape_batch_stats = {'label': label, **stats}
+
+
+def render_scrape_batch_stats():
+    stats = st.session_state.get('last_scrape_batch_stats')
+    if not stats:
+        return
+    traffic = ''
+    if stats.get('kb_per_page'):
+        traffic = (
+            f", ~{stats['kb_per_page']:,.0f} KB/page, "
+            f"{stats.get('blocked_requests', 0)} request(s) blocked"
+        )
+    if stats.get('http_pages'):
+        traffic += f", {stats['http_pages']} read without a browser"
+    if stats.get('cache_hits'):
+        traffic += f", {stats['cache_hits']} served from cache"
+    if stats.get('retries'):
+        traffic += f", {stats['retries']} retry(ies) ({stats.get('retried_ok', 0)} recovered)"
+    if stats.get('browser_recycles'):
+        traffic += f", browser recycled {stats['browser_recycles']}x"
+    if stats.get('peak_rss_mb'):
+        traffic += f", peak memory {stats['peak_rss_mb']:,.0f} MB"
+    st.caption(
+        f"Last Markaz batch ({stats['label']}): **{stats['pages']}** page(s) in "
+        f"**{stats['elapsed_seconds']:.1f}s** ({stats['seconds_per_page']:.2f}s/page, "
+        f"{stats['browser_launches']} browser launch(es){traffic})."
+    )
+
+
+def scrape_failure_message(result):
+    """Scrape error status, noting retries and whether retrying could help."""
+    message = result.get('status', 'Unknown error')
+    if result.get('attempts'):
+        message += f" (after {result['attempts']} attempts)"
+    if classify_scrape_failure(result) == 'permanent':
+        message += " — product looks removed from Markaz"
+    return message
+
+
+def fetch_markaz_products_from_tracked_rows(tracked_rows, force_refresh=False):
     if os.environ.get('MARKAZ_DEMO_MODE') == '1':
         from demo_mode.demo_markaz import fetch_demo_products_from_tracked_rows
 
@@ -1149,45 +1366,24 @@ def fetch_markaz_products_from_tracked_rows(tracked_rows):
     products = []
     processed_urls = set()
     failed = []
-    total = len(tracked_rows)
-
-    with sync_playwright() as playwright:
-        browser = launch_browser_for_serverless(playwright)
-        for index, row in enumerate(tracked_rows):
-            link = row.get('markaz_url', '').strip()
-            if not link:
-                continue
-
-            context = None
-            try:
-                context = browser.new_context(
-                    permissions=[],
-                    ignore_https_errors=True,
-                    viewport={'width': 1920, 'height': 1080},
-                )
-                page = context.new_page()
-                product_data = scrape_product_from_page(page, link)
-                if product_data.get('status') == 'success':
-                    apply_default_pricing_rules(product_data)
-                    products.append(product_data)
-                    processed_urls.add(link)
-                else:
-                    failed.append((link, product_data.get('status', 'Unknown error')))
-            except Exception as exc:
-                failed.append((link, str(exc)))
-            finally:
-                if context:
-                    try:
-                        context.close()
-                    except Exception:
-                        pass
-            if index < total - 1:
-                time.sleep(0.5)
 
-        try:
-            browser.close()
-        except Exception:
-            pass
+    links = []
+    for row in tracked_rows:
+        link = row.get('markaz_url', '').strip()
+        if link:
+            links.append(link)
+
+    scraper = MarkazConcurrentScraper(force_refresh=force_refresh)
+    results = scraper.run(links)
+    record_scrape_batch_stats('Markaz fetch', scraper)
+
+    for link, product_data in zip(links, results):
+        if product_data.get('status') == 'success':
+            apply_default_pricing_rules(product_data)
+            products.append(product_data)
+            processed_urls.add(link)
+        else:
+            failed.append((link, scrape_failure_message(product_data)))
 
     return products, processed_urls, failed
 
@@ -1200,17 +1396,20 @@ def render_tracked_products_tab():
         st.warning("Supabase is not configured. Add your keys to `.streamlit/secrets.toml`.")
         return
 
+    # The full table is only held in the shared cache once an action needed it;
+    # until then the list is read page by page from Supabase.
+    tracked_rows = tracked_cache().rows
     try:
-        tracked_rows = load_tracked_rows()
+        total_tracked = len(tracked_rows) if tracked_rows is not None else count_tracked_products()
     except Exception as exc:
         st.error(f"Could not load tracked products from Supabase: {exc}")
         return
 
-    if not tracked_rows:
+    if not total_tracked:
         st.info("No tracked products yet. Add a product in the Converter tab and it will appear here automatically.")
         return
 
-    dup_groups, dup_extra = count_duplicate_tracked_products(tracked_rows)
+    dup_groups, dup_extra = count_duplicate_tracked_products(tracked_rows) if tracked_rows is not None else (0, 0)
     if dup_groups:
         st.warning(
             f"Found **{dup_groups}** duplicate Markaz product group(s) "
@@ -1246,13 +1445,22 @@ def render_tracked_products_tab():
         help="Uses latest Shopify status snapshot. Click Refresh Shopify Status if list looks stale.",
     )
 
-    shopify_status_map = load_shopify_status_map(tracked_rows)
-    filtered_rows = get_filtered_tracked_rows(tracked_rows, stock_filter)
-    filtered_rows = get_filtered_tracked_rows_by_shopify(
-        filtered_rows,
-        shopify_filter,
-        shopify_status_map,
-    )
+    list_filters = tracked_list_filters(stock_filter, shopify_filter)
+    if tracked_rows is None and list_filters is None:
+        # Active / Draft / Archived come from the Shopify snapshot of every row.
+        tracked_rows = load_tracked_rows()
+
+    if tracked_rows is not None:
+        shopify_status_map = load_shopify_status_map(tracked_rows)
+        filtered_rows = get_filtered_tracked_rows(tracked_rows, stock_filter)
+        filtered_rows = get_filtered_tracked_rows_by_shopify(
+            filtered_rows,
+            shopify_filter,
+            shopify_status_map,
+        )
+    else:
+        shopify_status_map = None
+        filtered_rows = None
 
     auto_sync_shopify = st.checkbox(
         "Auto-sync to Shopify after Refresh All Status",
@@ -1260,6 +1468,15 @@ def render_tracked_products_tab():
         key="shopify_auto_sync_on_refresh",
         disabled=not is_shopify_configured(),
     )
+    force_markaz_refresh = st.checkbox(
+        "Re-scrape Markaz (ignore cached product data)",
+        value=False,
+        key="markaz_force_refresh",
+        help=(
+            "Send to Converter and Publish reuse product data scraped in the last few minutes unless this is ticked. "
+            "Publish also skips products unchanged since their last publish unless this is ticked."
+        ),
+    )
 
     refresh_col, shopify_refresh_col, send_col, sync_col, publish_col, delete_col = st.columns(6)
     with refresh_col:
@@ -1306,6 +1523,10 @@ def render_tracked_products_tab():
             help="Delete currently filtered products from Supabase and Shopify.",
         )
 
+    if filtered_rows is None and (delete_filtered or sync_to_shopify or publish_to_shopify or send_to_converter):
+        # Bulk actions need the whole filtered set: fetch just that slice server-side.
+        filtered_rows = list_tracked_products(columns=TRACKED_LIST_COLUMNS, **list_filters)
+
     if delete_filtered:
         if not filtered_rows:
             st.warning("No products match the current Markaz/Shopify filters to delete.")
@@ -1401,7 +1622,7 @@ def render_tracked_products_tab():
 
     if refresh_shopify_status:
         tracked_for_status = load_tracked_rows()
-        previous_map = st.session_state.get('shopify_status_map') or {}
+        previous_map = tracked_cache().status_map or {}
         with st.spinner(
             "Fetching Shopify status (bulk by product ID; handles throttled "
             "to stay under 2 calls/sec)..."
@@ -1410,7 +1631,7 @@ def render_tracked_products_tab():
                 tracked_for_status,
                 existing_map=previous_map,
             )
-        st.session_state.shopify_status_map = fresh_map
+        tracked_cache().set_status_map(fresh_map)
 
         # Save newly discovered product IDs so next refresh is mostly 1 bulk call.
         metadata_batch = []
@@ -1475,33 +1696,40 @@ def render_tracked_products_tab():
         tracked_rows = load_tracked_rows()
         progress = st.progress(0.0, text="Refreshing stock status...")
         batch_items = []
-        for index, row in enumerate(tracked_rows):
-            progress.progress((index + 1) / len(tracked_rows), text=f"Checking {index + 1} of {len(tracked_rows)}")
-            scraped = scrape_markaz_product(row['markaz_url'])
-            if scraped.get('status') == 'success':
-                existing_handle = (row.get('shopify_handle') or '').strip()
-                shopify_handle = existing_handle or generate_unique_handle(
-                    scraped.get('title', ''),
-                    scraped.get('base_sku', ''),
-                )
-                batch_items.append({
-                    'markaz_url': row['markaz_url'],
-                    'stock_status': scraped.get('stock_status', 'unknown'),
-                    'title': scraped.get('title'),
-                    'shopify_handle': shopify_handle,
-                })
+        unchanged_count = 0
+        with MarkazScrapeSession() as scrape_session:
+            for index, row in enumerate(tracked_rows):
+                progress.progress((index + 1) / len(tracked_rows), text=f"Checking {index + 1} of {len(tracked_rows)}")
+                scraped = scrape_session.check_stock(row['markaz_url'])
+                if scraped.get('status') == 'success':
+                    existing_handle = (row.get('shopify_handle') or '').strip()
+                    # Most rows are unchanged day to day: skip the write and the Shopify sync.
+                    if existing_handle and not tracked_row_changed(row, scraped):
+                        unchanged_count += 1
+                        continue
+                    shopify_handle = existing_handle or generate_unique_handle(
+                        scraped.get('title', ''),
+                        scraped.get('base_sku', ''),
+                    )
+                    batch_items.append({
+                        'markaz_url': row['markaz_url'],
+                        'stock_status': scraped.get('stock_status', 'unknown'),
+                        'title': scraped.get('title'),
+                        'shopify_handle': shopify_handle,
+                    })
+        record_scrape_batch_stats('Refresh All Status', scrape_session)
         progress.progress(1.0, text="Saving to Supabase...")
+        saved_rows = []
         if batch_items:
             saved_rows = batch_upsert_tracked_products(batch_items)
-            set_tracked_rows_cache(
-                _merge_tracked_rows_cache(load_tracked_rows(), saved_rows)
-            )
-        st.success("Stock status refreshed for all tracked products.")
-
-        refreshed_rows = load_tracked_rows()
+            tracked_cache().update(lambda rows: _merge_tracked_rows_cache(rows, saved_rows))
+        st.success(
+            f"Stock status refreshed for all tracked products. **{len(saved_rows)}** changed, "
+            f"**{unchanged_count}** unchanged."
+        )
 
-        if auto_sync_shopify and is_shopify_configured():
-            sync_results = sync_tracked_rows_to_shopify(refreshed_rows)
+        if saved_rows and auto_sync_shopify and is_shopify_configured():
+            sync_results = sync_tracked_rows_to_shopify(saved_rows)
             synced_count, failed_results = apply_shopify_sync_results(sync_results)
             show_shopify_sync_summary(synced_count, failed_results)
 
@@ -1530,14 +1758,29 @@ def render_tracked_products_tab():
             progress = st.progress(0.0, text="Fetching from Markaz...")
             status_container = st.empty()
             status_container.caption(f"Fetching **{len(filtered_rows)}** product(s) from Markaz...")
-            products, _, fetch_failed = fetch_markaz_products_from_tracked_rows(filtered_rows)
+            products, _, fetch_failed = fetch_markaz_products_from_tracked_rows(
+                filtered_rows,
+                force_refresh=force_markaz_refresh,
+            )
+            products, unchanged_count = skip_unchanged_published_products(
+                products,
+                filtered_rows,
+                force=force_markaz_refresh,
+            )
             progress.progress(0.5, text="Publishing to Shopify...")
             status_container.caption(f"Publishing **{len(products)}** product(s) to Shopify...")
-            publish_results = publish_products_to_shopify(products)
+            publish_results = publish_products_to_shopify(products) if products else []
             created_count, updated_count, publish_failed, publish_warnings = apply_shopify_publish_results(publish_results)
+            save_published_fingerprints(products, publish_results)
             progress.progress(1.0, text="Done.")
             status_container.caption("Finished.")
-            store_shopify_publish_feedback(created_count, updated_count, publish_failed, publish_warnings)
+            store_shopify_publish_feedback(
+                created_count,
+                updated_count,
+                publish_failed,
+                publish_warnings,
+                unchanged_count=unchanged_count,
+            )
             for link, error in fetch_failed:
                 st.warning(f"Markaz fetch failed: {link[:70]}... — {error}")
             invalidate_shopify_status_cache()
@@ -1550,7 +1793,10 @@ def render_tracked_products_tab():
             progress = st.progress(0.0, text="Fetching products from Markaz...")
             status_container = st.empty()
             status_container.caption(f"Fetching **{len(filtered_rows)}** product(s) from Markaz...")
-            products, processed_urls, failed = fetch_markaz_products_from_tracked_rows(filtered_rows)
+            products, processed_urls, failed = fetch_markaz_products_from_tracked_rows(
+                filtered_rows,
+                force_refresh=force_markaz_refresh,
+            )
             progress.progress(1.0, text="Done.")
             status_container.caption("Finished.")
 
@@ -1585,43 +1831,72 @@ def render_tracked_products_tab():
         filter_parts.append(f"Shopify: {shopify_filter}")
     filter_label = " · ".join(filter_parts) if filter_parts else "All"
 
+    # Pagination: 50 rows per page (list view only — bulk actions still use full filtered set)
+    requested_page = int(st.session_state.get('tracked_list_page', 1) or 1)
+    if tracked_rows is None:
+        page_cache, requested_page = load_tracked_page(list_filters, requested_page)
+        total_tracked = page_cache['total']
+        total_filtered = page_cache['matching']
+    else:
+        total_tracked = len(tracked_rows)
+        total_filtered = len(filtered_rows)
+
     if not filter_parts:
-        st.markdown(f"**{len(tracked_rows)}** saved URL(s)")
+        st.markdown(f"**{total_tracked}** saved URL(s)")
     else:
         st.markdown(
-            f"**{len(filtered_rows)}** matching of **{len(tracked_rows)}** "
+            f"**{total_filtered}** matching of **{total_tracked}** "
             f"({filter_label})"
         )
 
-    render_shopify_status_summary(tracked_rows, shopify_status_map)
+    if tracked_rows is not None:
+        render_shopify_status_summary(tracked_rows, shopify_status_map)
     fetch_count = st.session_state.get('supabase_fetch_count', 0)
+    delta_count = st.session_state.get('supabase_delta_count', 0)
     if fetch_count:
+        delta_note = f", **{delta_count}** changed-rows reload{'s' if delta_count != 1 else ''}" if delta_count else ''
         st.caption(
             f"Supabase list loaded from cache this session "
-            f"(**{fetch_count}** full fetch{'es' if fetch_count != 1 else ''} to database). "
+            f"(**{fetch_count}** full fetch{'es' if fetch_count != 1 else ''} to database{delta_note}). "
+            "Use **Reload list** only when you need fresh data."
+        )
+    elif tracked_rows is not None:
+        st.caption(
+            "Supabase list served from the cache shared with other open sessions. "
             "Use **Reload list** only when you need fresh data."
         )
+    else:
+        st.caption(
+            f"Showing pages straight from Supabase ({TRACKED_PAGE_SIZE} rows per request). "
+            "The full list is loaded only for bulk actions and live Shopify status."
+        )
+    render_scrape_batch_stats()
 
-    if not filtered_rows:
+    if not total_filtered:
         st.info(f"No products match filter **{filter_label}**.")
         return
 
-    # Pagination: 50 rows per page (list view only — bulk actions still use full filtered set)
-    TRACKED_PAGE_SIZE = 50
-    filter_signature = f"{stock_filter}|{shopify_filter}|{len(filtered_rows)}"
+    filter_signature = f"{stock_filter}|{shopify_filter}|{total_filtered}"
     if st.session_state.get('tracked_page_filter_sig') != filter_signature:
         st.session_state.tracked_page_filter_sig = filter_signature
-        st.session_state.tracked_list_page = 1
+        requested_page = 1
 
-    total_filtered = len(filtered_rows)
     total_pages = max(1, (total_filtered + TRACKED_PAGE_SIZE - 1) // TRACKED_PAGE_SIZE)
-    current_page = int(st.session_state.get('tracked_list_page', 1) or 1)
-    current_page = min(max(1, current_page), total_pages)
+    current_page = min(max(1, requested_page), total_pages)
     st.session_state.tracked_list_page = current_page
 
     start_idx = (current_page - 1) * TRACKED_PAGE_SIZE
     end_idx = min(start_idx + TRACKED_PAGE_SIZE, total_filtered)
-    page_rows = filtered_rows[start_idx:end_idx]
+    if tracked_rows is None:
+        page_cache, current_page = load_tracked_page(list_filters, current_page)
+        page_rows = page_cache['pages'][current_page]
+        # Linked / not-linked from the page's own columns, live snapshots win.
+        shopify_status_map = {
+            **seed_shopify_status_map_from_rows(page_rows),
+            **(tracked_cache().status_map or {}),
+        }
+    else:
+        page_rows = filtered_rows[start_idx:end_idx]
 
     nav_prev, nav_info, nav_next = st.columns([1, 3, 1])
     with nav_prev:
@@ -1719,7 +1994,7 @@ def render_tracked_products_tab():
             with action_col1:
                 if st.button("Refresh Status", key=f"refresh_tracked_{row['id']}", width='stretch'):
                     with st.spinner("Checking Markaz..."):
-                        scraped = scrape_markaz_product(row['markaz_url'])
+                        scraped = check_stock(row['markaz_url'])
                     if scraped.get('status') == 'success':
                         update_tracked_product_from_scrape(
                             row['markaz_url'],
@@ -1767,7 +2042,10 @@ def render_tracked_products_tab():
                     help="Fetch from Markaz and publish or update on Shopify.",
                 ):
                     with st.spinner("Publishing to Shopify..."):
-                        products, _, fetch_failed = fetch_markaz_products_from_tracked_rows([row])
+                        products, _, fetch_failed = fetch_markaz_products_from_tracked_rows(
+                            [row],
+                            force_refresh=force_markaz_refresh,
+                        )
                         if fetch_failed:
                             for link, error in fetch_failed:
                                 st.warning(f"Markaz fetch failed: {link[:70]}... — {error}")
@@ -1879,49 +2157,38 @@ def scrape_and_add_links_to_list(links, progress_bar=None, status_container=None
                 st.warning(f"⚠️ Skipped (error): {link[:60]}... — {str(e)}")
         return added_count
 
-    with sync_playwright() as p:
-        browser = launch_browser_for_serverless(p)
-        for i, link in enumerate(links):
-            _update(i, f"**Link {i + 1} of {total}** — fetching...")
-            if link in st.session_state.processed_urls:
-                st.warning(f"⚠️ Skipped (already added): {link[:60]}...")
-                continue
-            context = None
-            try:
-                context = browser.new_context(
-                    permissions=[],
-                    ignore_https_errors=True,
-                    viewport={'width': 1920, 'height': 1080},
-                )
-                page = context.new_page()
-                new_product_data = scrape_product_from_page(page, link)
-                if new_product_data.get("status") == "success":
-                    apply_default_pricing_rules(new_product_data)
-                    st.session_state.products_list.append(new_product_data)
-                    st.session_state.processed_urls.add(link)
-                    saved_ok, saved_error = save_product_to_supabase(new_product_data)
-                    if not saved_ok:
-                        st.warning(f"Supabase save failed for {link[:60]}... — {saved_error}")
-                    added_count += 1
-                else:
-                    st.warning(
-                        f"⚠️ Skipped (failed): {link[:60]}... — "
-                        f"{new_product_data.get('status', 'Unknown error')}"
-                    )
-            except Exception as e:
-                st.warning(f"⚠️ Skipped (error): {link[:60]}... — {str(e)}")
-            finally:
-                if context:
-                    try:
-                        context.close()
-                    except Exception:
-                        pass
-            if i < total - 1:
-                time.sleep(1)
-        try:
-            browser.close()
-        except Exception:
-            pass
+    pending = []
+    for link in links:
+        if link in st.session_state.processed_urls or link in pending:
+            st.warning(f"⚠️ Skipped (already added): {link[:60]}...")
+            continue
+        pending.append(link)
+
+    finished = []
+
+    def _on_result(index, result):
+        finished.append(index)
+        done = len(finished)
+        if status_container is not None:
+            status_container.caption(f"**Link {done} of {len(pending)}** fetched...")
+        if progress_bar is not None:
+            progress_bar.progress(done / len(pending), text=f"Link {done} of {len(pending)}")
+
+    scraper = MarkazConcurrentScraper()
+    results = scraper.run(pending, on_result=_on_result)
+    record_scrape_batch_stats('Bulk add', scraper)
+
+    for link, new_product_data in zip(pending, results):
+        if new_product_data.get("status") == "success":
+            apply_default_pricing_rules(new_product_data)
+            st.session_state.products_list.append(new_product_data)
+            st.session_state.processed_urls.add(link)
+            saved_ok, saved_error = save_product_to_supabase(new_product_data)
+            if not saved_ok:
+                st.warning(f"Supabase save failed for {link[:60]}... — {saved_error}")
+            added_count += 1
+        else:
+            st.warning(f"⚠️ Skipped (failed): {link[:60]}... — {scrape_failure_message(new_product_data)}")
 
     return added_count
 
@@ -1949,6 +2216,7 @@ def render_converter_tab():
     """, unsafe_allow_html=True)
 
     render_global_pricing_settings()
+    render_scrape_batch_stats()
     
     # Title + mode buttons: Single | Multiple | Category
     c_title, c_single, c_multi, c_category, c_empty = st.columns([2, 1, 1, 1, 5])
@@ -1993,6 +2261,7 @@ def render_converter_tab():
 
     category_start_page = 1
     category_end_page = 1
+    category_incremental = False
     if add_mode == "single":
         url_input = st.text_input(
             "Product URL",
@@ -2027,6 +2296,16 @@ def render_converter_tab():
                 key="category_end_page",
                 help="Inclusive. Example: 1→2 fetches page=1 and page=2.",
             )
+        category_incremental = st.checkbox(
+            "Only new products (stop at pages that are already tracked)",
+            value=False,
+            key="category_incremental",
+            disabled=not is_supabase_configured(),
+            help=(
+                "Skips products already in Tracked Products and stops paging once a page "
+                "has nothing new. 'To page' becomes the furthest page it may reach."
+            ),
+        )
     else:
         url_input = st.text_area(
             "Paste Multiple Product URLs (One per line)",
@@ -2133,13 +2412,33 @@ def render_converter_tab():
                 f"Scanning category pages **{int(category_start_page)}**–**{int(category_end_page)}**..."
             )
             with st.spinner("Reading product cards from Markaz category page(s)..."):
-                discovery = scrape_category_product_urls(
-                    category_url,
-                    start_page=int(category_start_page),
-                    end_page=int(category_end_page),
-                )
+                if category_incremental:
+                    try:
+                        known_product_ids = list_tracked_product_ids()
+                    except Exception as exc:
+                        st.warning(f"Could not load tracked product IDs, crawling every page: {exc}")
+                        known_product_ids = set()
+                    discovery = scrape_category_product_urls_incremental(
+                        category_url,
+                        known_product_ids,
+                        start_page=int(category_start_page),
+                        end_page=int(category_end_page),
+                    )
+                else:
+                    discovery = scrape_category_product_urls(
+                        category_url,
+                        start_page=int(category_start_page),
+                        end_page=int(category_end_page),
+                    )
 
-            if discovery.get("status") != "success":
+            if discovery.get("status") == "success" and not discovery.get("urls"):
+                progress_bar.progress(1.0, text="Done.")
+                status_container.caption("Finished.")
+                st.info(
+                    f"No new products found — {discovery.get('known_skipped', 0)} product(s) "
+                    f"on {len(discovery.get('pages') or [])} page(s) are already tracked."
+                )
+            elif discovery.get("status") != "success":
                 progress_bar.progress(1.0, text="Done.")
                 st.error(discovery.get("status", "Failed to read category page"))
                 for err in discovery.get("errors") or []:
@@ -2147,10 +2446,17 @@ def render_converter_tab():
             else:
                 links = discovery.get("urls") or []
                 for page_info in discovery.get("pages") or []:
+                    if 'known' in page_info:
+                        new_note = f"{page_info.get('new', 0)} new, {page_info['known']} already tracked"
+                    else:
+                        new_note = f"{page_info.get('unique_new', 0)} new"
                     st.caption(
                         f"Page {page_info.get('page')}: "
-                        f"{page_info.get('count', 0)} link(s) found "
-                        f"({page_info.get('unique_new', 0)} new)"
+                        f"{page_info.get('count', 0)} link(s) found ({new_note})"
+                    )
+                if discovery.get("stopped_early"):
+                    st.caption(
+                        f"Stopped after page {discovery['pages'][-1]['page']}: no new products beyond it."
                     )
                 st.info(f"Found **{len(links)}** unique product URL(s). Scraping products now...")
                 status_container.caption(f"Scraping **{len(links)}** product(s)...")
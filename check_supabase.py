@@ -1,7 +1,12 @@
 """Quick check after pasting Supabase keys into .streamlit/secrets.toml"""
 
 from supabase_config import get_supabase_credentials, is_supabase_configured
-from supabase_store import _rpc_available, list_tracked_products
+from supabase_store import (
+    _bulk_rpc_available,
+    _product_id_index_available,
+    _rpc_available,
+    list_tracked_products,
+)
 
 
 def main():
@@ -36,6 +41,16 @@ def main():
     else:
         print('RPC functions: not installed yet.')
         print('  Run supabase/03_rpc_functions.sql in Supabase SQL Editor for fewer API calls.')
+    if _bulk_rpc_available():
+        print('Bulk upsert RPC: installed (Refresh All saves in a few calls).')
+    else:
+        print('Bulk upsert RPC: not installed yet.')
+        print('  Run supabase/04_dedupe_markaz_products.sql, then supabase/06_bulk_upsert_by_product_id.sql.')
+    if _product_id_index_available():
+        print('Product id trigger: installed (lookups use the markaz_product_id index).')
+    else:
+        print('Product id trigger: not installed yet (lookups also match by URL).')
+        print('  Run supabase/07_markaz_product_id_trigger.sql in Supabase SQL Editor.')
 
 
 if __name__ == '__main__':
@@ -15,11 +15,20 @@ def activate_demo_mode():
 
     markaz_scraper.scrape_markaz_product = demo_scrape.scrape_markaz_product_demo
     markaz_scraper.scrape_product_from_page = demo_scrape.scrape_product_from_page_demo
+    markaz_scraper.MarkazScrapeSession = demo_scrape.DemoScrapeSession
+    markaz_scraper.check_stock = demo_scrape.check_stock_demo
     markaz_scraper.scrape_category_product_urls = demo_scrape.scrape_category_product_urls_demo
+    markaz_scraper.scrape_category_product_urls_incremental = (
+        demo_scrape.scrape_category_product_urls_incremental_demo
+    )
 
     supabase_config.is_supabase_configured = lambda: True
 
     supabase_store.list_tracked_products = demo_store.list_tracked_products
+    supabase_store.list_tracked_products_page = demo_store.list_tracked_products_page
+    supabase_store.count_tracked_products = demo_store.count_tracked_products
+    supabase_store.list_tracked_products_since = demo_store.list_tracked_products_since
+    supabase_store.list_tracked_product_ids = demo_store.list_tracked_product_ids
     supabase_store.get_tracked_product_by_url = demo_store.get_tracked_product_by_url
     supabase_store.get_tracked_product_by_handle = demo_store.get_tracked_product_by_handle
     supabase_store.upsert_tracked_product = demo_store.upsert_tracked_product
@@ -27,6 +36,7 @@ def activate_demo_mode():
     supabase_store.update_tracked_stock_status = demo_store.update_tracked_stock_status
     supabase_store.update_tracked_shopify_metadata = demo_store.update_tracked_shopify_metadata
     supabase_store.update_tracked_shopify_metadata_batch = demo_store.update_tracked_shopify_metadata_batch
+    supabase_store.update_tracked_content_fingerprints = demo_store.update_tracked_content_fingerprints
     supabase_store.delete_tracked_product = demo_store.delete_tracked_product
     supabase_store.delete_tracked_products = demo_store.delete_tracked_products
     supabase_store.count_duplicate_tracked_products = demo_store.count_duplicate_tracked_products
@@ -55,15 +65,22 @@ def rebind_app_module():
     from demo_mode import demo_scrape, demo_shopify, demo_store
 
     app_module.scrape_markaz_product = demo_scrape.scrape_markaz_product_demo
-    app_module.scrape_product_from_page = demo_scrape.scrape_product_from_page_demo
+    app_module.MarkazScrapeSession = demo_scrape.DemoScrapeSession
+    app_module.check_stock = demo_scrape.check_stock_demo
     app_module.scrape_category_product_urls = demo_scrape.scrape_category_product_urls_demo
+    app_module.scrape_category_product_urls_incremental = demo_scrape.scrape_category_product_urls_incremental_demo
     app_module.publish_products_to_shopify = demo_shopify.publish_products_to_shopify
     app_module.sync_tracked_rows_to_shopify = demo_shopify.sync_tracked_rows_to_shopify
     app_module.fetch_shopify_status_map = demo_shopify.fetch_shopify_status_map
     app_module.delete_tracked_row_from_shopify = demo_shopify.delete_tracked_row_from_shopify
     app_module.get_shopify_client = demo_shopify.get_shopify_client
     app_module.list_tracked_products = demo_store.list_tracked_products
+    app_module.list_tracked_products_page = demo_store.list_tracked_products_page
+    app_module.count_tracked_products = demo_store.count_tracked_products
+    app_module.list_tracked_products_since = demo_store.list_tracked_products_since
+    app_module.list_tracked_product_ids = demo_store.list_tracked_product_ids
     app_module.upsert_tracked_product = demo_store.upsert_tracked_product
     app_module.update_tracked_shopify_metadata = demo_store.update_tracked_shopify_metadata
     app_module.update_tracked_stock_status = demo_store.update_tracked_stock_status
+    app_module.update_tracked_content_fingerprints = demo_store.update_tracked_content_fingerprints
     app_module.delete_tracked_product = demo_store.delete_tracked_product
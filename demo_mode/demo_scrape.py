@@ -1,4 +1,5 @@
 import re
+import time
 from urllib.parse import urlparse
 
 from pricing_rules import get_default_price_adjustments
@@ -88,6 +89,67 @@ def scrape_product_from_page_demo(page, url):
     return scrape_markaz_product_demo(url)
 
 
+def check_stock_demo(url):
+    """Demo stand-in for markaz_scraper.check_stock (same stock-only fields)."""
+    result = scrape_markaz_product_demo(url)
+    if result.get('status') != 'success':
+        return result
+    return {key: result.get(key) for key in ('title', 'stock_status', 'base_sku', 'url', 'status')}
+
+
+class DemoScrapeSession:
+    """Drop-in for MarkazScrapeSession in demo mode (no browser is launched)."""
+
+    def __init__(self, *args, **kwargs):
+        self.pages_scraped = 0
+        self.browser_launches = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def start(self):
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        return self
+
+    def scrape(self, url):
+        self.start()
+        self.pages_scraped += 1
+        return scrape_markaz_product_demo(url)
+
+    def check_stock(self, url):
+        self.start()
+        self.pages_scraped += 1
+        return check_stock_demo(url)
+
+    @property
+    def elapsed_seconds(self):
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    def stats(self):
+        pages = self.pages_scraped
+        elapsed = self.elapsed_seconds
+        return {
+            'pages': pages,
+            'elapsed_seconds': round(elapsed, 2),
+            'seconds_per_page': round(elapsed / pages, 2) if pages else 0.0,
+            'browser_launches': 0,
+        }
+
+    def close(self):
+        if self.started_at is not None and self.finished_at is None:
+            self.finished_at = time.monotonic()
+
+
 def scrape_category_product_urls_demo(category_url, start_page=1, end_page=1):
     """Simulate category page product URL discovery for demo mode."""
     start_page = max(1, int(start_page or 1))
@@ -124,3 +186,43 @@ def scrape_category_product_urls_demo(category_url, start_page=1, end_page=1):
         'pages': pages,
         'errors': [],
     }
+
+
+def scrape_category_product_urls_incremental_demo(category_url, known_product_ids, start_page=1, end_page=None, **kwargs):
+    """Demo stand-in for scrape_category_product_urls_incremental (stops at the first all-known page)."""
+    start_page = max(1, int(start_page or 1))
+    end_page = max(start_page, int(end_page or start_page))
+    discovery = scrape_category_product_urls_demo(category_url, start_page, end_page)
+    if discovery.get('status') != 'success':
+        return {**discovery, 'known_skipped': 0, 'stopped_early': False}
+
+    known = {str(product_id) for product_id in known_product_ids or []}
+    urls = []
+    pages = []
+    known_skipped = 0
+    stopped_early = False
+    for page in discovery['pages']:
+        page_number = page['page']
+        page_urls = [url for url in discovery['urls'] if f'-item-{page_number}-' in url]
+        new_urls = [url for url in page_urls if url.rstrip('/').rsplit('/', 1)[-1] not in known]
+        urls.extend(new_urls)
+        known_skipped += len(page_urls) - len(new_urls)
+        pages.append({
+            'page': page_number,
+            'url': page['url'],
+            'count': len(page_urls),
+            'new': len(new_urls),
+            'known': len(page_urls) - len(new_urls),
+        })
+        if not new_urls:
+            stopped_early = page_number < end_page
+            break
+
+    return {
+        'status': 'success',
+        'urls': urls,
+        'pages': pages,
+        'errors': [],
+        'known_skipped': known_skipped,
+        'stopped_early': stopped_early,
+    }
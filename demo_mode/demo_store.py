@@ -26,9 +26,45 @@ def _norm(url):
     return canonicalize_markaz_product_url(url or '') or (url or '').strip()
 
 
-def list_tracked_products():
-    rows = _load_rows()
-    return sorted(rows, key=lambda row: row.get('created_at', ''), reverse=True)
+def _matches_filters(row, stock_status=None, shopify_linked=None):
+    if stock_status and row.get('stock_status', 'unknown') != stock_status:
+        return False
+    if shopify_linked is not None and bool(row.get('shopify_product_id')) != shopify_linked:
+        return False
+    return True
+
+
+def list_tracked_products(columns=None, stock_status=None, shopify_linked=None):
+    rows = [row for row in _load_rows() if _matches_filters(row, stock_status, shopify_linked)]
+    return sorted(rows, key=lambda row: (row.get('created_at', ''), row.get('id', '')), reverse=True)
+
+
+def list_tracked_products_page(limit=50, cursor=None, stock_status=None, shopify_linked=None, columns=None):
+    rows = list_tracked_products(stock_status=stock_status, shopify_linked=shopify_linked)
+    if cursor:
+        rows = [row for row in rows if (row.get('created_at', ''), row.get('id', '')) < tuple(cursor)]
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = (page[-1].get('created_at', ''), page[-1].get('id', ''))
+    return page, next_cursor
+
+
+def list_tracked_products_since(watermark, columns=None):
+    # Local storage is cheap to reload in full.
+    return None
+
+
+def count_tracked_products(stock_status=None, shopify_linked=None):
+    return len(list_tracked_products(stock_status=stock_status, shopify_linked=shopify_linked))
+
+
+def list_tracked_product_ids():
+    return {
+        product_id
+        for product_id in (extract_markaz_product_id(row.get('markaz_url') or '') for row in _load_rows())
+        if product_id
+    }
 
 
 def get_tracked_product_by_url(markaz_url):
@@ -169,6 +205,25 @@ def batch_upsert_tracked_products(items):
     return results
 
 
+def update_tracked_content_fingerprints(items):
+    fingerprints = {
+        _norm(item.get('markaz_url')): item.get('content_fingerprint')
+        for item in items or []
+        if item.get('markaz_url') and item.get('content_fingerprint')
+    }
+    if not fingerprints:
+        return []
+    rows = _load_rows()
+    updated = []
+    for row in rows:
+        fingerprint = fingerprints.get(_norm(row.get('markaz_url')))
+        if fingerprint:
+            row['content_fingerprint'] = fingerprint
+            updated.append(row)
+    _save_rows(rows)
+    return updated
+
+
 def update_tracked_shopify_metadata_batch(items):
     updated = 0
     for item in items or []:
@@ -0,0 +1,611 @@
+"""Concurrent Markaz product scraping on playwright.async_api.
+
+One shared Chromium runs up to ``concurrency`` product pages at once. Each
+worker owns one browser context and pulls URLs from a shared queue, so the
+number of open pages never exceeds the limit. Pages are read with the same
+``PRODUCT_SNAPSHOT_JS`` evaluate and ``parse_product_snapshot`` as the sync
+scraper's snapshot mode, so results keep the ``scrape_product_from_page`` shape.
+With the HTTP fast path on, pages are first read from plain HTML and Chromium
+is only launched for the ones that need it.
+
+Multi-page category crawls that need the scrolling browser fallback fan
+pages out the same way (``crawl_category_pages_concurrently``).
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+from markaz_scrape_cache import default_scrape_cache
+from markaz_scraper import (
+    ALLOWED_REQUEST_HOSTS,
+    BROWSER_MAX_RSS_MB,
+    BROWSER_RECYCLE_PAGES,
+    CATEGORY_HREFS_JS,
+    CATEGORY_PAYLOAD_PATHS_JS,
+    CATEGORY_PRODUCT_LINK_SELECTOR,
+    CATEGORY_READY_TIMEOUT_MS,
+    CATEGORY_SCROLL_JS,
+    CLEAR_PAGE_STATE_JS,
+    CONTEXT_MAX_PAGES,
+    DEFAULT_CATEGORY_CONCURRENCY,
+    DEFAULT_CONTEXT_OPTIONS,
+    HTTP_FAST_PATH,
+    PRODUCT_IMAGE_SELECTORS,
+    PRODUCT_READY_JS,
+    PRODUCT_READY_TIMEOUT_MS,
+    PRODUCT_SNAPSHOT_JS,
+    PageTrafficMeter,
+    RetryPolicy,
+    _category_html_candidates,
+    _empty_result,
+    _phase_timings,
+    http_validators,
+    browser_launch_options,
+    build_category_page_url,
+    cached_product_result,
+    parse_product_snapshot,
+    process_tree_rss_mb,
+    product_gone_status,
+    product_urls_from_category_sources,
+    remember_product_result,
+    scrape_product_http_first,
+    should_block_request,
+)
+
+DEFAULT_SCRAPE_CONCURRENCY = int(os.getenv('MARKAZ_SCRAPE_CONCURRENCY', '4'))
+# Per-host politeness: at most N pages in flight and one navigation start per interval.
+DEFAULT_PER_HOST_CONCURRENCY = int(os.getenv('MARKAZ_PER_HOST_CONCURRENCY', '4'))
+DEFAULT_PER_HOST_INTERVAL = float(os.getenv('MARKAZ_PER_HOST_INTERVAL', '0.25'))
+
+
+class HostPolitenessBudget:
+    """Cap concurrent pages and navigation rate per host (asyncio only)."""
+
+    def __init__(self, max_concurrent=DEFAULT_PER_HOST_CONCURRENCY, min_interval=DEFAULT_PER_HOST_INTERVAL):
+        self.max_concurrent = max(1, int(max_concurrent or 1))
+        self.min_interval = max(0.0, float(min_interval or 0.0))
+        self._semaphores = {}
+        self._locks = {}
+        self._last_start = {}
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = (urlparse(url).netloc or '').lower()
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_concurrent))
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with semaphore:
+            async with lock:
+                loop = asyncio.get_running_loop()
+                last = self._last_start.get(host)
+                if last is not None:
+                    wait = self.min_interval - (loop.time() - last)
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                self._last_start[host] = loop.time()
+            yield
+
+
+class ManagedContextPool:
+    """One Chromium plus a reusable context per worker, recycled over long runs.
+
+    Workers ``lease`` their context for each product page; contexts are
+    replaced after ``context_max_pages`` pages, and the browser is relaunched
+    (once in-flight pages finish) after ``recycle_pages`` pages or when this
+    process plus Chromium pass ``max_rss_mb``. Chromium is launched on the
+    first lease, so runs served entirely over HTTP never start it.
+    """
+
+    def __init__(
+        self,
+        playwright,
+        context_options,
+        recycle_pages=BROWSER_RECYCLE_PAGES,
+        max_rss_mb=BROWSER_MAX_RSS_MB,
+        context_max_pages=CONTEXT_MAX_PAGES,
+    ):
+        self._playwright = playwright
+        self.context_options = context_options
+        self.recycle_pages = max(1, int(recycle_pages or 1))
+        self.max_rss_mb = float(max_rss_mb or 0)
+        self.context_max_pages = max(1, int(context_max_pages or 1))
+        self.browser = None
+        self.launches = 0
+        self.recycles = 0
+        self.peak_rss_mb = None
+        self._contexts = {}
+        self._pages_since_launch = 0
+        self._in_flight = 0
+        self._recycle_due = False
+        self._condition = asyncio.Condition()
+
+    def sample_memory(self):
+        rss_mb = process_tree_rss_mb()
+        if rss_mb is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0.0, rss_mb)
+        return rss_mb
+
+    async def _context_for(self, worker_id):
+        if self.browser is not None and not self.browser.is_connected():
+            # Chromium crashed: drop its contexts and relaunch below.
+            await self.close()
+        if self.browser is None:
+            self.browser = await self._playwright.chromium.launch(**browser_launch_options())
+            self.launches += 1
+            self._pages_since_launch = 0
+            self._contexts = {}
+        entry = self._contexts.get(worker_id)
+        if entry is not None and entry[1] >= self.context_max_pages:
+            await _close_quietly(entry[0])
+            entry = None
+        if entry is None:
+            entry = [await self.browser.new_context(**self.context_options), 0]
+            self._contexts[worker_id] = entry
+        return entry
+
+    @asynccontextmanager
+    async def lease(self, worker_id):
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._recycle_due or self._in_flight == 0)
+            if self._recycle_due:
+                await self.close()
+                self._recycle_due = False
+                self.recycles += 1
+            entry = await self._context_for(worker_id)
+            self._in_flight += 1
+        try:
+            yield entry[0]
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                entry[1] += 1
+                self._pages_since_launch += 1
+                rss_mb = self.sample_memory()
+                if self._pages_since_launch >= self.recycle_pages or (
+                    self.max_rss_mb and rss_mb is not None and rss_mb > self.max_rss_mb
+                ):
+                    self._recycle_due = True
+                self._condition.notify_all()
+
+    async def close(self):
+        for context, _ in self._contexts.values():
+            await _close_quietly(context)
+        self._contexts = {}
+        if self.browser is not None:
+            await _close_quietly(self.browser)
+            self.browser = None
+
+
+async def _close_quietly(target):
+    try:
+        await target.close()
+    except Exception:
+        pass
+
+
+async def release_page_async(page):
+    """Clear the page's storage and its context's cookies, then close it."""
+    try:
+        await page.evaluate(CLEAR_PAGE_STATE_JS)
+        await page.context.clear_cookies()
+    except Exception:
+        pass
+    await _close_quietly(page)
+
+
+async def install_resource_blocking_async(page, meter=None, allowed_hosts=ALLOWED_REQUEST_HOSTS):
+    """Async counterpart of markaz_scraper.install_resource_blocking."""
+
+    async def handle_route(route):
+        request = route.request
+        if should_block_request(request.resource_type, request.url, allowed_hosts):
+            if meter is not None:
+                meter.blocked_requests += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route('**/*', handle_route)
+
+
+def attach_traffic_meter_async(page, meter):
+    """Start a sizes() lookup per finished request; await the returned list before summarising."""
+    pending = []
+
+    def on_request_finished(request):
+        pending.append(asyncio.ensure_future(request.sizes()))
+
+    page.on('requestfinished', on_request_finished)
+    return pending
+
+
+async def _drain_traffic_meter(meter, pending):
+    for outcome in await asyncio.gather(*pending, return_exceptions=True):
+        meter.record_sizes(None if isinstance(outcome, Exception) else outcome)
+
+
+async def wait_for_product_ready_async(page):
+    """Async counterpart of markaz_scraper.wait_for_product_ready."""
+    try:
+        await page.wait_for_function(PRODUCT_READY_JS, timeout=PRODUCT_READY_TIMEOUT_MS)
+        return True, None
+    except Exception:
+        pass
+
+    await page.wait_for_timeout(3000)
+    try:
+        await page.wait_for_selector('h1', timeout=15000)
+    except Exception:
+        try:
+            await page.wait_for_selector('script[type="application/ld+json"]', state='attached', timeout=5000)
+        except Exception as exc:
+            return False, f'Error: Could not load product page - {exc}'
+    return False, None
+
+
+async def scrape_product_from_page_async(page, url):
+    """Async counterpart of scrape_product_from_page (same result dict)."""
+    started = time.monotonic()
+    response = await page.goto(url, wait_until='domcontentloaded', timeout=60000)
+    navigated = time.monotonic()
+    gone = product_gone_status(response)
+    if gone:
+        result = _empty_result(url, gone)
+        result['timings'] = _phase_timings(navigated - started, 0.0, 0.0, False)
+        return result
+    ready_signal, error = await wait_for_product_ready_async(page)
+    ready = time.monotonic()
+    if error:
+        result = _empty_result(url, error)
+        result['timings'] = _phase_timings(navigated - started, ready - navigated, 0.0, ready_signal)
+        return result
+
+    snapshot = await page.evaluate(PRODUCT_SNAPSHOT_JS, list(PRODUCT_IMAGE_SELECTORS))
+    result = parse_product_snapshot(snapshot, url)
+    result['timings'] = _phase_timings(
+        navigated - started, ready - navigated, time.monotonic() - ready, ready_signal,
+    )
+    result['validators'] = http_validators(response.headers if response else None)
+    return result
+
+
+class MarkazConcurrentScraper:
+    """Scrape many product URLs with bounded parallelism over one browser.
+
+        scraper = MarkazConcurrentScraper(concurrency=4)
+        results = scraper.run(urls, on_result=lambda index, result: ...)
+
+    ``results`` is in input order. ``on_result`` fires as each page finishes
+    (completion order) on the calling thread, so Streamlit widgets can update.
+
+    Transient failures are not retried in place: they go to a deferred queue
+    with a jittered backoff (``retry_policy``) and are tried again after the
+    rest of the batch, so one slow page does not hold up the others.
+    ``on_result`` fires once per URL, with its final result; retried results
+    carry ``attempts``.
+    """
+
+    def __init__(
+        self,
+        concurrency=DEFAULT_SCRAPE_CONCURRENCY,
+        per_host_concurrency=DEFAULT_PER_HOST_CONCURRENCY,
+        per_host_interval=DEFAULT_PER_HOST_INTERVAL,
+        context_options=None,
+        block_resources=True,
+        http_first=HTTP_FAST_PATH,
+        use_cache=True,
+        force_refresh=False,
+        cache=None,
+        recycle_pages=BROWSER_RECYCLE_PAGES,
+        max_rss_mb=BROWSER_MAX_RSS_MB,
+        context_max_pages=CONTEXT_MAX_PAGES,
+        retry_policy=None,
+    ):
+        self.concurrency = max(1, int(concurrency or 1))
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_interval = per_host_interval
+        self.context_options = {**DEFAULT_CONTEXT_OPTIONS, **(context_options or {})}
+        self.block_resources = block_resources
+        self.http_first = http_first
+        self.cache = (cache or default_scrape_cache()) if use_cache else None
+        self.force_refresh = force_refresh
+        self.recycle_pages = recycle_pages
+        self.max_rss_mb = max_rss_mb
+        self.context_max_pages = context_max_pages
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retries = 0
+        self.retried_ok = 0
+        self._pool = None
+        self.pages_scraped = 0
+        self.http_pages = 0
+        self.cache_hits = 0
+        self.bytes_transferred = 0
+        self.blocked_requests = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def run(self, urls, on_result=None):
+        urls = list(urls or [])
+        if not urls:
+            return []
+        return asyncio.run(self.run_async(urls, on_result=on_result))
+
+    async def run_async(self, urls, on_result=None):
+        from playwright.async_api import async_playwright
+
+        urls = list(urls or [])
+        results = [None] * len(urls)
+        if not urls:
+            return results
+
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        budget = HostPolitenessBudget(self.per_host_concurrency, self.per_host_interval)
+        queue = asyncio.Queue()
+        for index, url in enumerate(urls):
+            queue.put_nowait((index, url, 1, 0.0))
+
+        try:
+            async with async_playwright() as playwright:
+                pool = ManagedContextPool(
+                    playwright,
+                    self.context_options,
+                    recycle_pages=self.recycle_pages,
+                    max_rss_mb=self.max_rss_mb,
+                    context_max_pages=self.context_max_pages,
+                )
+                self._pool = pool
+                try:
+                    # Each round drains the queue; retries deferred during it form the next round.
+                    while not queue.empty():
+                        deferred = []
+                        workers = [
+                            asyncio.create_task(
+                                self._worker(pool, worker_id, queue, budget, results, on_result, deferred)
+                            )
+                            for worker_id in range(min(self.concurrency, queue.qsize()))
+                        ]
+                        await asyncio.gather(*workers)
+                        for item in sorted(deferred, key=lambda item: item[3]):
+                            queue.put_nowait(item)
+                finally:
+                    pool.sample_memory()
+                    await pool.close()
+        except Exception as exc:
+            for index, url in enumerate(urls):
+                if results[index] is None:
+                    results[index] = _empty_result(url, f'Error: {exc}')
+        finally:
+            self.finished_at = time.monotonic()
+
+        return results
+
+    async def _worker(self, pool, worker_id, queue, budget, results, on_result, deferred):
+        loop = asyncio.get_running_loop()
+
+        def lease():
+            return pool.lease(worker_id)
+
+        while True:
+            try:
+                index, url, attempt, ready_at = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            wait = ready_at - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            result = await self._scrape_one(lease, url, budget)
+            self.pages_scraped += 1
+            if self.retry_policy.should_retry(result, attempt):
+                self.retries += 1
+                deferred.append((index, url, attempt + 1, loop.time() + self.retry_policy.delay(attempt)))
+                continue
+            if attempt > 1:
+                result['attempts'] = attempt
+                self.retried_ok += result.get('status') == 'success'
+            results[index] = result
+            if on_result is not None:
+                on_result(index, result)
+
+    async def _scrape_http(self, url, budget):
+        async with budget.slot(url):
+            result = await asyncio.to_thread(scrape_product_http_first, url)
+        if result is not None:
+            self.http_pages += 1
+            self.bytes_transferred += result['metrics']['bytes_transferred']
+        return result
+
+    async def _scrape_one(self, lease, url, budget):
+        if not self.force_refresh and self.cache is not None:
+            cached = await asyncio.to_thread(cached_product_result, self.cache, url)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+        result = await self._scrape_live(lease, url, budget)
+        remember_product_result(self.cache, url, result)
+        return result
+
+    async def _scrape_live(self, lease, url, budget):
+        if self.http_first:
+            try:
+                result = await self._scrape_http(url, budget)
+            except Exception:
+                result = None
+            if result is not None:
+                return result
+
+        meter = PageTrafficMeter()
+        pending_sizes = []
+        try:
+            async with budget.slot(url), lease() as context:
+                page_started = time.monotonic()
+                page = await context.new_page()
+                try:
+                    pending_sizes = attach_traffic_meter_async(page, meter)
+                    if self.block_resources:
+                        await install_resource_blocking_async(page, meter)
+                    result = await scrape_product_from_page_async(page, url)
+                    page_seconds = time.monotonic() - page_started
+                    await _drain_traffic_meter(meter, pending_sizes)
+                    result['metrics'] = meter.summary(page_seconds)
+                    return result
+                finally:
+                    # Before the lease ends, so a recycle never closes a live page.
+                    await release_page_async(page)
+        except Exception as exc:
+            return _empty_result(url, f'Error: {exc}')
+        finally:
+            self.bytes_transferred += meter.bytes_transferred
+            self.blocked_requests += meter.blocked_requests
+            for task in pending_sizes:
+                task.cancel()
+
+    @property
+    def elapsed_seconds(self):
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    def stats(self):
+        pages = self.pages_scraped
+        elapsed = self.elapsed_seconds
+        return {
+            'pages': pages,
+            'elapsed_seconds': round(elapsed, 2),
+            'seconds_per_page': round(elapsed / pages, 2) if pages else 0.0,
+            'browser_launches': self.browser_launches,
+            'kb_per_page': round(self.bytes_transferred / 1024 / pages, 1) if pages else 0.0,
+            'blocked_requests': self.blocked_requests,
+            'concurrency': self.concurrency,
+            'http_pages': self.http_pages,
+            'cache_hits': self.cache_hits,
+            'retries': self.retries,
+            'retried_ok': self.retried_ok,
+            'browser_recycles': self._pool.recycles if self._pool else 0,
+            'peak_rss_mb': self._pool.peak_rss_mb if self._pool else None,
+        }
+
+    @property
+    def browser_launches(self):
+        return self._pool.launches if self._pool else 0
+
+
+def scrape_markaz_products_concurrently(urls, concurrency=DEFAULT_SCRAPE_CONCURRENCY, on_result=None):
+    """Convenience wrapper: scrape ``urls`` concurrently, results in input order."""
+    return MarkazConcurrentScraper(concurrency=concurrency).run(urls, on_result=on_result)
+
+
+async def wait_for_category_ready_async(page):
+    """Async counterpart of markaz_scraper.wait_for_category_ready."""
+    try:
+        await page.wait_for_selector(CATEGORY_PRODUCT_LINK_SELECTOR, state='attached', timeout=CATEGORY_READY_TIMEOUT_MS)
+        return True
+    except Exception:
+        pass
+    await page.wait_for_timeout(2500)
+    return False
+
+
+async def extract_product_urls_from_category_page_async(page, base_url='https://www.markaz.app'):
+    """Async counterpart of markaz_scraper.extract_product_urls_from_category_page."""
+    try:
+        await page.wait_for_selector(CATEGORY_PRODUCT_LINK_SELECTOR, timeout=20000)
+    except Exception:
+        await page.wait_for_timeout(3000)
+
+    try:
+        await page.evaluate(CATEGORY_SCROLL_JS)
+        await page.wait_for_timeout(1000)
+    except Exception:
+        pass
+
+    hrefs = await page.eval_on_selector_all(CATEGORY_PRODUCT_LINK_SELECTOR, CATEGORY_HREFS_JS) or []
+
+    html_candidates = []
+    try:
+        html_candidates.extend(_category_html_candidates(await page.content() or ''))
+    except Exception:
+        pass
+
+    try:
+        html_candidates.extend(await page.evaluate(CATEGORY_PAYLOAD_PATHS_JS) or [])
+    except Exception:
+        pass
+
+    return product_urls_from_category_sources(hrefs, html_candidates, base_url=base_url)
+
+
+async def crawl_category_pages_async(
+    category_url,
+    page_numbers,
+    page_results,
+    concurrency=DEFAULT_CATEGORY_CONCURRENCY,
+    per_host_interval=DEFAULT_PER_HOST_INTERVAL,
+):
+    """Scroll-crawl ``page_numbers`` over a pool of contexts.
+
+    Appends ``(page_number, page_url, found_urls, error, 'browser')`` tuples
+    for markaz_scraper.merge_category_pages to ``page_results`` as pages
+    finish, so a browser failure keeps what was already collected.
+    """
+    from playwright.async_api import async_playwright
+
+    page_numbers = list(page_numbers)
+    budget = HostPolitenessBudget(concurrency, per_host_interval)
+    queue = asyncio.Queue()
+    for page_number in page_numbers:
+        queue.put_nowait(page_number)
+
+    async def crawl_page(context, page_number):
+        page_url = build_category_page_url(category_url, page_number)
+        page = None
+        try:
+            async with budget.slot(page_url):
+                page = await context.new_page()
+                await page.goto(page_url, wait_until='domcontentloaded', timeout=60000)
+                await wait_for_category_ready_async(page)
+                found = await extract_product_urls_from_category_page_async(page)
+            return page_number, page_url, found, None, 'browser'
+        except Exception as exc:
+            return page_number, page_url, [], exc, 'browser'
+        finally:
+            if page:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+
+    async def worker(browser):
+        context = await browser.new_context(**DEFAULT_CONTEXT_OPTIONS)
+        try:
+            while True:
+                try:
+                    page_number = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                page_results.append(await crawl_page(context, page_number))
+        finally:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(**browser_launch_options())
+        try:
+            await asyncio.gather(*(
+                worker(browser) for _ in range(min(max(1, int(concurrency or 1)), len(page_numbers)))
+            ))
+        finally:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+
+
+def crawl_category_pages_concurrently(category_url, page_numbers, page_results, concurrency=DEFAULT_CATEGORY_CONCURRENCY):
+    """Blocking wrapper around crawl_category_pages_async."""
+    asyncio.run(crawl_category_pages_async(category_url, page_numbers, page_results, concurrency))
@@ -0,0 +1,310 @@
+"""Saved Markaz pages for offline scraper replay and benchmarking.
+
+``record_fixtures`` opens live product / category pages once and stores the
+rendered HTML, the JSON-LD blocks and what the scraper extracted from them.
+``FixtureServer`` serves those pages from 127.0.0.1 and ``run_benchmark``
+replays them through ``scrape_product_from_page`` and
+``extract_product_urls_from_category_page``. Every request that does not go to
+the fixture server is aborted, so the benchmark never touches the network.
+
+Layout of a fixture directory::
+
+    manifest.json            # [{kind, url, key, html, ld, expected, recorded_at}]
+    product-733730.html      # page.content() after the scraper's ready wait
+    product-733730.ld.json   # parsed JSON-LD blocks
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from markaz_scraper import (
+    MarkazScrapeSession,
+    extract_markaz_product_id,
+    extract_product_urls_from_category_page,
+    scrape_product_from_page,
+    wait_for_category_ready,
+)
+
+FIXTURES_DIR = os.getenv(
+    'MARKAZ_FIXTURES_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'markaz'),
+)
+FIXTURE_KINDS = ('product', 'category')
+MANIFEST_NAME = 'manifest.json'
+
+# Per-scrape measurements and the page URL (local vs live) never match a recording.
+_UNCOMPARED_RESULT_KEYS = frozenset({'metrics', 'timings', 'validators', 'url', 'image_keys'})
+_FILE_NAME_PATTERN = re.compile(r'[^A-Za-z0-9]+')
+
+LD_SCRIPTS_JS = """() => Array.from(
+    document.querySelectorAll('script[type="application/ld+json"]'),
+    (script) => script.textContent || '',
+)"""
+
+
+def fixture_key(url):
+    """Request path (plus query) a fixture is served under."""
+    parsed = urlparse(url)
+    path = parsed.path or '/'
+    return f'{path}?{parsed.query}' if parsed.query else path
+
+
+def _fixture_name(kind, url):
+    product_id = extract_markaz_product_id(url) if kind == 'product' else None
+    token = product_id or _FILE_NAME_PATTERN.sub('-', fixture_key(url)).strip('-')
+    return f'{kind}-{token[:80] or "root"}'
+
+
+def load_manifest(directory=FIXTURES_DIR):
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as handle:
+            entries = json.load(handle)
+    except (OSError, ValueError):
+        return []
+    return [entry for entry in entries if isinstance(entry, dict) and entry.get('kind') in FIXTURE_KINDS]
+
+
+def _save_manifest(directory, entries):
+    with open(os.path.join(directory, MANIFEST_NAME), 'w', encoding='utf-8') as handle:
+        json.dump(entries, handle, indent=2)
+
+
+def _parsed_ld_blocks(texts):
+    blocks = []
+    for text in texts or []:
+        try:
+            blocks.append(json.loads(text))
+        except (TypeError, ValueError):
+            continue
+    return blocks
+
+
+def _record_page(page, kind, url):
+    """Open ``url`` like the scraper does and return (html, ld_blocks, expected)."""
+    if kind == 'product':
+        result = scrape_product_from_page(page, url)
+        if result.get('status') != 'success':
+            raise RuntimeError(result.get('status'))
+        expected = {key: value for key, value in result.items() if key not in _UNCOMPARED_RESULT_KEYS}
+    else:
+        page.goto(url, wait_until='domcontentloaded', timeout=60000)
+        wait_for_category_ready(page)
+        # Scrolls the lazy card grid in, so the saved DOM holds every card.
+        expected = {'urls': extract_product_urls_from_category_page(page)}
+    return page.content(), _parsed_ld_blocks(page.evaluate(LD_SCRIPTS_JS)), expected
+
+
+def record_fixtures(urls, kind='product', directory=FIXTURES_DIR):
+    """Save live pages as fixtures; returns (recorded_count, errors).
+
+    Re-recording a URL replaces its files and manifest entry.
+    """
+    if kind not in FIXTURE_KINDS:
+        raise ValueError(f'Unknown fixture kind: {kind!r}')
+    os.makedirs(directory, exist_ok=True)
+    entries = {entry['key']: entry for entry in load_manifest(directory)}
+    recorded = 0
+    errors = []
+
+    with MarkazScrapeSession(context_pool_size=1, block_resources=False, http_first=False, use_cache=False) as session:
+        for url in urls:
+            url = (url or '').strip()
+            if not url:
+                continue
+            page = None
+            try:
+                page = session.new_page()
+                html_source, ld_blocks, expected = _record_page(page, kind, url)
+            except Exception as exc:
+                errors.append(f'{url}: {exc}')
+                continue
+            finally:
+                if page:
+                    try:
+                        page.close()
+                    except Exception:
+                        pass
+
+            name = _fixture_name(kind, url)
+            with open(os.path.join(directory, f'{name}.html'), 'w', encoding='utf-8') as handle:
+                handle.write(html_source)
+            with open(os.path.join(directory, f'{name}.ld.json'), 'w', encoding='utf-8') as handle:
+                json.dump(ld_blocks, handle, indent=2)
+            key = fixture_key(url)
+            entries[key] = {
+                'kind': kind,
+                'url': url,
+                'key': key,
+                'html': f'{name}.html',
+                'ld': f'{name}.ld.json',
+                'expected': expected,
+                'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            }
+            recorded += 1
+
+    _save_manifest(directory, list(entries.values()))
+    return recorded, errors
+
+
+class FixtureServer:
+    """Serves recorded pages on 127.0.0.1 under their original path and query.
+
+    Anything not in the manifest (Next.js chunks, images, API calls) gets a
+    plain 404, so replayed pages render from the saved DOM alone.
+    """
+
+    def __init__(self, directory=FIXTURES_DIR, port=0):
+        self.directory = directory
+        self.entries = {entry['key']: entry for entry in load_manifest(directory)}
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._thread = None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                entry = server.entries.get(self.path)
+                body = server._read(entry['html']) if entry else None
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _read(self, name):
+        try:
+            with open(os.path.join(self.directory, name), 'rb') as handle:
+                return handle.read()
+        except OSError:
+            return None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def url_for(self, entry):
+        return f'{self.base_url}{entry["key"]}'
+
+    def is_local(self, url):
+        return url.startswith(f'{self.base_url}/')
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def route_offline(page, server):
+    """Abort every request that is not for the fixture server."""
+    def handle(route):
+        if server.is_local(route.request.url):
+            route.continue_()
+        else:
+            route.abort()
+
+    page.route('**/*', handle)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile (pct in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def _summarize(samples):
+    return {
+        phase: {
+            'p50': round(percentile(values, 50), 3),
+            'p95': round(percentile(values, 95), 3),
+            'runs': len(values),
+        }
+        for phase, values in samples.items()
+        if values
+    }
+
+
+def _product_run(page, server, entry):
+    started = time.monotonic()
+    result = scrape_product_from_page(page, server.url_for(entry))
+    total = time.monotonic() - started
+    timings = result.get('timings') or {}
+    phases = {phase: timings.get(phase, 0.0) for phase in ('navigate', 'ready', 'extract')}
+    phases['total'] = total
+    actual = {key: value for key, value in result.items() if key not in _UNCOMPARED_RESULT_KEYS}
+    return phases, actual == entry.get('expected')
+
+
+def _category_run(page, server, entry):
+    started = time.monotonic()
+    page.goto(server.url_for(entry), wait_until='domcontentloaded', timeout=60000)
+    navigated = time.monotonic()
+    found = extract_product_urls_from_category_page(page, base_url=server.base_url)
+    extracted = time.monotonic()
+    phases = {'navigate': navigated - started, 'extract': extracted - navigated, 'total': extracted - started}
+    # Links are replayed from 127.0.0.1, so compare product paths.
+    expected_paths = [urlparse(url).path for url in (entry.get('expected') or {}).get('urls') or []]
+    return phases, [urlparse(url).path for url in found] == expected_paths
+
+
+def run_benchmark(directory=FIXTURES_DIR, repeat=5, kinds=FIXTURE_KINDS):
+    """Replay every fixture ``repeat`` times; returns a report dict per kind.
+
+    Each kind reports p50 / p95 seconds per phase plus how many runs differed
+    from what was extracted when the fixture was recorded.
+    """
+    runners = {'product': _product_run, 'category': _category_run}
+    report = {}
+    with FixtureServer(directory) as server:
+        entries = [entry for entry in server.entries.values() if entry['kind'] in kinds]
+        if not entries:
+            return report
+        with MarkazScrapeSession(context_pool_size=1, block_resources=False, http_first=False, use_cache=False) as session:
+            for kind in kinds:
+                samples = {}
+                mismatches = []
+                for entry in (entry for entry in entries if entry['kind'] == kind):
+                    for _ in range(max(1, int(repeat))):
+                        page = session.new_page()
+                        try:
+                            route_offline(page, server)
+                            phases, matches = runners[kind](page, server, entry)
+                        finally:
+                            page.close()
+                        for phase, seconds in phases.items():
+                            samples.setdefault(phase, []).append(seconds)
+                        if not matches and entry['url'] not in mismatches:
+                            mismatches.append(entry['url'])
+                if samples:
+                    report[kind] = {'phases': _summarize(samples), 'mismatches': mismatches}
+    return report
@@ -0,0 +1,460 @@
+"""Browser-free Markaz product scraping over plain HTTP.
+
+Markaz server-renders the JSON-LD Product block and the product overview, so
+most products can be read from the raw HTML without launching Chromium. The
+HTML is turned into the same snapshot dict that ``PRODUCT_SNAPSHOT_JS`` returns
+and parsed with ``parse_product_snapshot``, so results keep the
+``scrape_product_from_page`` shape. Callers fall back to Playwright when
+``missing_required_fields`` reports gaps (e.g. client-rendered variant pickers).
+
+``requests`` is imported lazily: the Vercel function only ships Playwright, and
+there ``scrape_product_http`` reports an error so callers use the browser.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from html.parser import HTMLParser
+from urllib.parse import urlparse, urlunparse
+
+from markaz_scraper import (
+    PageTrafficMeter,
+    _category_html_candidates,
+    _empty_result,
+    _phase_timings,
+    _price_from_ld,
+    _price_from_text,
+    http_validators,
+    json_ld_product_from_texts,
+    build_category_page_url,
+    parse_product_snapshot,
+    product_urls_from_category_sources,
+    stock_check_from_ld,
+)
+
+HTTP_TIMEOUT = float(os.getenv('MARKAZ_HTTP_TIMEOUT', '15'))
+HTTP_POOL_SIZE = int(os.getenv('MARKAZ_HTTP_POOL_SIZE', '8'))
+DEFAULT_HTTP_HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+        '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+    ),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# innerText puts these on their own line; the overview regexes depend on it.
+_BLOCK_TAGS = frozenset({
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main',
+    'nav', 'ol', 'p', 'section', 'table', 'tr', 'ul',
+})
+_SKIP_TEXT_TAGS = frozenset({'script', 'style', 'noscript', 'template'})
+_VOID_TAGS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'source', 'track', 'wbr',
+})
+# Server-rendered image URLs only; class-based gallery selectors need a live DOM.
+_PRODUCT_IMAGE_HOST_MARKERS = (
+    'content.public.markaz.app/markazimagevideo/public/products/',
+    'static.markaz.app/pakistan/products/',
+)
+_JSON_LD_SCRIPT_PATTERN = re.compile(
+    r'<script\b[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL,
+)
+_NEXT_DATA_PATTERN = re.compile(
+    r'<script\b[^>]*id=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL,
+)
+_ESCAPED_PRODUCT_PATH_PATTERN = re.compile(r'\\/shop\\/product\\/[\w\-.%]+(?:\\/[\w\-.%]+)*')
+_INLINE_SPACE_PATTERN = re.compile(r'[ \t\r\f\v]+')
+_PADDED_NEWLINE_PATTERN = re.compile(r' *\n *')
+_REPEATED_NEWLINE_PATTERN = re.compile(r'\n{2,}')
+_VARIANT_LABEL_PATTERN = re.compile(r'^\s*(Size|Colou?r)\s*:?\s*$', re.IGNORECASE)
+
+_thread_state = threading.local()
+
+
+def get_http_session():
+    """Per-thread ``requests.Session`` with a keep-alive connection pool."""
+    session = getattr(_thread_state, 'session', None)
+    if session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update(DEFAULT_HTTP_HEADERS)
+        _thread_state.session = session
+    return session
+
+
+def _join_text(chunks):
+    text = _INLINE_SPACE_PATTERN.sub(' ', ''.join(chunks))
+    text = _PADDED_NEWLINE_PATTERN.sub('\n', text)
+    return _REPEATED_NEWLINE_PATTERN.sub('\n', text).strip()
+
+
+class _ProductHTMLParser(HTMLParser):
+    """Single pass over product HTML collecting what PRODUCT_SNAPSHOT_JS reads."""
+
+    def __init__(self, html_source):
+        super().__init__(convert_charrefs=True)
+        self.html_source = html_source
+        # getpos() counts '\n' only, so map (line, column) back to string offsets the same way.
+        self._line_offsets = [0] + [match.end() for match in re.finditer('\n', html_source)]
+
+        self.json_ld = []
+        self.h1_text = None
+        # Same price scopes as PRODUCT_SNAPSHOT_JS: the h1's 3rd div ancestor, then <main>.
+        self.h1_scope_text = None
+        self.main_text = None
+        self.nav_links = []
+        self.main_links = []
+        self.images = []
+        self.overview_html = None
+        self.overview_text = None
+        self.overview_has_heading = False
+        self.has_variant_label = False
+
+        self._body_chunks = []
+        # Body chunk index where each open <div> / the outer <main> starts.
+        self._div_starts = []
+        self._h1_scope_depth = None
+        self._main_start = None
+        self._skip_depth = 0
+        self._script_chunks = None
+        self._h1_chunks = None
+        self._nav_depth = 0
+        self._main_depth = 0
+        self._link = None
+        self._overview_tag = None
+        self._overview_depth = 0
+        self._overview_start = None
+        self._overview_chunks = None
+        self._h2_chunks = None
+
+    def _offset(self):
+        line, column = self.getpos()
+        return self._line_offsets[line - 1] + column
+
+    def _append_text(self, text):
+        self._body_chunks.append(text)
+        if self._overview_chunks is not None:
+            self._overview_chunks.append(text)
+        if self._h1_chunks is not None:
+            self._h1_chunks.append(text)
+        if self._link is not None:
+            self._link[1].append(text)
+        if self._h2_chunks is not None:
+            self._h2_chunks.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if tag in _BLOCK_TAGS:
+            self._append_text('\n')
+
+        if tag == 'script' and (attributes.get('type') or '').lower() == 'application/ld+json':
+            self._script_chunks = []
+        if tag in _SKIP_TEXT_TAGS:
+            self._skip_depth += 1
+            return
+        if tag in _VOID_TAGS:
+            if tag == 'img':
+                self._record_image(attributes)
+            return
+
+        if self._overview_tag is not None:
+            if tag == self._overview_tag:
+                self._overview_depth += 1
+        elif attributes.get('id') == 'desktop-product-overview' and self.overview_html is None:
+            self._overview_tag = tag
+            self._overview_depth = 1
+            self._overview_start = self._offset() + len(self.get_starttag_text() or '')
+            self._overview_chunks = []
+
+        if tag == 'div':
+            self._div_starts.append(len(self._body_chunks))
+        elif tag == 'h1' and self.h1_text is None:
+            self._h1_chunks = []
+            if len(self._div_starts) >= 3:
+                self._h1_scope_depth = len(self._div_starts) - 3
+        elif tag == 'h2' and self._overview_chunks is not None:
+            self._h2_chunks = []
+        elif tag == 'nav':
+            self._nav_depth += 1
+        elif tag == 'main':
+            if not self._main_depth and self.main_text is None:
+                self._main_start = len(self._body_chunks)
+            self._main_depth += 1
+        elif tag == 'a' and (self._nav_depth or self._main_depth):
+            self._link = (attributes.get('href'), [])
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TEXT_TAGS:
+            if tag == 'script' and self._script_chunks is not None:
+                self.json_ld.append(''.join(self._script_chunks))
+                self._script_chunks = None
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+
+        if tag == 'div' and self._div_starts:
+            start = self._div_starts.pop()
+            if self._h1_scope_depth == len(self._div_starts):
+                self.h1_scope_text = _join_text(self._body_chunks[start:])
+                self._h1_scope_depth = None
+        elif tag == 'h1' and self._h1_chunks is not None:
+            self.h1_text = _join_text(self._h1_chunks)
+            self._h1_chunks = None
+        elif tag == 'h2' and self._h2_chunks is not None:
+            if 'product overview' in ''.join(self._h2_chunks).lower():
+                self.overview_has_heading = True
+            self._h2_chunks = None
+        elif tag == 'nav':
+            self._nav_depth = max(0, self._nav_depth - 1)
+        elif tag == 'main':
+            self._main_depth = max(0, self._main_depth - 1)
+            if not self._main_depth and self._main_start is not None:
+                self.main_text = _join_text(self._body_chunks[self._main_start:])
+                self._main_start = None
+        elif tag == 'a' and self._link is not None:
+            href, chunks = self._link
+            text = _join_text(chunks)
+            if self._nav_depth:
+                self.nav_links.append((text, href))
+            if self._main_depth and href and '/shop' in href:
+                self.main_links.append((text, href))
+            self._link = None
+
+        if tag in _BLOCK_TAGS:
+            self._append_text('\n')
+
+        if self._overview_tag == tag:
+            self._overview_depth -= 1
+            if self._overview_depth == 0:
+                self.overview_html = self.html_source[self._overview_start:self._offset()]
+                self.overview_text = _join_text(self._overview_chunks)
+                self._overview_tag = None
+                self._overview_chunks = None
+
+    def handle_data(self, data):
+        if self._script_chunks is not None:
+            self._script_chunks.append(data)
+            return
+        if self._skip_depth:
+            return
+        if _VARIANT_LABEL_PATTERN.match(data) and data.strip():
+            self.has_variant_label = True
+        self._append_text(data)
+
+    def _record_image(self, attributes):
+        attrs = (attributes.get('src'), attributes.get('data-src'), attributes.get('data-lazy-src'))
+        src = next((value for value in attrs if value), '')
+        if any(marker in src for marker in _PRODUCT_IMAGE_HOST_MARKERS):
+            self.images.append(attrs)
+
+    @property
+    def body_text(self):
+        return _join_text(self._body_chunks)
+
+
+def product_snapshot_from_html(html_source):
+    """Build a PRODUCT_SNAPSHOT_JS-shaped dict from raw product page HTML.
+
+    Adds ``has_variant_label`` so callers can tell a Size/Colour picker exists
+    even though its buttons (client-rendered) are not in the snapshot.
+    """
+    parser = _ProductHTMLParser(html_source or '')
+    parser.feed(html_source or '')
+    parser.close()
+    return {
+        'json_ld': parser.json_ld,
+        'h1_text': parser.h1_text,
+        'price_scope_texts': [parser.h1_scope_text, parser.main_text],
+        'body_text': parser.body_text,
+        'overview_html': parser.overview_html,
+        'overview_text': parser.overview_text,
+        'heading_overview_text': parser.overview_text if parser.overview_has_heading else None,
+        'nav_links': parser.nav_links,
+        'main_links': parser.main_links,
+        'size_buttons': [],
+        'color_buttons': [],
+        'color_label_text': None,
+        'images': [parser.images],
+        'has_variant_label': parser.has_variant_label,
+    }
+
+
+def fetch_product_html(url, session=None, timeout=HTTP_TIMEOUT):
+    """GET a product page; returns the ``requests.Response`` (raises on HTTP errors)."""
+    response = (session or get_http_session()).get(url, timeout=timeout)
+    response.raise_for_status()
+    return response
+
+
+def revalidate_product_html(url, validators, session=None, timeout=HTTP_TIMEOUT):
+    """Conditional GET with cached validators; True when Markaz answers 304."""
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    if not headers:
+        return False
+    response = (session or get_http_session()).get(url, headers=headers, timeout=timeout, stream=True)
+    try:
+        return response.status_code == 304
+    finally:
+        response.close()
+
+
+def _has_scoped_price(snapshot):
+    """True when the price came from JSON-LD or the title / main block, not the whole page."""
+    if _price_from_ld(json_ld_product_from_texts(snapshot.get('json_ld'))) is not None:
+        return True
+    return any(
+        _price_from_text(text) is not None
+        for text in snapshot.get('price_scope_texts') or []
+        if text
+    )
+
+
+def missing_required_fields(result, snapshot=None):
+    """Names of fields the HTTP path could not fill (empty list = usable result).
+
+    A price found only by scanning the whole page (could be a delivery fee or a
+    related product) counts as missing, so the browser path re-reads it.
+    """
+    if not result or result.get('status') != 'success':
+        return ['status']
+    missing = []
+    if not result.get('title'):
+        missing.append('title')
+    if not result.get('price') or result['price'] == '0.00' or (snapshot and not _has_scoped_price(snapshot)):
+        missing.append('price')
+    if not result.get('image_urls'):
+        missing.append('image_urls')
+    if result.get('stock_status') not in ('in_stock', 'out_of_stock'):
+        missing.append('stock_status')
+    if not result.get('description') or result['description'] == 'No description available':
+        missing.append('description')
+    if (snapshot or {}).get('has_variant_label') and result.get('option1_name') == 'Title':
+        missing.append('variants')
+    return missing
+
+
+def scrape_product_http(url, session=None):
+    """Scrape one product from its HTML; never raises.
+
+    Results carry ``timings`` (navigate = HTTP fetch), ``metrics`` (one request,
+    bytes received), ``validators`` (ETag / Last-Modified) and
+    ``missing_fields`` listing anything the browser path should fill instead.
+    """
+    started = time.monotonic()
+    meter = PageTrafficMeter()
+    try:
+        response = fetch_product_html(url, session=session)
+        html_source = response.text
+        meter.record_sizes({'responseBodySize': len(response.content)})
+    except Exception as exc:
+        result = _empty_result(url, f'Error: HTTP fetch failed - {exc}')
+        result['missing_fields'] = ['status']
+        return result
+    fetched = time.monotonic()
+
+    snapshot = product_snapshot_from_html(html_source)
+    result = parse_product_snapshot(snapshot, url)
+    finished = time.monotonic()
+    result['timings'] = _phase_timings(fetched - started, 0.0, finished - fetched, True)
+    result['metrics'] = meter.summary(finished - started)
+    result['validators'] = http_validators(response.headers)
+    result['missing_fields'] = missing_required_fields(result, snapshot)
+    return result
+
+
+def check_stock_http(url, session=None):
+    """Stock check from the JSON-LD offer in the raw HTML; None if it is not there."""
+    try:
+        html_source = fetch_product_html(url, session=session).text
+    except Exception:
+        return None
+    product_ld = json_ld_product_from_texts(_JSON_LD_SCRIPT_PATTERN.findall(html_source))
+    return stock_check_from_ld(product_ld, url)
+
+
+def _next_data_build_id(html_source):
+    match = _NEXT_DATA_PATTERN.search(html_source or '')
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1)).get('buildId') or None
+    except (ValueError, AttributeError):
+        return None
+
+
+def _next_data_url(page_url, build_id):
+    """Next.js pages-router data route for ``page_url`` (same query string)."""
+    parsed = urlparse(page_url)
+    path = parsed.path.rstrip('/') or '/index'
+    return urlunparse((parsed.scheme, parsed.netloc, f'/_next/data/{build_id}{path}.json', '', parsed.query, ''))
+
+
+def category_urls_from_payload(text):
+    """Product URLs from embedded Next.js data, JSON or HTML without rendering cards."""
+    candidates = _category_html_candidates(text)
+    candidates.extend(_ESCAPED_PRODUCT_PATH_PATTERN.findall(text or ''))
+    return product_urls_from_category_sources([], candidates)
+
+
+def fetch_category_page_payload(page_url, session=None, build_id=None, timeout=HTTP_TIMEOUT):
+    """Product URLs for one category page from its data payload.
+
+    With a known Next.js ``build_id`` the JSON data route is tried first; the
+    server-rendered HTML (``__NEXT_DATA__`` and inline flight data) is the
+    fallback. Returns ``(urls, build_id)``.
+    """
+    session = session or get_http_session()
+    if build_id:
+        try:
+            response = session.get(_next_data_url(page_url, build_id), timeout=timeout)
+            if response.ok:
+                urls = category_urls_from_payload(response.text)
+                if urls:
+                    return urls, build_id
+        except Exception:
+            pass
+
+    response = session.get(page_url, timeout=timeout)
+    response.raise_for_status()
+    return category_urls_from_payload(response.text), _next_data_build_id(response.text)
+
+
+def crawl_category_pages_from_payload(category_url, page_numbers, session=None):
+    """Payload-only crawl; ``(page_number, page_url, urls, error, 'payload')`` per page.
+
+    Pages that yield no URLs come back with an empty list so callers can send
+    them through the scrolling browser crawl instead.
+    """
+    try:
+        session = session or get_http_session()
+    except ImportError as exc:
+        return [
+            (page_number, build_category_page_url(category_url, page_number), [], exc, 'payload')
+            for page_number in page_numbers
+        ]
+
+    page_results = []
+    build_id = None
+    for page_number in page_numbers:
+        page_url = build_category_page_url(category_url, page_number)
+        try:
+            urls, build_id = fetch_category_page_payload(page_url, session=session, build_id=build_id)
+            page_results.append((page_number, page_url, urls, None, 'payload'))
+        except Exception as exc:
+            page_results.append((page_number, page_url, [], exc, 'payload'))
+    return page_results
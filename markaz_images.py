@@ -0,0 +1,114 @@
+"""Image identity shared by the Markaz scraper and the Shopify publisher.
+
+Every product image gets a canonical URL and a short identity key once, when
+it is scraped:
+
+- ``canonical_image_url`` unwraps Next.js ``/_next/image?url=...`` links,
+  rewrites ``static.markaz.app`` to the ``content.public`` CDN (Shopify rejects
+  the static host's content-type) and drops query strings / fragments on
+  Markaz hosts.
+- ``image_key`` hashes the file name, ignoring host, query and the
+  ``_<uuid>`` suffix Shopify appends on upload, so a Markaz source and the
+  Shopify-hosted copy made from it share a key.
+
+Results carry ``image_keys`` next to ``image_urls``; ``ProductImages`` dedupes
+with a set of keys instead of scanning lists.
+"""
+
+import hashlib
+import re
+from urllib.parse import parse_qs, urljoin, urlparse, urlunparse
+
+CONTENT_IMAGE_BASE = 'https://content.public.markaz.app/markazimagevideo/public/products/'
+
+_STATIC_IMAGE_URL_PATTERN = re.compile(r'https?://static\.markaz\.app/pakistan/products/([^?#]+)', re.IGNORECASE)
+_SHOPIFY_UPLOAD_SUFFIX_PATTERN = re.compile(
+    r'_[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$',
+    re.IGNORECASE,
+)
+_IMAGE_EXTENSION_PATTERN = re.compile(r'\.(?:jpe?g|png|webp|gif|avif|heic)$', re.IGNORECASE)
+
+
+def _is_markaz_host(host):
+    host = (host or '').lower()
+    return host == 'markaz.app' or host.endswith('.markaz.app')
+
+
+def canonical_image_url(url, base_url=''):
+    """Fetchable canonical form of a product image URL ('' when empty)."""
+    url = (url or '').strip()
+    if not url:
+        return ''
+    if base_url and not url.startswith(('http://', 'https://')):
+        url = urljoin(base_url, url)
+
+    parsed = urlparse(url)
+    if parsed.path.endswith('/_next/image'):
+        inner = (parse_qs(parsed.query).get('url') or [''])[0]
+        if inner:
+            return canonical_image_url(inner, base_url=url)
+
+    static_match = _STATIC_IMAGE_URL_PATTERN.match(url)
+    if static_match:
+        return f'{CONTENT_IMAGE_BASE}{static_match.group(1)}'
+    if _is_markaz_host(parsed.hostname):
+        return urlunparse(parsed._replace(query='', fragment=''))
+    return url
+
+
+def image_key(url):
+    """Short identity of an image: same file on Markaz or Shopify = same key."""
+    path = urlparse(canonical_image_url(url)).path.rstrip('/')
+    name = path.rsplit('/', 1)[-1].lower()
+    stem = _SHOPIFY_UPLOAD_SUFFIX_PATTERN.sub('', _IMAGE_EXTENSION_PATTERN.sub('', name))
+    source = stem or (url or '').split('?')[0].lower()
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
+
+
+class ProductImages:
+    """Ordered, deduplicated product images with their identity keys."""
+
+    def __init__(self):
+        self.urls = []
+        self.keys = []
+        self._seen = set()
+
+    @classmethod
+    def from_product(cls, product):
+        """Reuse the keys a scrape stored; compute them only for older results."""
+        images = cls()
+        urls = (product or {}).get('image_urls') or []
+        keys = (product or {}).get('image_keys') or []
+        if len(keys) == len(urls):
+            for url, key in zip(urls, keys):
+                images.add(url, key=key, canonical=True)
+        else:
+            for url in urls:
+                images.add(url)
+        return images
+
+    def add(self, url, key=None, canonical=False):
+        """Append ``url`` unless an image with the same key is present."""
+        if not canonical:
+            url = canonical_image_url(url)
+        if not url:
+            return False
+        key = key or image_key(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self.urls.append(url)
+        self.keys.append(key)
+        return True
+
+    def __contains__(self, key):
+        return key in self._seen
+
+    def __iter__(self):
+        return iter(zip(self.urls, self.keys))
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __bool__(self):
+        return bool(self.urls)
@@ -0,0 +1,139 @@
+"""On-disk cache of full Markaz scrape results, keyed by Markaz product id.
+
+Send to Converter, Publish to Shopify and the per-row publish button all
+re-scrape the same products minutes apart. Successful results are kept as one
+JSON file per product id. Entries younger than the TTL are served as-is.
+Older entries are revalidated with the stored ETag / Last-Modified when Markaz
+sent them (a 304 renews the entry), otherwise they are scraped again.
+
+Pass ``force_refresh=True`` to the scrapers (or set ``MARKAZ_SCRAPE_CACHE=0``)
+to bypass the cache.
+"""
+
+import copy
+import json
+import os
+import tempfile
+import time
+
+from markaz_scraper import extract_markaz_product_id
+
+SCRAPE_CACHE_ENABLED = os.getenv('MARKAZ_SCRAPE_CACHE', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+SCRAPE_CACHE_DIR = os.getenv(
+    'MARKAZ_SCRAPE_CACHE_DIR',
+    os.path.join(tempfile.gettempdir(), 'markaz_scrape_cache'),
+)
+SCRAPE_CACHE_TTL = float(os.getenv('MARKAZ_SCRAPE_CACHE_TTL', '1800'))
+# Per-scrape measurements; a cache hit should not report the original page's numbers.
+_TRANSIENT_RESULT_KEYS = frozenset({'metrics', 'timings', 'validators'})
+
+
+class ScrapeCache:
+    """JSON-file cache of ``scrape_product_from_page`` results."""
+
+    def __init__(self, directory=SCRAPE_CACHE_DIR, ttl_seconds=SCRAPE_CACHE_TTL):
+        self.directory = directory
+        self.ttl_seconds = max(0.0, float(ttl_seconds or 0.0))
+
+    def _path(self, url):
+        product_id = extract_markaz_product_id(url)
+        if not product_id:
+            return None
+        return os.path.join(self.directory, f'{product_id}.json')
+
+    def load(self, url):
+        """Raw entry (``stored_at``, ``validators``, ``result``) or None."""
+        path = self._path(url)
+        if not path:
+            return None
+        try:
+            with open(path, encoding='utf-8') as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or not isinstance(entry.get('result'), dict):
+            return None
+        return entry
+
+    def _write(self, url, entry):
+        path = self._path(url)
+        if not path:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+                json.dump(entry, handle)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def is_fresh(self, entry):
+        return (time.time() - float(entry.get('stored_at') or 0)) < self.ttl_seconds
+
+    def get(self, url, revalidate=None):
+        """Cached result for ``url`` or None.
+
+        ``revalidate(url, validators)`` is called for stale entries that carry
+        validators and should return True when the page is unchanged (HTTP 304).
+        """
+        entry = self.load(url)
+        if entry is None:
+            return None
+        if not self.is_fresh(entry):
+            validators = entry.get('validators') or {}
+            if not validators or revalidate is None:
+                return None
+            try:
+                if not revalidate(url, validators):
+                    return None
+            except Exception:
+                return None
+            entry['stored_at'] = time.time()
+            self._write(url, entry)
+        return copy.deepcopy(entry['result'])
+
+    def put(self, url, result, validators=None):
+        if not result or result.get('status') != 'success':
+            return
+        self._write(url, {
+            'url': url,
+            'stored_at': time.time(),
+            'validators': validators or {},
+            'result': {key: value for key, value in result.items() if key not in _TRANSIENT_RESULT_KEYS},
+        })
+
+    def update_fields(self, url, **fields):
+        """Patch fields (e.g. a fresh stock_status) into an existing entry."""
+        entry = self.load(url)
+        if entry is None:
+            return
+        entry['result'].update(fields)
+        self._write(url, entry)
+
+    def invalidate(self, url):
+        path = self._path(url)
+        if path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith('.json'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+def default_scrape_cache():
+    """The env-configured cache, or None when MARKAZ_SCRAPE_CACHE disables it."""
+    if not SCRAPE_CACHE_ENABLED:
+        return None
+    return ScrapeCache()
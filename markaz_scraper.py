@@ -1,9 +1,17 @@
+import hashlib
 import html
 import json
 import os
+import random
 import re
+import time
+from collections import Counter
+from functools import lru_cache
+from html.parser import HTMLParser
 from urllib.parse import parse_qs, urlencode, urljoin, urlparse, urlunparse
 
+from markaz_images import ProductImages, canonical_image_url
+
 SIZE_PATTERN = re.compile(
     r'^(X-?Small|Small|Medium|Large|X-?Large|XX-?Large|XXX-?Large|\d+XL?|One Size|Free Size)$',
     re.IGNORECASE,
@@ -20,9 +28,85 @@ COLOR_VALUE_REJECT_SUBSTRINGS = (
     'cash on', 'secure', 'compare', 'share', 'download', 'quantity',
 )
 
-
-def launch_browser_for_serverless(playwright):
-    """Launch Chromium with flags tuned for serverless environments."""
+# Precompiled patterns used by the parsers below (several run per button or
+# over whole overview HTML, so they are compiled once at import).
+_PRICE_NUMBER_PATTERN = re.compile(r'([\d]+(?:\.\d+)?)')
+_PRICE_TEXT_PATTERNS = (
+    re.compile(r'PKR\s*([\d,]+(?:\.\d+)?)', re.IGNORECASE),
+    re.compile(r'Rs\.?\s*([\d,]+(?:\.\d+)?)', re.IGNORECASE),
+)
+_BREADCRUMB_CATEGORY_SPLIT_PATTERN = re.compile(r'\s*>\s*')
+_BREADCRUMB_ITEM_SPLIT_PATTERN = re.compile(r'\s*/\s*')
+_HTML_BR_PATTERN = re.compile(r'(?is)<br\s*/?>')
+_HTML_TAG_PATTERN = re.compile(r'(?is)<[^>]+>')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+_OVERVIEW_CONTENT_PATTERN = re.compile(r'(?is)<div[^>]*class="[^"]*relative[^"]*max-h-\[[^"]*"[^>]*>(.*)$')
+_OVERVIEW_FADE_PATTERN = re.compile(r'(?is)<div[^>]*data-overview-fade[^>]*>.*$')
+_OVERVIEW_SPECIFICATIONS_PATTERN = re.compile(
+    r'(?is)<p[^>]*>\s*Specifications\s*</p>.*?(?=<p[^>]*>\s*Highlights\s*</p>|$)'
+)
+_OVERVIEW_BLOCK_PATTERN = re.compile(
+    r'(?is)'
+    r'(<p\b[^>]*>.*?</p>)'
+    r'|(<dl\b[^>]*>.*?</dl>)'
+    r'|(<ul\b[^>]*>.*?</ul>)'
+)
+_OVERVIEW_CARD_PATTERN = re.compile(r'(?is)<dt\b[^>]*>(.*?)</dt>\s*<dd\b[^>]*>(.*?)</dd>')
+_OVERVIEW_LIST_ITEM_PATTERN = re.compile(r'(?is)<li\b[^>]*>(.*?)</li>')
+_OVERVIEW_TEXT_HEADING_PATTERN = re.compile(r'^Product [Oo]verview\s*')
+_OVERVIEW_TEXT_SHOW_MORE_PATTERN = re.compile(r'\nShow (more|less)\s*$', re.IGNORECASE | re.MULTILINE)
+_OVERVIEW_TEXT_BRAND_PATTERN = re.compile(r'\nBrand\s*\n[^\n]+\n?', re.IGNORECASE)
+_OVERVIEW_TEXT_SPECIFICATIONS_PATTERN = re.compile(r'\nSpecifications\s*\n?', re.IGNORECASE)
+_OVERVIEW_TEXT_LABEL_VALUE_PATTERN = re.compile(r'(?im)^([A-Za-z][A-Za-z0-9 /&-]{1,40})\n([^\n]+)$')
+_BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+_NUMERIC_TEXT_PATTERN = re.compile(r'[\d.]+')
+_NUMBER_RANGE_PATTERN = re.compile(r'\d+\s*-\s*\d+')
+_AVAILABLE_SIZES_PATTERN = re.compile(
+    r'AVAILABLE SIZES\s*\n?\s*(.+?)(?:\n[A-Z][A-Z\s/&-]*\n|\nPRODUCT CODE|\nShow more|$)',
+    re.IGNORECASE | re.DOTALL,
+)
+_AVAILABLE_COLORS_PATTERN = re.compile(
+    r'AVAILABLE COLOU?RS?\s*\n?\s*(.+?)(?:\n[A-Z][A-Z\s/&-]*\n|\nPRODUCT CODE|\nShow more|$)',
+    re.IGNORECASE | re.DOTALL,
+)
+_LIST_SEPARATOR_PATTERN = re.compile(r',\s*')
+_INLINE_COLOR_PATTERN = re.compile(r'Colou?r\s*:\s*(.+)$', re.IGNORECASE)
+_HIGHLIGHT_COLOR_PATTERN = re.compile(r'(?:^|\n)Colou?r\s*\n([^\n]+)', re.IGNORECASE)
+_OUT_OF_STOCK_PATTERN = re.compile(r'out of stock|sold out|currently unavailable', re.IGNORECASE)
+_IN_STOCK_COUNT_PATTERN = re.compile(r'\d+\s+in stock', re.IGNORECASE)
+_PRODUCT_CODE_PATTERN = re.compile(r'Product Code[:\s]*([A-Z0-9]+)', re.IGNORECASE)
+_PRODUCT_ID_PATH_PATTERN = re.compile(r'/shop/product/(?:[^/]+/)?(\d+)$')
+_CATEGORY_PRODUCT_PATH_PATTERN = re.compile(r'(?:https?://[^"\'\s]*?)?/shop/product/[^"\'\s<>\\]+', re.I)
+
+# Memo sizes for the pure parsers below (ids are looked up per row on every rerun).
+PRODUCT_ID_CACHE_SIZE = 8192
+OVERVIEW_CACHE_SIZE = 256
+
+DEFAULT_CONTEXT_OPTIONS = {
+    'permissions': [],
+    'ignore_https_errors': True,
+    'viewport': {'width': 1920, 'height': 1080},
+}
+# Contexts kept open per batch session; pages rotate through them.
+DEFAULT_CONTEXT_POOL_SIZE = 2
+
+# Long runs: relaunch Chromium after this many browser pages or once this
+# process plus Chromium pass the RSS ceiling (0 disables it); pooled contexts
+# are replaced after CONTEXT_MAX_PAGES pages.
+BROWSER_RECYCLE_PAGES = int(os.getenv('MARKAZ_BROWSER_RECYCLE_PAGES', '150'))
+BROWSER_MAX_RSS_MB = float(os.getenv('MARKAZ_BROWSER_MAX_RSS_MB', '1500'))
+CONTEXT_MAX_PAGES = int(os.getenv('MARKAZ_CONTEXT_MAX_PAGES', '25'))
+
+# Run before a pooled page closes so the next product starts from clean storage.
+CLEAR_PAGE_STATE_JS = """() => {
+    try { window.localStorage.clear(); } catch (e) {}
+    try { window.sessionStorage.clear(); } catch (e) {}
+}"""
+
+
+# Shared with the async engine (markaz_async_scraper), which cannot reuse the sync launcher.
+def browser_launch_options():
+    """Chromium launch kwargs tuned for serverless environments."""
     is_vercel = os.getenv('VERCEL') == '1' or os.getenv('VERCEL_ENV') is not None
 
     launch_args = [
@@ -47,11 +131,52 @@ def launch_browser_for_serverless(playwright):
     if is_vercel:
         launch_args.append('--single-process')
 
-    return playwright.chromium.launch(
-        headless=True,
-        args=launch_args,
-        ignore_default_args=['--enable-automation'],
-    )
+    return {
+        'headless': True,
+        'args': launch_args,
+        'ignore_default_args': ['--enable-automation'],
+    }
+
+
+def launch_browser_for_serverless(playwright):
+    """Launch Chromium with flags tuned for serverless environments."""
+    return playwright.chromium.launch(**browser_launch_options())
+
+
+def process_tree_rss_mb(pid=None):
+    """Resident memory of a process and all its descendants (Chromium) in MB.
+
+    Reads /proc, so returns None where that is unavailable (macOS, Windows).
+    """
+    root = pid or os.getpid()
+    try:
+        names = os.listdir('/proc')
+    except OSError:
+        return None
+    page_kb = os.sysconf('SC_PAGE_SIZE') / 1024
+    children = {}
+    rss_kb = {}
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', encoding='utf-8') as handle:
+                # comm may contain spaces; fields after ')' start at field 3 (state).
+                fields = handle.read().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        process_id = int(name)
+        children.setdefault(int(fields[1]), []).append(process_id)
+        rss_kb[process_id] = int(fields[21]) * page_kb
+    if root not in rss_kb:
+        return None
+    total_kb = 0.0
+    pending = [root]
+    while pending:
+        process_id = pending.pop()
+        total_kb += rss_kb.get(process_id, 0.0)
+        pending.extend(children.get(process_id, ()))
+    return round(total_kb / 1024, 1)
 
 
 def _empty_result(url, status):
@@ -70,11 +195,11 @@ def _empty_result(url, status):
     }
 
 
-def parse_json_ld_product(page):
-    """Return the Product schema object from JSON-LD, if present."""
-    for script in page.locator('script[type="application/ld+json"]').all():
+def json_ld_product_from_texts(script_texts):
+    """Return the Product schema object from raw JSON-LD script bodies, if present."""
+    for raw in script_texts or []:
         try:
-            data = json.loads(script.inner_text())
+            data = json.loads(raw)
         except (json.JSONDecodeError, TypeError):
             continue
 
@@ -85,103 +210,306 @@ def parse_json_ld_product(page):
     return None
 
 
+def parse_json_ld_product(page):
+    """Return the Product schema object from JSON-LD, if present."""
+    return json_ld_product_from_texts(
+        script.inner_text()
+        for script in page.locator('script[type="application/ld+json"]').all()
+    )
+
+
 def _normalize_price(value):
     if value is None:
         return '0.00'
     if isinstance(value, (int, float)):
         return f'{float(value):.2f}'
     text = str(value).strip().replace(',', '')
-    match = re.search(r'([\d]+(?:\.\d+)?)', text)
+    match = _PRICE_NUMBER_PATTERN.search(text)
     return match.group(1) if match else '0.00'
 
 
+def _ld_offer(product_ld):
+    offers = (product_ld or {}).get('offers', {})
+    if isinstance(offers, list):
+        offers = offers[0] if offers else {}
+    return offers if isinstance(offers, dict) else {}
+
+
+def _price_from_ld(product_ld):
+    offer = _ld_offer(product_ld)
+    if offer.get('price') is not None:
+        return _normalize_price(offer['price'])
+    return None
+
+
+def _price_from_text(text):
+    for pattern in _PRICE_TEXT_PATTERNS:
+        match = pattern.search(text or '')
+        if match:
+            return _normalize_price(match.group(1))
+    return None
+
+
 def extract_price(page, product_ld=None):
-    if product_ld:
-        offers = product_ld.get('offers', {})
-        if isinstance(offers, list):
-            offers = offers[0] if offers else {}
-        if isinstance(offers, dict) and offers.get('price') is not None:
-            return _normalize_price(offers['price'])
+    price = _price_from_ld(product_ld)
+    if price is not None:
+        return price
 
     for scope in [page.locator('h1').first.locator('xpath=ancestor::div[3]').first, page.locator('main').first]:
         if scope.count() == 0:
             continue
-        text = scope.inner_text()
-        for pattern in [r'PKR\s*([\d,]+(?:\.\d+)?)', r'Rs\.?\s*([\d,]+(?:\.\d+)?)']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return _normalize_price(match.group(1))
-
-    body_text = page.inner_text('body')
-    for pattern in [r'PKR\s*([\d,]+(?:\.\d+)?)', r'Rs\.?\s*([\d,]+(?:\.\d+)?)']:
-        match = re.search(pattern, body_text, re.IGNORECASE)
-        if match:
-            return _normalize_price(match.group(1))
+        price = _price_from_text(scope.inner_text())
+        if price is not None:
+            return price
 
-    return '0.00'
+    return _price_from_text(page.inner_text('body')) or '0.00'
 
 
-def extract_breadcrumbs(page, title='', product_ld=None):
+def _breadcrumbs_from_links(nav_links, main_links, title='', product_ld=None):
+    """Breadcrumb items from (text, href) pairs of ``nav a`` and ``main a[href*="/shop"]``."""
     breadcrumb_items = []
 
     category = (product_ld or {}).get('category', '')
     if category:
-        breadcrumb_items.extend(part.strip() for part in re.split(r'\s*>\s*', category) if part.strip())
+        breadcrumb_items.extend(part.strip() for part in _BREADCRUMB_CATEGORY_SPLIT_PATTERN.split(category) if part.strip())
 
-    try:
-        nav_links = page.locator('nav a').all()
-        nav_items = []
-        for link in nav_links:
-            text = link.inner_text().strip()
-            href = link.get_attribute('href') or ''
-            if not text or '/shop' not in href:
-                continue
-            if title and text.lower() == title.lower():
-                continue
-            if text not in nav_items:
-                nav_items.append(text)
-        if nav_items:
-            breadcrumb_items = nav_items
-    except Exception:
-        pass
+    nav_items = []
+    for text, href in nav_links or []:
+        text = (text or '').strip()
+        href = href or ''
+        if not text or '/shop' not in href:
+            continue
+        if title and text.lower() == title.lower():
+            continue
+        if text not in nav_items:
+            nav_items.append(text)
+    if nav_items:
+        breadcrumb_items = nav_items
 
     if not breadcrumb_items:
-        try:
-            for link in page.locator('main a[href*="/shop"]').all():
-                text = link.inner_text().strip()
-                href = link.get_attribute('href') or ''
-                if not text or '/product/' in href:
-                    continue
-                if title and (title.lower() in text.lower() or text.lower() in title.lower()):
-                    continue
-                block_terms = ['followers', 'products', 'pkr', 'rs.', 'add to bag', 'cart', 'visit shop']
-                if any(term in text.lower() for term in block_terms):
-                    continue
-                if text not in breadcrumb_items:
-                    breadcrumb_items.append(text)
-        except Exception:
-            pass
+        block_terms = ['followers', 'products', 'pkr', 'rs.', 'add to bag', 'cart', 'visit shop']
+        for text, href in main_links or []:
+            text = (text or '').strip()
+            href = href or ''
+            if not text or '/product/' in href:
+                continue
+            if title and (title.lower() in text.lower() or text.lower() in title.lower()):
+                continue
+            if any(term in text.lower() for term in block_terms):
+                continue
+            if text not in breadcrumb_items:
+                breadcrumb_items.append(text)
 
     cleaned_items = []
     for item in breadcrumb_items:
-        for part in re.split(r'\s*/\s*', item):
+        for part in _BREADCRUMB_ITEM_SPLIT_PATTERN.split(item):
             part = part.strip()
             if part and part not in cleaned_items:
                 cleaned_items.append(part)
     return cleaned_items
 
 
+def _link_pairs(locator):
+    return [(link.inner_text(), link.get_attribute('href')) for link in locator.all()]
+
+
+def extract_breadcrumbs(page, title='', product_ld=None):
+    try:
+        nav_links = _link_pairs(page.locator('nav a'))
+    except Exception:
+        nav_links = []
+
+    main_links = []
+    if not _breadcrumbs_from_links(nav_links, [], title, product_ld):
+        try:
+            main_links = _link_pairs(page.locator('main a[href*="/shop"]'))
+        except Exception:
+            main_links = []
+
+    return _breadcrumbs_from_links(nav_links, main_links, title, product_ld)
+
+
 # Labels omitted from scraped description (seller metadata, not product specs).
 _DESCRIPTION_SKIP_LABELS = frozenset({'brand'})
 
 
 def _strip_html_text(value):
-    text = re.sub(r'(?is)<br\s*/?>', ' ', value or '')
-    text = re.sub(r'(?is)<[^>]+>', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _HTML_BR_PATTERN.sub(' ', value or '')
+    text = _HTML_TAG_PATTERN.sub(' ', text)
+    text = _WHITESPACE_PATTERN.sub(' ', text).strip()
+    return html.unescape(text)
+
+
+# Tags the overview formatter turns into description lines (first closing tag ends a block).
+_OVERVIEW_BLOCK_TAGS = frozenset({'p', 'dl', 'ul'})
+_OVERVIEW_REGION_CLASS_PATTERN = re.compile(r'class="[^"]*relative[^"]*max-h-\[', re.IGNORECASE)
+
+
+class _OverviewHTMLParser(HTMLParser):
+    """One linear pass over overview innerHTML producing the description lines.
+
+    Mirrors the regex formatter: only the expandable content region is kept when
+    present, everything from the fade overlay on is dropped, the Specifications
+    section is skipped up to Highlights, and <p>, <dl> (dt/dd cards) and <ul>
+    blocks become lines.
+
+    One difference: a <dt> followed by text other than whitespace before its
+    <dd> is dropped, where the regex glues that text into the next card's label
+    ('<dt>Fabric</dt>Lawn<dd>Soft</dd>...<dt>Color</dt><dd>Red</dd>' gives
+    "• Color: Red" here, "• Fabric Lawn Soft Color: Red" from the regex).
+    """
+
+    def __init__(self):
+        # Entities are kept raw until a block closes so whitespace collapses before unescaping.
+        super().__init__(convert_charrefs=False)
+        self.parts = []
+        self._region_seen = False
+        self._reset_segment()
+
+    def _reset_segment(self):
+        # Output before the content region is discarded once the region starts.
+        self.parts = []
+        self._stopped = False
+        self._in_specifications = False
+        self._block = None
+        self._chunks = None
+        self._has_tags = False
+        self._field = None
+        self._field_chunks = None
+        self._pending_label = None
+        self._lines = []
+
+    def _text(self, text):
+        if self._chunks is not None:
+            self._chunks.append(text)
+        if self._field_chunks is not None:
+            self._field_chunks.append(text)
+        elif self._pending_label is not None and text.strip():
+            # Only whitespace may sit between </dt> and <dd>.
+            self._pending_label = None
+
+    def _tag_boundary(self):
+        self._has_tags = True
+        self._text(' ')
+        if self._field_chunks is None:
+            self._pending_label = None
+
+    def handle_starttag(self, tag, attrs):
+        starttag = self.get_starttag_text() or ''
+        if tag == 'div':
+            if not self._region_seen and 'max-h-' in starttag and _OVERVIEW_REGION_CLASS_PATTERN.search(starttag):
+                self._region_seen = True
+                self._reset_segment()
+                return
+            if 'data-overview-fade' in starttag.lower():
+                self._stopped = True
+        if self._stopped:
+            return
+        if self._block is None:
+            if tag in _OVERVIEW_BLOCK_TAGS:
+                self._block = tag
+                self._chunks = [] if tag == 'p' else None
+                self._has_tags = False
+                self._lines = []
+                self._pending_label = None
+            return
+        if self._block == 'dl' and self._field is None and tag in ('dt', 'dd'):
+            if tag == 'dd' and self._pending_label is None:
+                self._tag_boundary()
+                return
+            self._field = tag
+            self._field_chunks = []
+            return
+        if self._block == 'ul' and self._field is None and tag == 'li':
+            self._field = tag
+            self._field_chunks = []
+            return
+        self._tag_boundary()
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/> and friends count as one tag, like the regex's <[^>]+>.
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if self._stopped or self._block is None:
+            return
+        if tag == self._field:
+            text = _collapse_overview_text(self._field_chunks)
+            self._field = None
+            self._field_chunks = None
+            if tag == 'dt':
+                self._pending_label = text
+            elif tag == 'dd':
+                label, self._pending_label = self._pending_label, None
+                if label and text and label.lower() not in _DESCRIPTION_SKIP_LABELS:
+                    self._lines.append(f'• {label}: {text}')
+            elif text:
+                self._lines.append(f'• {text}')
+            return
+        if tag == self._block:
+            self._close_block()
+            return
+        self._tag_boundary()
+
+    def _close_block(self):
+        block = self._block
+        self._block = None
+        if block == 'p':
+            text = _collapse_overview_text(self._chunks)
+            heading = text.lower() if not self._has_tags else None
+            self._chunks = None
+            if heading == 'specifications':
+                self._in_specifications = True
+                return
+            if heading == 'highlights':
+                self._in_specifications = False
+            if self._in_specifications or not text or text.lower() == 'specifications':
+                return
+            self.parts.append(text)
+            return
+        if not self._in_specifications:
+            self.parts.extend(self._lines)
+        self._lines = []
+        self._pending_label = None
+
+    def handle_data(self, data):
+        if not self._stopped and self._block is not None:
+            self._text(data)
+
+    def handle_entityref(self, name):
+        self.handle_data(f'&{name};')
+
+    def handle_charref(self, name):
+        self.handle_data(f'&#{name};')
+
+    def handle_comment(self, data):
+        if not self._stopped and self._block is not None:
+            self._tag_boundary()
+
+
+def _collapse_overview_text(chunks):
+    text = _WHITESPACE_PATTERN.sub(' ', ''.join(chunks or ())).strip()
     return html.unescape(text)
 
 
+# Below this size even the regex formatter's worst case stays in the low milliseconds.
+OVERVIEW_BALANCE_CHECK_MIN_CHARS = 8192
+_OVERVIEW_STRUCTURE_TAG_PATTERN = re.compile(r'<(/?(?:p|dl|ul|li|dt|dd))[\s/>]', re.IGNORECASE)
+
+
+def _overview_html_is_unbalanced(html_source):
+    """True when an unclosed block or a <dt> without <dd> would make the regex
+    formatter's lazy ``.*?`` patterns rescan to the end of the document."""
+    if len(html_source) < OVERVIEW_BALANCE_CHECK_MIN_CHARS:
+        return False
+    counts = Counter(tag.lower() for tag in _OVERVIEW_STRUCTURE_TAG_PATTERN.findall(html_source))
+    return (
+        any(counts[tag] != counts[f'/{tag}'] for tag in ('p', 'dl', 'ul', 'li', 'dt', 'dd'))
+        or counts['dt'] != counts['dd']
+    )
+
+
+@lru_cache(maxsize=OVERVIEW_CACHE_SIZE)
 def format_product_overview_html(html_source):
     """
     Build a clean description from Markaz Product overview HTML.
@@ -189,36 +517,54 @@ def format_product_overview_html(html_source):
     New Markaz layout uses <dt>/<dd> highlight cards (label + value stacked in the
     DOM). Join each card as a single line: "• Fabric: Lawn".
     Skip Specifications / Brand blocks.
+
+    Well-formed overviews go through the regex formatter (about 3x faster);
+    unbalanced markup, where its lazy patterns turn quadratic, goes through the
+    linear streaming parser (see ``_OverviewHTMLParser`` for the one output
+    difference).
     """
+    if not html_source:
+        return ''
+    if _overview_html_is_unbalanced(html_source):
+        return _format_product_overview_html_streaming(html_source)
+    return _format_product_overview_html_regex(html_source)
+
+
+def _format_product_overview_html_streaming(html_source):
+    if not html_source:
+        return ''
+
+    parser = _OverviewHTMLParser()
+    parser.feed(html_source)
+    parser.close()
+
+    cleaned = []
+    for line in parser.parts:
+        if cleaned and cleaned[-1] == line:
+            continue
+        cleaned.append(line)
+
+    return '\n'.join(cleaned)
+
+
+def _format_product_overview_html_regex(html_source):
+    """Regex formatter for well-formed overviews (fastest when blocks are closed)."""
     if not html_source:
         return ''
 
     # Work only inside the expandable content region when present.
-    relative = re.search(
-        r'(?is)<div[^>]*class="[^"]*relative[^"]*max-h-\[[^"]*"[^>]*>(.*)$',
-        html_source,
-    )
+    relative = _OVERVIEW_CONTENT_PATTERN.search(html_source)
     content = relative.group(1) if relative else html_source
 
     # Drop fade overlay and anything after it.
-    content = re.sub(r'(?is)<div[^>]*data-overview-fade[^>]*>.*$', '', content)
+    content = _OVERVIEW_FADE_PATTERN.sub('', content)
 
     # Remove entire Specifications section (Brand and any other seller meta).
-    content = re.sub(
-        r'(?is)<p[^>]*>\s*Specifications\s*</p>.*?(?=<p[^>]*>\s*Highlights\s*</p>|$)',
-        '',
-        content,
-    )
+    content = _OVERVIEW_SPECIFICATIONS_PATTERN.sub('', content)
 
     parts = []
     tokens = []
-    for match in re.finditer(
-        r'(?is)'
-        r'(<p\b[^>]*>.*?</p>)'
-        r'|(<dl\b[^>]*>.*?</dl>)'
-        r'|(<ul\b[^>]*>.*?</ul>)',
-        content,
-    ):
+    for match in _OVERVIEW_BLOCK_PATTERN.finditer(content):
         tokens.append(match.group(0))
 
     for token in tokens:
@@ -232,10 +578,7 @@ def format_product_overview_html(html_source):
             continue
 
         if token.lower().startswith('<dl'):
-            for card in re.finditer(
-                r'(?is)<dt\b[^>]*>(.*?)</dt>\s*<dd\b[^>]*>(.*?)</dd>',
-                token,
-            ):
+            for card in _OVERVIEW_CARD_PATTERN.finditer(token):
                 label = _strip_html_text(card.group(1))
                 value = _strip_html_text(card.group(2))
                 if not label or not value:
@@ -246,7 +589,7 @@ def format_product_overview_html(html_source):
             continue
 
         if token.lower().startswith('<ul'):
-            for li in re.finditer(r'(?is)<li\b[^>]*>(.*?)</li>', token):
+            for li in _OVERVIEW_LIST_ITEM_PATTERN.finditer(token):
                 text = _strip_html_text(li.group(1))
                 if text:
                     parts.append(f'• {text}')
@@ -266,6 +609,40 @@ def _format_product_overview_text(overview_locator):
     return format_product_overview_html(html_source or '')
 
 
+@lru_cache(maxsize=OVERVIEW_CACHE_SIZE)
+def _description_from_overview_text(text):
+    """Clean plain overview innerText when the structured HTML parse came up short."""
+    text = (text or '').strip()
+    text = _OVERVIEW_TEXT_HEADING_PATTERN.sub('', text)
+    text = _OVERVIEW_TEXT_SHOW_MORE_PATTERN.sub('', text)
+    text = _OVERVIEW_TEXT_BRAND_PATTERN.sub('\n', text)
+    text = _OVERVIEW_TEXT_SPECIFICATIONS_PATTERN.sub('\n', text)
+    # Collapse orphan label/value lines when structured HTML parse missed them.
+    text = _OVERVIEW_TEXT_LABEL_VALUE_PATTERN.sub(r'• \1: \2', text)
+    return _BLANK_LINES_PATTERN.sub('\n\n', text).strip()
+
+
+def _description_from_ld(product_ld):
+    if product_ld and product_ld.get('description'):
+        return product_ld['description'].strip()
+    return 'No description available'
+
+
+def _description_from_overview(overview_html, overview_text, product_ld=None):
+    """Description from already-read overview innerHTML / innerText (None = no overview)."""
+    if overview_html is not None or overview_text is not None:
+        try:
+            formatted = format_product_overview_html(overview_html or '')
+            if formatted and len(formatted) > 20:
+                return formatted
+        except Exception:
+            pass
+        text = _description_from_overview_text(overview_text)
+        if len(text) > 20:
+            return text
+    return _description_from_ld(product_ld)
+
+
 def extract_description(page, product_ld=None):
     try:
         overview = page.locator('#desktop-product-overview').first
@@ -283,28 +660,13 @@ def extract_description(page, product_ld=None):
             except Exception:
                 pass
 
-            text = overview.inner_text().strip()
-            text = re.sub(r'^Product [Oo]verview\s*', '', text)
-            text = re.sub(r'\nShow (more|less)\s*$', '', text, flags=re.IGNORECASE | re.MULTILINE)
-            text = re.sub(r'\nBrand\s*\n[^\n]+\n?', '\n', text, flags=re.IGNORECASE)
-            text = re.sub(r'\nSpecifications\s*\n?', '\n', text, flags=re.IGNORECASE)
-            # Collapse orphan label/value lines when structured HTML parse missed them.
-            text = re.sub(
-                r'(?im)^([A-Za-z][A-Za-z0-9 /&-]{1,40})\n([^\n]+)$',
-                r'• \1: \2',
-                text,
-            )
-            text = re.sub(r'\n{3,}', '\n\n', text).strip()
+            text = _description_from_overview_text(overview.inner_text())
             if len(text) > 20:
                 return text
     except Exception:
         pass
 
-    if product_ld and product_ld.get('description'):
-        return product_ld['description'].strip()
-
-    return 'No description available'
-
+    return _description_from_ld(product_ld)
 
 
 def _is_size_value(text):
@@ -314,7 +676,7 @@ def _is_size_value(text):
     lowered = text.lower()
     if lowered in VARIANT_BUTTON_BLOCKLIST:
         return False
-    if re.fullmatch(r'[\d.]+', text):
+    if _NUMERIC_TEXT_PATTERN.fullmatch(text):
         return False
     return bool(SIZE_PATTERN.match(text))
 
@@ -328,9 +690,9 @@ def _is_color_value(text):
     if lowered in VARIANT_BUTTON_BLOCKLIST:
         return False
     # Save counts ("207"), ratings ("5.0"), etc.
-    if re.fullmatch(r'[\d.]+', text):
+    if _NUMERIC_TEXT_PATTERN.fullmatch(text):
         return False
-    if '|' in text or re.search(r'\d+\s*-\s*\d+', text):
+    if '|' in text or _NUMBER_RANGE_PATTERN.search(text):
         return False
     if any(token in lowered for token in COLOR_VALUE_REJECT_SUBSTRINGS):
         return False
@@ -346,9 +708,21 @@ def _valid_button_texts_near_label(label, is_valid, max_depth=3):
         container = label.locator(f'xpath=ancestor::div[{depth}]').first
         if container.count() == 0:
             continue
+        texts = [button.inner_text() for button in container.locator('button').all()]
+        valid = _first_valid_button_texts([texts], is_valid)
+        if valid:
+            return valid
+    return []
+
+
+def _first_valid_button_texts(button_groups, is_valid):
+    """First ancestor level (nearest first) whose button texts include a valid value."""
+    for texts in button_groups or []:
+        if texts is None:
+            continue
         valid = []
-        for button in container.locator('button').all():
-            text = button.inner_text().strip()
+        for text in texts:
+            text = (text or '').strip()
             if text and is_valid(text) and text not in valid:
                 valid.append(text)
         if valid:
@@ -356,39 +730,83 @@ def _valid_button_texts_near_label(label, is_valid, max_depth=3):
     return []
 
 
-def extract_variants(page, product_ld=None):
-    variants = []
-    option1_name = 'Title'
+def _variants_from_overview_lists(overview_text):
+    """'AVAILABLE SIZES' / 'AVAILABLE COLOURS' rows in the overview text, if any."""
+    sizes_match = _AVAILABLE_SIZES_PATTERN.search(overview_text)
+    if sizes_match:
+        sizes = [part.strip() for part in _LIST_SEPARATOR_PATTERN.split(sizes_match.group(1).strip()) if part.strip()]
+        if sizes:
+            return 'Size', sizes
+
+    colors_match = _AVAILABLE_COLORS_PATTERN.search(overview_text)
+    if colors_match:
+        colors = [
+            part.strip()
+            for part in _LIST_SEPARATOR_PATTERN.split(colors_match.group(1).strip())
+            if part.strip() and _is_color_value(part.strip())
+        ]
+        if colors:
+            return 'Color', colors
+    return None
+
+
+def _inline_color_from_label(label_text):
+    inline = _INLINE_COLOR_PATTERN.search((label_text or '').strip())
+    if inline and _is_color_value(inline.group(1).strip()):
+        return inline.group(1).strip()
+    return None
+
 
+def _highlight_color_from_overview(overview_text):
+    """Overview Highlights "Color\\nPurple" (single-color listings)."""
+    highlight_color = _HIGHLIGHT_COLOR_PATTERN.search(overview_text)
+    if highlight_color:
+        color = highlight_color.group(1).strip()
+        if _is_color_value(color):
+            return color
+    return None
+
+
+def _variants_from_sources(overview_text, size_button_groups, color_button_groups, color_label_text):
+    """Variant option from already-read overview text and label-adjacent button texts.
+
+    Button groups are lists of button texts per ancestor div (nearest first);
+    ``None`` marks a missing ancestor. Mirrors extract_variants' priority order.
+    """
+    if overview_text is not None:
+        from_lists = _variants_from_overview_lists(overview_text)
+        if from_lists:
+            return from_lists
+
+    sizes = _first_valid_button_texts(size_button_groups, _is_size_value)
+    if sizes:
+        return 'Size', sizes
+
+    colors = _first_valid_button_texts(color_button_groups, _is_color_value)
+    if not colors and color_label_text is not None:
+        inline = _inline_color_from_label(color_label_text)
+        if inline:
+            colors = [inline]
+    if colors:
+        return 'Color', colors
+
+    if overview_text is not None:
+        color = _highlight_color_from_overview(overview_text)
+        if color:
+            return 'Color', [color]
+
+    return 'Title', ['Default Title']
+
+
+def extract_variants(page, product_ld=None):
     try:
         overview = page.locator(
             'xpath=//h2[contains(translate(.,"ABCDEFGHIJKLMNOPQRSTUVWXYZ","abcdefghijklmnopqrstuvwxyz"),"product overview")]/parent::*'
         ).first
         if overview.count() > 0:
-            overview_text = overview.inner_text()
-            sizes_match = re.search(
-                r'AVAILABLE SIZES\s*\n?\s*(.+?)(?:\n[A-Z][A-Z\s/&-]*\n|\nPRODUCT CODE|\nShow more|$)',
-                overview_text,
-                re.IGNORECASE | re.DOTALL,
-            )
-            if sizes_match:
-                sizes = [part.strip() for part in re.split(r',\s*', sizes_match.group(1).strip()) if part.strip()]
-                if sizes:
-                    return 'Size', sizes
-
-            colors_match = re.search(
-                r'AVAILABLE COLOU?RS?\s*\n?\s*(.+?)(?:\n[A-Z][A-Z\s/&-]*\n|\nPRODUCT CODE|\nShow more|$)',
-                overview_text,
-                re.IGNORECASE | re.DOTALL,
-            )
-            if colors_match:
-                colors = [
-                    part.strip()
-                    for part in re.split(r',\s*', colors_match.group(1).strip())
-                    if part.strip() and _is_color_value(part.strip())
-                ]
-                if colors:
-                    return 'Color', colors
+            from_lists = _variants_from_overview_lists(overview.inner_text())
+            if from_lists:
+                return from_lists
     except Exception:
         pass
 
@@ -410,10 +828,9 @@ def extract_variants(page, product_ld=None):
             color_variants = _valid_button_texts_near_label(color_label, _is_color_value)
             # Inline "Color: Purple" on the label itself.
             if not color_variants:
-                label_text = color_label.inner_text().strip()
-                inline = re.search(r'Colou?r\s*:\s*(.+)$', label_text, re.IGNORECASE)
-                if inline and _is_color_value(inline.group(1).strip()):
-                    color_variants.append(inline.group(1).strip())
+                inline = _inline_color_from_label(color_label.inner_text())
+                if inline:
+                    color_variants.append(inline)
             if color_variants:
                 return 'Color', color_variants
     except Exception:
@@ -425,36 +842,18 @@ def extract_variants(page, product_ld=None):
             'xpath=//h2[contains(translate(.,"ABCDEFGHIJKLMNOPQRSTUVWXYZ","abcdefghijklmnopqrstuvwxyz"),"product overview")]/parent::*'
         ).first
         if overview.count() > 0:
-            overview_text = overview.inner_text()
-            highlight_color = re.search(
-                r'(?:^|\n)Colou?r\s*\n([^\n]+)',
-                overview_text,
-                re.IGNORECASE,
-            )
-            if highlight_color:
-                color = highlight_color.group(1).strip()
-                if _is_color_value(color):
-                    return 'Color', [color]
+            color = _highlight_color_from_overview(overview.inner_text())
+            if color:
+                return 'Color', [color]
     except Exception:
         pass
 
-    return option1_name, ['Default Title']
+    return 'Title', ['Default Title']
 
 
 def normalize_markaz_image_url(url):
     """Use content.public CDN URLs — Shopify rejects static.markaz.app (wrong content-type)."""
-    if not url:
-        return ''
-    url = url.strip()
-    static_match = re.match(
-        r'https?://static\.markaz\.app/pakistan/products/([^?#]+)',
-        url,
-        re.IGNORECASE,
-    )
-    if static_match:
-        filename = static_match.group(1)
-        return f'https://content.public.markaz.app/markazimagevideo/public/products/{filename}'
-    return url
+    return canonical_image_url(url)
 
 
 def _is_valid_product_image(src):
@@ -465,127 +864,106 @@ def _is_valid_product_image(src):
     return not any(token in lowered for token in skip_tokens)
 
 
-def _append_product_image(image_urls, src):
-    normalized = normalize_markaz_image_url(src)
-    if normalized and normalized not in image_urls:
-        image_urls.append(normalized)
+PRODUCT_IMAGE_SELECTORS = (
+    'img[src*="content.public.markaz.app/markazimagevideo/public/products/"]',
+    'img[src*="static.markaz.app/pakistan/products/"]',
+    '[class*="gallery"] img',
+    '[class*="thumbnail"] img',
+    '[class*="image"] img',
+    '.product-image img',
+)
 
 
-def extract_images(page, product_ld=None, url=''):
-    image_urls = []
+def _images_from_sources(product_ld, img_attribute_groups, url=''):
+    """Product images from JSON-LD plus (src, data-src, data-lazy-src) tuples per selector."""
+    images = ProductImages()
 
     if product_ld:
-        images = product_ld.get('image', [])
-        if isinstance(images, str):
-            images = [images]
-        for src in images:
+        ld_images = product_ld.get('image', [])
+        if isinstance(ld_images, str):
+            ld_images = [ld_images]
+        for src in ld_images:
             if _is_valid_product_image(src):
-                _append_product_image(image_urls, src)
-
-    img_selectors = [
-        'img[src*="content.public.markaz.app/markazimagevideo/public/products/"]',
-        'img[src*="static.markaz.app/pakistan/products/"]',
-        '[class*="gallery"] img',
-        '[class*="thumbnail"] img',
-        '[class*="image"] img',
-        '.product-image img',
-    ]
+                images.add(src)
+
+    for attributes in img_attribute_groups or []:
+        for attrs in attributes or []:
+            src = next((value for value in attrs if value), None)
+            if not src:
+                continue
+            if not src.startswith('http'):
+                src = urljoin(url, src)
+            if _is_valid_product_image(src):
+                images.add(src)
+
+    return images
 
-    for selector in img_selectors:
+
+def extract_images(page, product_ld=None, url=''):
+    img_attribute_groups = []
+    for selector in PRODUCT_IMAGE_SELECTORS:
         try:
-            for img in page.locator(selector).all():
-                src = img.get_attribute('src') or img.get_attribute('data-src') or img.get_attribute('data-lazy-src')
-                if not src:
-                    continue
-                if not src.startswith('http'):
-                    src = urljoin(url, src)
-                if _is_valid_product_image(src):
-                    _append_product_image(image_urls, src)
+            img_attribute_groups.append([
+                (
+                    img.get_attribute('src'),
+                    img.get_attribute('data-src'),
+                    img.get_attribute('data-lazy-src'),
+                )
+                for img in page.locator(selector).all()
+            ])
         except Exception:
             continue
 
-    return image_urls
+    return _images_from_sources(product_ld, img_attribute_groups, url)
 
 
-def extract_stock_status(page, product_ld=None):
-    if product_ld:
-        offers = product_ld.get('offers', {})
-        if isinstance(offers, list):
-            offers = offers[0] if offers else {}
-        availability = str((offers or {}).get('availability', ''))
-        if 'InStock' in availability:
-            return 'in_stock'
-        if 'OutOfStock' in availability:
-            return 'out_of_stock'
+def _stock_from_ld(product_ld):
+    availability = str(_ld_offer(product_ld).get('availability', ''))
+    if 'InStock' in availability:
+        return 'in_stock'
+    if 'OutOfStock' in availability:
+        return 'out_of_stock'
+    return None
 
-    try:
-        body_text = page.inner_text('body')
-        if re.search(r'out of stock|sold out|currently unavailable', body_text, re.IGNORECASE):
-            return 'out_of_stock'
-        if re.search(r'\d+\s+in stock', body_text, re.IGNORECASE):
-            return 'in_stock'
-    except Exception:
-        pass
 
+def _stock_from_text(body_text):
+    if _OUT_OF_STOCK_PATTERN.search(body_text or ''):
+        return 'out_of_stock'
+    if _IN_STOCK_COUNT_PATTERN.search(body_text or ''):
+        return 'in_stock'
     return 'unknown'
 
 
-def scrape_product_from_page(page, url):
-    """Scrape product data from an already-open Playwright page."""
-
-    def suppress_warnings(msg):
-        msg_text = msg.text if hasattr(msg, 'text') else str(msg)
-        if any(k in msg_text for k in ['Unrecognized feature', 'ambient-light-sensor', 'Permissions Policy', 'Feature Policy']):
-            return
-
-    page.on('console', suppress_warnings)
-    page.goto(url, wait_until='domcontentloaded', timeout=60000)
-    page.wait_for_timeout(3000)
+def extract_stock_status(page, product_ld=None):
+    stock_status = _stock_from_ld(product_ld)
+    if stock_status:
+        return stock_status
 
     try:
-        page.wait_for_selector('h1', timeout=15000)
+        return _stock_from_text(page.inner_text('body'))
     except Exception:
-        try:
-            page.wait_for_selector('script[type="application/ld+json"]', state='attached', timeout=5000)
-        except Exception as exc:
-            return _empty_result(url, f'Error: Could not load product page - {exc}')
+        return 'unknown'
 
-    product_ld = parse_json_ld_product(page)
 
-    title = 'Product Title Not Found'
-    if product_ld and product_ld.get('name'):
-        title = product_ld['name'].strip()
-    else:
-        try:
-            if page.locator('h1').count() > 0:
-                title = page.locator('h1').first.inner_text().strip()
-        except Exception:
-            pass
+def _sku_from_ld(product_ld):
+    if product_ld and product_ld.get('sku'):
+        return str(product_ld['sku']).strip()
+    return ''
 
-    if title == 'Product Title Not Found':
-        return _empty_result(url, 'Error: Could not find product title')
 
-    base_sku = ''
-    if product_ld and product_ld.get('sku'):
-        base_sku = str(product_ld['sku']).strip()
-    if not base_sku:
-        page_text = page.inner_text('body')
-        code_match = re.search(r'Product Code[:\s]*([A-Z0-9]+)', page_text, re.IGNORECASE)
-        if code_match:
-            base_sku = code_match.group(1).strip()
+def _sku_from_text(page_text):
+    code_match = _PRODUCT_CODE_PATTERN.search(page_text or '')
+    return code_match.group(1).strip() if code_match else ''
 
-    price = extract_price(page, product_ld)
-    description = extract_description(page, product_ld)
-    breadcrumb_items = extract_breadcrumbs(page, title, product_ld)
-    option1_name, variants = extract_variants(page, product_ld)
-    image_urls = extract_images(page, product_ld, url)
-    stock_status = extract_stock_status(page, product_ld)
 
+def _product_result(url, title, description, price, images, base_sku,
+                    option1_name, variants, breadcrumb_items, stock_status):
     return {
         'title': title,
         'description': description,
         'price': price,
-        'image_urls': image_urls,
+        'image_urls': images.urls,
+        'image_keys': images.keys,
         'base_sku': base_sku,
         'variants': variants,
         'option1_name': option1_name,
@@ -596,40 +974,879 @@ def scrape_product_from_page(page, url):
     }
 
 
-def scrape_markaz_product(url):
-    """Scrape product data from Markaz product URL."""
-    from playwright.sync_api import sync_playwright
+def _stock_check_result(url, title, stock_status, base_sku=''):
+    return {
+        'title': title,
+        'stock_status': stock_status,
+        'base_sku': base_sku,
+        'url': canonicalize_markaz_product_url(url) or url,
+        'status': 'success',
+    }
 
-    browser = None
-    context = None
+
+# Fields whose change is worth a Supabase write / Shopify push. Description,
+# breadcrumbs and SKU are left out: they follow title edits or never change.
+PRODUCT_FINGERPRINT_FIELDS = ('title', 'price', 'variants', 'image_urls', 'stock_status')
+
+
+def _fingerprint_price(value):
     try:
-        with sync_playwright() as playwright:
-            browser = launch_browser_for_serverless(playwright)
-            context = browser.new_context(
-                permissions=[],
-                ignore_https_errors=True,
-                viewport={'width': 1920, 'height': 1080},
-            )
-            page = context.new_page()
-            return scrape_product_from_page(page, url)
-    except Exception as exc:
-        return _empty_result(url, f'Error: {exc}')
-    finally:
-        if context:
-            try:
-                context.close()
-            except Exception:
-                pass
-        if browser:
-            try:
-                browser.close()
-            except Exception:
-                pass
+        return round(float(str(value).replace(',', '')), 2)
+    except (TypeError, ValueError):
+        return str(value or '')
+
+
+# Per-field normalization so cosmetic scrape differences hash the same.
+_FINGERPRINT_NORMALIZERS = {
+    'title': lambda value: ' '.join(str(value or '').split()),
+    'price': _fingerprint_price,
+    'variants': lambda value: value or [],
+    'image_urls': lambda value: list(value or []),
+    'stock_status': lambda value: value or 'unknown',
+}
 
 
-def normalize_product_url(href, base_url='https://www.markaz.app'):
-    """Turn relative/absolute product href into a clean absolute product URL."""
-    if not href:
+def product_fingerprint(result, extra_fields=()):
+    """Stable sha256 over a scraped product's content fields.
+
+    Only meaningful for full product results (not ``check_stock`` ones).
+    ``extra_fields`` adds caller-side keys, e.g. pricing adjustments.
+    """
+    result = result or {}
+    content = {
+        field: _FINGERPRINT_NORMALIZERS.get(field, lambda value: value)(result.get(field))
+        for field in PRODUCT_FINGERPRINT_FIELDS
+    }
+    for field in extra_fields:
+        content[field] = result.get(field)
+    encoded = json.dumps(content, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def stock_check_from_ld(product_ld, url):
+    """Stock-check result straight from JSON-LD, or None when name/availability is missing."""
+    title = ((product_ld or {}).get('name') or '').strip()
+    stock_status = _stock_from_ld(product_ld)
+    if not title or not stock_status:
+        return None
+    return _stock_check_result(url, title, stock_status, _sku_from_ld(product_ld))
+
+
+# Page is usable once the h1, the JSON-LD Product block and the overview
+# container are attached; the fixed delays below only run if that never fires.
+PRODUCT_READY_JS = """() => {
+    if (!document.querySelector('h1')) return false;
+    const hasProductLd = Array.from(
+        document.querySelectorAll('script[type="application/ld+json"]'),
+    ).some((s) => /"@type"\\s*:\\s*"Product"/.test(s.textContent || ''));
+    if (!hasProductLd) return false;
+    if (document.getElementById('desktop-product-overview')) return true;
+    return Array.from(document.querySelectorAll('h2')).some(
+        (h2) => (h2.textContent || '').toLowerCase().includes('product overview'),
+    );
+}"""
+PRODUCT_READY_TIMEOUT_MS = 10000
+
+
+def wait_for_product_ready(page):
+    """Wait for PRODUCT_READY_JS, else fall back to the legacy fixed waits.
+
+    Returns (ready_signal_fired, error_message_or_None).
+    """
+    try:
+        page.wait_for_function(PRODUCT_READY_JS, timeout=PRODUCT_READY_TIMEOUT_MS)
+        return True, None
+    except Exception:
+        pass
+
+    page.wait_for_timeout(3000)
+    try:
+        page.wait_for_selector('h1', timeout=15000)
+    except Exception:
+        try:
+            page.wait_for_selector('script[type="application/ld+json"]', state='attached', timeout=5000)
+        except Exception as exc:
+            return False, f'Error: Could not load product page - {exc}'
+    return False, None
+
+
+# Removed / unlisted products; retrying these never helps.
+GONE_HTTP_STATUSES = frozenset({404, 410})
+
+
+def product_gone_status(response):
+    """Error status for a 404 / 410 product document, else None."""
+    status = getattr(response, 'status', None)
+    if status in GONE_HTTP_STATUSES:
+        return f'Error: Product not found (HTTP {status})'
+    return None
+
+
+def _phase_timings(navigate, ready, extract, ready_signal):
+    return {
+        'navigate': round(navigate, 3),
+        'ready': round(ready, 3),
+        'extract': round(extract, 3),
+        'ready_signal': ready_signal,
+    }
+
+
+def http_validators(headers):
+    """ETag / Last-Modified from response headers, for cache revalidation."""
+    validators = {}
+    for name, value in (headers or {}).items():
+        lowered = name.lower()
+        if lowered == 'etag' and value:
+            validators['etag'] = value
+        elif lowered == 'last-modified' and value:
+            validators['last_modified'] = value
+    return validators
+
+
+# 'snapshot' reads the page with one PRODUCT_SNAPSHOT_JS evaluate and parses it
+# in Python; 'locator' keeps the per-field Playwright calls of extract_*.
+EXTRACTION_MODES = ('snapshot', 'locator')
+DEFAULT_EXTRACTION_MODE = os.getenv('MARKAZ_EXTRACTION_MODE', 'snapshot').strip().lower()
+
+
+def scrape_product_from_page(page, url, extraction_mode=None):
+    """Scrape product data from an already-open Playwright page.
+
+    The result carries ``timings`` (seconds spent in navigate / ready / extract)
+    and ``validators`` (ETag / Last-Modified of the document, if any).
+    """
+    extraction_mode = (extraction_mode or DEFAULT_EXTRACTION_MODE).strip().lower()
+    if extraction_mode not in EXTRACTION_MODES:
+        raise ValueError(f'Unknown extraction mode: {extraction_mode!r}')
+
+    def suppress_warnings(msg):
+        msg_text = msg.text if hasattr(msg, 'text') else str(msg)
+        if any(k in msg_text for k in ['Unrecognized feature', 'ambient-light-sensor', 'Permissions Policy', 'Feature Policy']):
+            return
+
+    page.on('console', suppress_warnings)
+    started = time.monotonic()
+    response = page.goto(url, wait_until='domcontentloaded', timeout=60000)
+    navigated = time.monotonic()
+    gone = product_gone_status(response)
+    if gone:
+        result = _empty_result(url, gone)
+        result['timings'] = _phase_timings(navigated - started, 0.0, 0.0, False)
+        return result
+    ready_signal, error = wait_for_product_ready(page)
+    ready = time.monotonic()
+    if error:
+        result = _empty_result(url, error)
+        result['timings'] = _phase_timings(navigated - started, ready - navigated, 0.0, ready_signal)
+        return result
+
+    result = None
+    if extraction_mode == 'snapshot':
+        try:
+            result = parse_product_snapshot(extract_product_snapshot(page), url)
+        except Exception:
+            result = None
+    if result is None:
+        result = _extract_product_from_page(page, url)
+    result['timings'] = _phase_timings(
+        navigated - started, ready - navigated, time.monotonic() - ready, ready_signal,
+    )
+    result['validators'] = http_validators(response.headers if response else None)
+    return result
+
+
+def _extract_product_from_page(page, url):
+    product_ld = parse_json_ld_product(page)
+
+    title = 'Product Title Not Found'
+    if product_ld and product_ld.get('name'):
+        title = product_ld['name'].strip()
+    else:
+        try:
+            if page.locator('h1').count() > 0:
+                title = page.locator('h1').first.inner_text().strip()
+        except Exception:
+            pass
+
+    if title == 'Product Title Not Found':
+        return _empty_result(url, 'Error: Could not find product title')
+
+    base_sku = _sku_from_ld(product_ld)
+    if not base_sku:
+        base_sku = _sku_from_text(page.inner_text('body'))
+
+    price = extract_price(page, product_ld)
+    description = extract_description(page, product_ld)
+    breadcrumb_items = extract_breadcrumbs(page, title, product_ld)
+    option1_name, variants = extract_variants(page, product_ld)
+    images = extract_images(page, product_ld, url)
+    stock_status = extract_stock_status(page, product_ld)
+
+    return _product_result(
+        url, title, description, price, images, base_sku,
+        option1_name, variants, breadcrumb_items, stock_status,
+    )
+
+
+PRODUCT_LD_READY_JS = """() => Array.from(
+    document.querySelectorAll('script[type="application/ld+json"]'),
+).some((s) => /"@type"\\s*:\\s*"Product"/.test(s.textContent || ''))"""
+
+
+def check_stock_on_page(page, url):
+    """Availability + title only: JSON-LD first, h1 / body text only if it falls short."""
+    page.goto(url, wait_until='domcontentloaded', timeout=60000)
+    try:
+        page.wait_for_function(PRODUCT_LD_READY_JS, timeout=PRODUCT_READY_TIMEOUT_MS)
+    except Exception:
+        pass
+
+    product_ld = parse_json_ld_product(page)
+    result = stock_check_from_ld(product_ld, url)
+    if result:
+        return result
+
+    title = ((product_ld or {}).get('name') or '').strip()
+    if not title:
+        try:
+            page.wait_for_selector('h1', timeout=5000)
+            title = page.locator('h1').first.inner_text().strip()
+        except Exception:
+            title = ''
+    if not title:
+        return _empty_result(url, 'Error: Could not find product title')
+
+    stock_status = _stock_from_ld(product_ld)
+    if not stock_status:
+        try:
+            stock_status = _stock_from_text(page.inner_text('body'))
+        except Exception:
+            stock_status = 'unknown'
+    return _stock_check_result(url, title, stock_status, _sku_from_ld(product_ld))
+
+
+# One round trip that reads everything the extract_* helpers need, so both
+# scrapers can parse offline in Python instead of dozens of locator calls.
+PRODUCT_SNAPSHOT_JS = """(imageSelectors) => {
+    const clean = (value) => (value == null ? null : String(value));
+    const innerText = (el) => (el ? clean(el.innerText) : null);
+    const divAncestor = (el, depth) => {
+        let node = el;
+        let found = 0;
+        while (node && node.parentElement) {
+            node = node.parentElement;
+            if (node.tagName === 'DIV' && ++found === depth) return node;
+        }
+        return null;
+    };
+    const norm = (text) => (text || '').replace(/\\s+/g, ' ');
+    const skipTags = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE']);
+    // Same idea as Playwright text=/re/: first smallest element whose text matches.
+    const findTextElement = (re) => {
+        if (!document.body) return null;
+        for (const el of document.body.querySelectorAll('*')) {
+            if (skipTags.has(el.tagName) || !re.test(norm(el.textContent))) continue;
+            let childMatches = false;
+            for (const child of el.children) {
+                if (!skipTags.has(child.tagName) && re.test(norm(child.textContent))) {
+                    childMatches = true;
+                    break;
+                }
+            }
+            if (!childMatches) return el;
+        }
+        return null;
+    };
+    const buttonGroups = (label) => {
+        if (!label) return [];
+        const groups = [];
+        for (let depth = 1; depth <= 3; depth++) {
+            const container = divAncestor(label, depth);
+            groups.push(container
+                ? Array.from(container.querySelectorAll('button'), (b) => clean(b.innerText))
+                : null);
+        }
+        return groups;
+    };
+    const links = (selector) => Array.from(
+        document.querySelectorAll(selector),
+        (a) => [clean(a.innerText), a.getAttribute('href')],
+    );
+
+    let headingOverview = null;
+    for (const h2 of document.querySelectorAll('h2')) {
+        if ((h2.textContent || '').toLowerCase().includes('product overview')) {
+            headingOverview = h2.parentElement;
+            break;
+        }
+    }
+    const overview = document.getElementById('desktop-product-overview') || headingOverview;
+    const h1 = document.querySelector('h1');
+    const main = document.querySelector('main');
+    const sizeLabel = findTextElement(/Size\\s*:?/);
+    const colorLabel = findTextElement(/^\\s*Colou?r\\s*:?\\s*$/i) || findTextElement(/Colou?r\\s*:/i);
+
+    return {
+        json_ld: Array.from(
+            document.querySelectorAll('script[type="application/ld+json"]'),
+            (s) => s.textContent,
+        ),
+        h1_text: innerText(h1),
+        price_scope_texts: [innerText(h1 ? divAncestor(h1, 3) : null), innerText(main)],
+        body_text: innerText(document.body) || '',
+        overview_html: overview ? overview.innerHTML : null,
+        overview_text: innerText(overview),
+        heading_overview_text: innerText(headingOverview),
+        nav_links: links('nav a'),
+        main_links: links('main a[href*="/shop"]'),
+        size_buttons: buttonGroups(sizeLabel),
+        color_buttons: buttonGroups(colorLabel),
+        color_label_text: innerText(colorLabel),
+        images: imageSelectors.map((selector) => Array.from(
+            document.querySelectorAll(selector),
+            (img) => [img.getAttribute('src'), img.getAttribute('data-src'), img.getAttribute('data-lazy-src')],
+        )),
+    };
+}"""
+
+
+def extract_product_snapshot(page):
+    """Run PRODUCT_SNAPSHOT_JS on an open page and return the raw snapshot dict."""
+    return page.evaluate(PRODUCT_SNAPSHOT_JS, list(PRODUCT_IMAGE_SELECTORS))
+
+
+def parse_product_snapshot(snapshot, url):
+    """Build the scrape_product_from_page result dict from a PRODUCT_SNAPSHOT_JS payload."""
+    snapshot = snapshot or {}
+    product_ld = json_ld_product_from_texts(snapshot.get('json_ld'))
+    body_text = snapshot.get('body_text') or ''
+
+    title = 'Product Title Not Found'
+    if product_ld and product_ld.get('name'):
+        title = product_ld['name'].strip()
+    elif (snapshot.get('h1_text') or '').strip():
+        title = snapshot['h1_text'].strip()
+
+    if title == 'Product Title Not Found':
+        return _empty_result(url, 'Error: Could not find product title')
+
+    base_sku = _sku_from_ld(product_ld) or _sku_from_text(body_text)
+
+    price = _price_from_ld(product_ld)
+    if price is None:
+        for scope_text in snapshot.get('price_scope_texts') or []:
+            if scope_text is None:
+                continue
+            price = _price_from_text(scope_text)
+            if price is not None:
+                break
+    if price is None:
+        price = _price_from_text(body_text) or '0.00'
+
+    description = _description_from_overview(
+        snapshot.get('overview_html'),
+        snapshot.get('overview_text'),
+        product_ld,
+    )
+    breadcrumb_items = _breadcrumbs_from_links(
+        snapshot.get('nav_links'),
+        snapshot.get('main_links'),
+        title,
+        product_ld,
+    )
+    option1_name, variants = _variants_from_sources(
+        snapshot.get('heading_overview_text'),
+        snapshot.get('size_buttons'),
+        snapshot.get('color_buttons'),
+        snapshot.get('color_label_text'),
+    )
+    images = _images_from_sources(product_ld, snapshot.get('images'), url)
+    stock_status = _stock_from_ld(product_ld) or _stock_from_text(body_text)
+
+    return _product_result(
+        url, title, description, price, images, base_sku,
+        option1_name, variants, breadcrumb_items, stock_status,
+    )
+
+
+# Batch scrapes only read JSON-LD, DOM text and <img> attributes, so images,
+# media, fonts and anything served from non-Markaz hosts (analytics, pixels,
+# chat widgets) can be aborted. Stylesheets stay: innerText depends on CSS.
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font'})
+ALLOWED_REQUEST_HOSTS = tuple(
+    host.strip().lower()
+    for host in os.getenv('MARKAZ_ALLOWED_HOSTS', 'markaz.app').split(',')
+    if host.strip()
+)
+
+
+def should_block_request(resource_type, url, allowed_hosts=ALLOWED_REQUEST_HOSTS):
+    """True for requests a product scrape never reads."""
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = (urlparse(url).hostname or '').lower()
+    if not host:
+        # data:/blob: URLs never hit the network.
+        return False
+    return not any(host == allowed or host.endswith(f'.{allowed}') for allowed in allowed_hosts)
+
+
+class PageTrafficMeter:
+    """Per-page request / byte / blocked counters for one product scrape."""
+
+    def __init__(self):
+        self.requests = 0
+        self.blocked_requests = 0
+        self.bytes_transferred = 0
+
+    def record_sizes(self, sizes):
+        sizes = sizes or {}
+        self.requests += 1
+        self.bytes_transferred += max(0, int(sizes.get('responseBodySize') or 0))
+        self.bytes_transferred += max(0, int(sizes.get('responseHeadersSize') or 0))
+
+    def summary(self, page_seconds):
+        return {
+            'page_seconds': round(page_seconds, 3),
+            'requests': self.requests,
+            'blocked_requests': self.blocked_requests,
+            'bytes_transferred': self.bytes_transferred,
+        }
+
+
+def install_resource_blocking(page, meter=None, allowed_hosts=ALLOWED_REQUEST_HOSTS):
+    """Abort image/media/font/third-party requests on ``page``."""
+
+    def handle_route(route):
+        request = route.request
+        if should_block_request(request.resource_type, request.url, allowed_hosts):
+            if meter is not None:
+                meter.blocked_requests += 1
+            route.abort()
+        else:
+            route.continue_()
+
+    page.route('**/*', handle_route)
+
+
+def attach_traffic_meter(page, meter):
+    """Count finished requests and their transferred bytes into ``meter``."""
+
+    def on_request_finished(request):
+        try:
+            meter.record_sizes(request.sizes())
+        except Exception:
+            meter.record_sizes(None)
+
+    page.on('requestfinished', on_request_finished)
+
+
+# Try markaz_http_scraper before opening a browser page; Playwright only runs
+# when the HTML is missing required fields or the fetch fails.
+HTTP_FAST_PATH = os.getenv('MARKAZ_HTTP_FAST_PATH', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def scrape_product_http_first(url):
+    """HTTP-only scrape result when it has every required field, else None."""
+    try:
+        from markaz_http_scraper import scrape_product_http
+    except ImportError:
+        return None
+    result = scrape_product_http(url)
+    if result.pop('missing_fields', None):
+        return None
+    return result
+
+
+def cached_product_result(cache, url):
+    """Full result from ``cache`` (stale entries revalidated over HTTP), or None."""
+    if cache is None:
+        return None
+
+    def revalidate(url, validators):
+        from markaz_http_scraper import revalidate_product_html
+
+        return revalidate_product_html(url, validators)
+
+    return cache.get(url, revalidate=revalidate)
+
+
+def remember_product_result(cache, url, result):
+    """Drop the result's ``validators`` and, with a cache, store it under them."""
+    validators = result.pop('validators', None)
+    if cache is not None:
+        cache.put(url, result, validators)
+
+
+def check_stock_http_first(url):
+    """HTTP-only stock check when JSON-LD answers it, else None."""
+    try:
+        from markaz_http_scraper import check_stock_http
+    except ImportError:
+        return None
+    return check_stock_http(url)
+
+
+# Failed scrapes classified 'transient' (timeouts, navigation errors, a page
+# that rendered without its title) are retried up to SCRAPE_MAX_ATTEMPTS times
+# in total; 'permanent' ones (removed products, bad input) never are.
+SCRAPE_MAX_ATTEMPTS = int(os.getenv('MARKAZ_SCRAPE_MAX_ATTEMPTS', '3'))
+RETRY_BASE_DELAY = float(os.getenv('MARKAZ_RETRY_BASE_DELAY', '2'))
+RETRY_MAX_DELAY = float(os.getenv('MARKAZ_RETRY_MAX_DELAY', '30'))
+_PERMANENT_FAILURE_MARKERS = ('product not found', 'url is empty')
+
+
+def classify_scrape_failure(result):
+    """'transient', 'permanent', or None when ``result`` is a success."""
+    status = str((result or {}).get('status') or 'Error: empty result')
+    if status == 'success':
+        return None
+    lowered = status.lower()
+    if any(marker in lowered for marker in _PERMANENT_FAILURE_MARKERS):
+        return 'permanent'
+    return 'transient'
+
+
+class RetryPolicy:
+    """Which failed scrapes to retry and how long to back off before each retry.
+
+    Delays grow exponentially from ``base_delay`` and use full jitter (a
+    uniform draw up to the capped exponential), so retries of pages that
+    failed together do not hit Markaz together.
+    """
+
+    def __init__(
+        self,
+        max_attempts=SCRAPE_MAX_ATTEMPTS,
+        base_delay=RETRY_BASE_DELAY,
+        max_delay=RETRY_MAX_DELAY,
+        rng=None,
+    ):
+        self.max_attempts = max(1, int(max_attempts or 1))
+        self.base_delay = max(0.0, float(base_delay or 0.0))
+        self.max_delay = max(self.base_delay, float(max_delay or 0.0))
+        self._rng = rng or random.Random()
+
+    def should_retry(self, result, attempt):
+        """``attempt`` is the number of tries already made for this URL."""
+        return attempt < self.max_attempts and classify_scrape_failure(result) == 'transient'
+
+    def delay(self, attempt):
+        """Seconds to wait before try number ``attempt + 1``."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** max(0, attempt - 1)))
+        return self._rng.uniform(0, ceiling)
+
+
+class MarkazScrapeSession:
+    """Keep one Chromium and a small pool of contexts alive for a batch of scrapes.
+
+    Launching Chromium is the slowest part of a single scrape, so batch callers
+    (Refresh All, Send to Converter, bulk add) open one session and call
+    ``scrape(url)`` per product:
+
+        with MarkazScrapeSession() as session:
+            for url in urls:
+                result = session.scrape(url)
+
+    Full results are served from markaz_scrape_cache while fresh; pass
+    ``force_refresh=True`` (or ``use_cache=False``) to always scrape.
+
+    ``browser_provider`` is a callable returning an already-launched browser
+    the session borrows instead of launching its own (the warm browser of
+    api/index.py); it is only called when a page is needed and that browser
+    is left running on close.
+    """
+
+    def __init__(
+        self,
+        context_pool_size=DEFAULT_CONTEXT_POOL_SIZE,
+        context_options=None,
+        block_resources=True,
+        extraction_mode=None,
+        http_first=HTTP_FAST_PATH,
+        use_cache=True,
+        force_refresh=False,
+        cache=None,
+        browser_provider=None,
+        recycle_pages=BROWSER_RECYCLE_PAGES,
+        max_rss_mb=BROWSER_MAX_RSS_MB,
+    ):
+        from markaz_scrape_cache import default_scrape_cache
+
+        self.context_pool_size = max(1, int(context_pool_size or 1))
+        self.context_options = {**DEFAULT_CONTEXT_OPTIONS, **(context_options or {})}
+        self.block_resources = block_resources
+        self.extraction_mode = extraction_mode
+        self.http_first = http_first
+        self.cache = (cache or default_scrape_cache()) if use_cache else None
+        self.force_refresh = force_refresh
+        self.browser_provider = browser_provider
+        self.recycle_pages = max(1, int(recycle_pages or 1))
+        self.max_rss_mb = float(max_rss_mb or 0)
+        self.browser = None
+        self.browser_recycles = 0
+        self.peak_rss_mb = None
+        self._pages_since_launch = 0
+        self.pages_scraped = 0
+        self.http_pages = 0
+        self.cache_hits = 0
+        self.browser_launches = 0
+        self.bytes_transferred = 0
+        self.blocked_requests = 0
+        self.started_at = None
+        self.finished_at = None
+        self._playwright = None
+        self._contexts = []
+        self._next_context = 0
+
+    def __enter__(self):
+        # With the HTTP fast path Chromium is launched on the first browser fallback.
+        if self.http_first:
+            self.started_at = time.monotonic()
+            return self
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def start(self):
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        if self.browser is not None and self.browser.is_connected():
+            return self
+        self._contexts = []
+        if self.browser_provider is not None:
+            self.browser = self.browser_provider()
+            return self
+        if self._playwright is None:
+            from playwright.sync_api import sync_playwright
+
+            self._playwright = sync_playwright().start()
+        try:
+            self.browser = launch_browser_for_serverless(self._playwright)
+        except Exception:
+            # __exit__ never runs when start() fails in __enter__: stop the driver here.
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+            raise
+        self.browser_launches += 1
+        self._pages_since_launch = 0
+        return self
+
+    def _sample_memory(self):
+        rss_mb = process_tree_rss_mb()
+        if rss_mb is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0.0, rss_mb)
+        return rss_mb
+
+    def _recycle_if_due(self):
+        """Relaunch our own browser after ``recycle_pages`` pages or above ``max_rss_mb``."""
+        if self.browser is None or self.browser_provider is not None:
+            return
+        due = self._pages_since_launch >= self.recycle_pages
+        if not due and self.max_rss_mb:
+            rss_mb = self._sample_memory()
+            due = rss_mb is not None and rss_mb > self.max_rss_mb
+        if not due:
+            return
+        self._close_contexts()
+        try:
+            self.browser.close()
+        except Exception:
+            pass
+        self.browser = None
+        self.browser_recycles += 1
+
+    def _close_contexts(self):
+        for context in self._contexts:
+            try:
+                context.close()
+            except Exception:
+                pass
+        self._contexts = []
+
+    def _release_page(self, page):
+        """Clear the page's storage and its context's cookies, then close it."""
+        try:
+            page.evaluate(CLEAR_PAGE_STATE_JS)
+            page.context.clear_cookies()
+        except Exception:
+            pass
+        try:
+            page.close()
+        except Exception:
+            pass
+        self._pages_since_launch += 1
+        self._sample_memory()
+
+    def _acquire_context(self):
+        if len(self._contexts) < self.context_pool_size:
+            context = self.browser.new_context(**self.context_options)
+            self._contexts.append(context)
+            return context
+        context = self._contexts[self._next_context % len(self._contexts)]
+        self._next_context += 1
+        return context
+
+    def new_page(self):
+        """Open a fresh page in the next pooled context (caller closes it)."""
+        self._recycle_if_due()
+        self.start()
+        return self._acquire_context().new_page()
+
+    def scrape(self, url):
+        """Scrape one product URL; errors come back as a status dict, never raised.
+
+        Freshly scraped results carry a ``metrics`` dict (page time, requests,
+        blocked requests, bytes transferred); cache hits do not. With
+        ``http_first`` the plain HTML is tried before a browser page is opened.
+        """
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        if not self.force_refresh:
+            cached = cached_product_result(self.cache, url)
+            if cached is not None:
+                self.pages_scraped += 1
+                self.cache_hits += 1
+                return cached
+        result = self._scrape_live(url)
+        remember_product_result(self.cache, url, result)
+        return result
+
+    def _scrape_live(self, url):
+        if self.http_first:
+            result = scrape_product_http_first(url)
+            if result is not None:
+                self.pages_scraped += 1
+                self.http_pages += 1
+                self.bytes_transferred += result['metrics']['bytes_transferred']
+                return result
+
+        page = None
+        meter = PageTrafficMeter()
+        page_started = time.monotonic()
+        try:
+            page = self.new_page()
+            attach_traffic_meter(page, meter)
+            if self.block_resources:
+                install_resource_blocking(page, meter)
+            result = scrape_product_from_page(page, url, extraction_mode=self.extraction_mode)
+            result['metrics'] = meter.summary(time.monotonic() - page_started)
+            return result
+        except Exception as exc:
+            return _empty_result(url, f'Error: {exc}')
+        finally:
+            self.pages_scraped += 1
+            self.bytes_transferred += meter.bytes_transferred
+            self.blocked_requests += meter.blocked_requests
+            if page:
+                self._release_page(page)
+
+    def check_stock(self, url):
+        """Stock status, title and JSON-LD SKU only (see check_stock); never raises."""
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        result = self._check_stock_live(url)
+        if self.cache is not None and result.get('status') == 'success':
+            self.cache.update_fields(url, title=result['title'], stock_status=result['stock_status'])
+        return result
+
+    def _check_stock_live(self, url):
+        if self.http_first:
+            result = check_stock_http_first(url)
+            if result is not None:
+                self.pages_scraped += 1
+                self.http_pages += 1
+                return result
+
+        page = None
+        meter = PageTrafficMeter()
+        try:
+            page = self.new_page()
+            attach_traffic_meter(page, meter)
+            if self.block_resources:
+                install_resource_blocking(page, meter)
+            return check_stock_on_page(page, url)
+        except Exception as exc:
+            return _empty_result(url, f'Error: {exc}')
+        finally:
+            self.pages_scraped += 1
+            self.bytes_transferred += meter.bytes_transferred
+            self.blocked_requests += meter.blocked_requests
+            if page:
+                self._release_page(page)
+
+    @property
+    def elapsed_seconds(self):
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    def stats(self):
+        pages = self.pages_scraped
+        elapsed = self.elapsed_seconds
+        return {
+            'pages': pages,
+            'elapsed_seconds': round(elapsed, 2),
+            'seconds_per_page': round(elapsed / pages, 2) if pages else 0.0,
+            'browser_launches': self.browser_launches,
+            'kb_per_page': round(self.bytes_transferred / 1024 / pages, 1) if pages else 0.0,
+            'blocked_requests': self.blocked_requests,
+            'http_pages': self.http_pages,
+            'cache_hits': self.cache_hits,
+            'browser_recycles': self.browser_recycles,
+            'peak_rss_mb': self.peak_rss_mb,
+        }
+
+    def close(self):
+        self._close_contexts()
+        if self.browser and self.browser_provider is None:
+            try:
+                self.browser.close()
+            except Exception:
+                pass
+        self.browser = None
+        if self._playwright:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+        if self.started_at is not None and self.finished_at is None:
+            self.finished_at = time.monotonic()
+
+
+def scrape_markaz_product(url, force_refresh=False):
+    """Scrape product data from Markaz product URL."""
+    try:
+        with MarkazScrapeSession(context_pool_size=1, block_resources=False, force_refresh=force_refresh) as session:
+            return session.scrape(url)
+    except Exception as exc:
+        return _empty_result(url, f'Error: {exc}')
+
+
+def check_stock(url):
+    """Lightweight availability check for one Markaz URL.
+
+    Returns ``title``, ``stock_status``, ``base_sku`` (JSON-LD only), ``url``
+    and ``status``. Stops at the JSON-LD offer when it answers the question;
+    variants, images, breadcrumbs and description are never read.
+    """
+    try:
+        with MarkazScrapeSession(context_pool_size=1) as session:
+            return session.check_stock(url)
+    except Exception as exc:
+        return _empty_result(url, f'Error: {exc}')
+
+
+def normalize_product_url(href, base_url='https://www.markaz.app'):
+    """Turn relative/absolute product href into a clean absolute product URL."""
+    if not href:
         return ''
     absolute = urljoin(base_url, href.strip())
     parsed = urlparse(absolute)
@@ -650,9 +1867,14 @@ def extract_markaz_product_id(url):
     """
     if not url:
         return None
-    parsed = urlparse(str(url).strip())
+    return _product_id_from_url(str(url).strip())
+
+
+@lru_cache(maxsize=PRODUCT_ID_CACHE_SIZE)
+def _product_id_from_url(url):
+    parsed = urlparse(url)
     path = (parsed.path or '').rstrip('/')
-    match = re.search(r'/shop/product/(?:[^/]+/)?(\d+)$', path)
+    match = _PRODUCT_ID_PATH_PATTERN.search(path)
     if match:
         return match.group(1)
     # Fallback: last path segment if numeric
@@ -666,7 +1888,12 @@ def canonicalize_markaz_product_url(url):
     Same product id with different slugs still share the same id for dedupe;
     the returned URL keeps the slug from the input when present.
     """
-    cleaned = normalize_product_url(url or '')
+    return _canonical_product_url(url or '')
+
+
+@lru_cache(maxsize=PRODUCT_ID_CACHE_SIZE)
+def _canonical_product_url(url):
+    cleaned = normalize_product_url(url)
     if not cleaned:
         return (url or '').strip()
     parsed = urlparse(cleaned)
@@ -700,89 +1927,81 @@ def build_category_page_url(category_url, page_number):
     ))
 
 
-def extract_product_urls_from_category_page(page, base_url='https://www.markaz.app'):
-    """Collect unique product card URLs from an open Markaz category page.
+CATEGORY_READY_TIMEOUT_MS = 15000
 
-    Markaz lazily mounts cards as you scroll, so we scroll until the link
-    count stabilizes and also harvest any /shop/product/ paths from HTML/JSON.
-    """
-    try:
-        page.wait_for_selector('a[href*="/shop/product/"]', timeout=20000)
-    except Exception:
-        page.wait_for_timeout(3000)
 
-    # Scroll to bottom repeatedly until product-link count stops growing.
+def wait_for_category_ready(page):
+    """Return once the first product card link is attached.
+
+    Falls back to the old fixed delay when no card shows up; the selector
+    timeout replaces the old networkidle wait, so empty pages cost no more.
+    """
     try:
-        page.evaluate(
-            """async () => {
-                const sleep = (ms) => new Promise((r) => setTimeout(r, ms));
-                let last = 0;
-                let stableRounds = 0;
-                for (let i = 0; i < 40; i++) {
-                    window.scrollBy(0, Math.floor(window.innerHeight * 0.85));
-                    await sleep(450);
-                    if ((i + 1) % 3 === 0) {
-                        window.scrollTo(0, document.body.scrollHeight);
-                        await sleep(700);
-                    }
-                    const n = document.querySelectorAll('a[href*="/shop/product/"]').length;
-                    if (n <= last) {
-                        stableRounds += 1;
-                        if (stableRounds >= 4) break;
-                    } else {
-                        stableRounds = 0;
-                        last = n;
-                    }
-                }
-                window.scrollTo(0, 0);
-                await sleep(400);
-            }"""
-        )
-        page.wait_for_timeout(1000)
+        page.wait_for_selector('a[href*="/shop/product/"]', state='attached', timeout=CATEGORY_READY_TIMEOUT_MS)
+        return True
     except Exception:
         pass
+    page.wait_for_timeout(2500)
+    return False
+
+
+CATEGORY_PRODUCT_LINK_SELECTOR = 'a[href*="/shop/product/"]'
+DEFAULT_CATEGORY_CONCURRENCY = int(os.getenv('MARKAZ_CATEGORY_CONCURRENCY', '3'))
+
+# Scroll to bottom repeatedly until product-link count stops growing.
+CATEGORY_SCROLL_JS = """async () => {
+    const sleep = (ms) => new Promise((r) => setTimeout(r, ms));
+    let last = 0;
+    let stableRounds = 0;
+    for (let i = 0; i < 40; i++) {
+        window.scrollBy(0, Math.floor(window.innerHeight * 0.85));
+        await sleep(450);
+        if ((i + 1) % 3 === 0) {
+            window.scrollTo(0, document.body.scrollHeight);
+            await sleep(700);
+        }
+        const n = document.querySelectorAll('a[href*="/shop/product/"]').length;
+        if (n <= last) {
+            stableRounds += 1;
+            if (stableRounds >= 4) break;
+        } else {
+            stableRounds = 0;
+            last = n;
+        }
+    }
+    window.scrollTo(0, 0);
+    await sleep(400);
+}"""
+
+CATEGORY_HREFS_JS = 'els => els.map(el => el.getAttribute("href"))'
+
+CATEGORY_PAYLOAD_PATHS_JS = """() => {
+    const found = [];
+    const pushMatches = (text) => {
+        if (!text) return;
+        const re = /\\/shop\\/product\\/[\\w\\-./%]+/g;
+        const matches = text.match(re) || [];
+        for (const m of matches) found.push(m);
+    };
+    pushMatches(document.documentElement.innerHTML);
+    const next = document.getElementById('__NEXT_DATA__');
+    if (next) pushMatches(next.textContent || '');
+    for (const script of document.querySelectorAll('script')) {
+        const type = (script.type || '').toLowerCase();
+        if (type.includes('json') || script.id === '__NEXT_DATA__') {
+            pushMatches(script.textContent || '');
+        }
+    }
+    return found;
+}"""
 
-    hrefs = page.eval_on_selector_all(
-        'a[href*="/shop/product/"]',
-        'els => els.map(el => el.getAttribute("href"))',
-    ) or []
 
-    # Fallback: scrape raw HTML / embedded Next.js payloads for any missed cards.
-    html_candidates = []
-    try:
-        html = page.content() or ''
-        html_candidates.extend(
-            re.findall(r'(?:https?://[^"\'\s]*?)?/shop/product/[^"\'\s<>\\]+', html, re.I)
-        )
-    except Exception:
-        pass
+def _category_html_candidates(html_source):
+    return _CATEGORY_PRODUCT_PATH_PATTERN.findall(html_source or '')
 
-    try:
-        extra = page.evaluate(
-            """() => {
-                const found = [];
-                const pushMatches = (text) => {
-                    if (!text) return;
-                    const re = /\\/shop\\/product\\/[\\w\\-./%]+/g;
-                    const matches = text.match(re) || [];
-                    for (const m of matches) found.push(m);
-                };
-                pushMatches(document.documentElement.innerHTML);
-                const next = document.getElementById('__NEXT_DATA__');
-                if (next) pushMatches(next.textContent || '');
-                for (const script of document.querySelectorAll('script')) {
-                    const type = (script.type || '').toLowerCase();
-                    if (type.includes('json') || script.id === '__NEXT_DATA__') {
-                        pushMatches(script.textContent || '');
-                    }
-                }
-                return found;
-            }"""
-        ) or []
-        html_candidates.extend(extra)
-    except Exception:
-        pass
 
+def product_urls_from_category_sources(hrefs, html_candidates, base_url='https://www.markaz.app'):
+    """Unique product URLs from card hrefs first, then raw HTML / JSON path matches."""
     urls = []
     seen = set()
     seen_ids = set()
@@ -802,111 +2021,153 @@ def extract_product_urls_from_category_page(page, base_url='https://www.markaz.a
         seen.add(product_url)
         urls.append(product_url)
 
-    for href in hrefs:
+    for href in hrefs or []:
         _add(href)
-    for href in html_candidates:
+    for href in html_candidates or []:
         cleaned = href.replace('\\u002F', '/').replace('\\/', '/').rstrip('.,);]')
         _add(cleaned)
 
     return urls
 
 
-def scrape_category_product_urls(category_url, start_page=1, end_page=1):
-    """
-    Open Markaz category page(s) and return all product URLs found in cards.
+def extract_product_urls_from_category_page(page, base_url='https://www.markaz.app'):
+    """Collect unique product card URLs from an open Markaz category page.
 
-    Uses ?page=N pagination. Returns:
-    {
-      'status': 'success' | 'error: ...',
-      'urls': [...],
-      'pages': [{'page': 1, 'url': '...', 'count': N}, ...],
-      'errors': [...],
-    }
+    Markaz lazily mounts cards as you scroll, so we scroll until the link
+    count stabilizes and also harvest any /shop/product/ paths from HTML/JSON.
     """
-    from playwright.sync_api import sync_playwright
+    try:
+        page.wait_for_selector(CATEGORY_PRODUCT_LINK_SELECTOR, timeout=20000)
+    except Exception:
+        page.wait_for_timeout(3000)
 
-    start_page = max(1, int(start_page or 1))
-    end_page = max(start_page, int(end_page or start_page))
-    category_url = (category_url or '').strip()
-    if not category_url:
-        return {
-            'status': 'Error: Category URL is empty',
-            'urls': [],
-            'pages': [],
-            'errors': ['Category URL is empty'],
-        }
+    try:
+        page.evaluate(CATEGORY_SCROLL_JS)
+        page.wait_for_timeout(1000)
+    except Exception:
+        pass
+
+    hrefs = page.eval_on_selector_all(CATEGORY_PRODUCT_LINK_SELECTOR, CATEGORY_HREFS_JS) or []
+
+    # Fallback: scrape raw HTML / embedded Next.js payloads for any missed cards.
+    html_candidates = []
+    try:
+        html_candidates.extend(_category_html_candidates(page.content() or ''))
+    except Exception:
+        pass
+
+    try:
+        html_candidates.extend(page.evaluate(CATEGORY_PAYLOAD_PATHS_JS) or [])
+    except Exception:
+        pass
+
+    return product_urls_from_category_sources(hrefs, html_candidates, base_url=base_url)
 
+
+def _category_product_id(product_url):
+    tail = urlparse(product_url).path.rstrip('/').rsplit('/', 1)[-1]
+    return tail if tail.isdigit() else ''
+
+
+def merge_category_pages(page_results):
+    """Merge per-page crawl results in page order with URL / product-id dedupe.
+
+    ``page_results`` is a list of ``(page_number, page_url, found_urls, error)``
+    tuples (``error`` is None on success), optionally with a fifth ``source``
+    item ('payload' / 'browser') copied into the page summary. Returns
+    ``(urls, page_summaries, errors)``.
+    """
     all_urls = []
     seen = set()
     seen_ids = set()
     page_summaries = []
     errors = []
-    browser = None
 
-    def _product_id(product_url):
-        tail = urlparse(product_url).path.rstrip('/').rsplit('/', 1)[-1]
-        return tail if tail.isdigit() else ''
+    for page_number, page_url, found, error, *extra in sorted(page_results, key=lambda item: item[0]):
+        source = {'source': extra[0]} if extra else {}
+        if error is not None:
+            errors.append(f'Page {page_number}: {error}')
+            page_summaries.append({
+                'page': page_number,
+                'url': page_url,
+                'count': 0,
+                'unique_new': 0,
+                'error': str(error),
+                **source,
+            })
+            continue
+
+        new_on_page = 0
+        for product_url in found:
+            pid = _category_product_id(product_url)
+            if product_url in seen or (pid and pid in seen_ids):
+                continue
+            seen.add(product_url)
+            if pid:
+                seen_ids.add(pid)
+            all_urls.append(product_url)
+            new_on_page += 1
+        page_summaries.append({
+            'page': page_number,
+            'url': page_url,
+            'count': len(found),
+            'unique_new': new_on_page,
+            **source,
+        })
+        if not found:
+            errors.append(f'Page {page_number}: no product URLs found')
+
+    return all_urls, page_summaries, errors
+
+
+def _category_crawl_result(all_urls, page_summaries, errors):
+    if not all_urls:
+        return {
+            'status': 'Error: No product URLs found on selected page(s)',
+            'urls': [],
+            'pages': page_summaries,
+            'errors': errors,
+        }
+
+    return {
+        'status': 'success',
+        'urls': all_urls,
+        'pages': page_summaries,
+        'errors': errors,
+    }
+
+
+CATEGORY_CRAWL_STRATEGIES = ('auto', 'payload', 'scroll')
+# 'auto' reads each page's embedded Next.js / JSON payload over HTTP and only
+# scroll-crawls (in a browser) the pages where that finds no product URLs.
+DEFAULT_CATEGORY_STRATEGY = os.getenv('MARKAZ_CATEGORY_STRATEGY', 'auto').strip().lower()
+
 
+def _crawl_category_pages_serial(category_url, page_numbers, page_results):
+    from playwright.sync_api import sync_playwright
+
+    browser = None
     try:
         with sync_playwright() as playwright:
             browser = launch_browser_for_serverless(playwright)
-            for page_number in range(start_page, end_page + 1):
+            for page_number in page_numbers:
                 context = None
                 page_url = build_category_page_url(category_url, page_number)
                 try:
-                    context = browser.new_context(
-                        permissions=[],
-                        ignore_https_errors=True,
-                        viewport={'width': 1920, 'height': 1080},
-                    )
+                    context = browser.new_context(**DEFAULT_CONTEXT_OPTIONS)
                     page = context.new_page()
                     page.goto(page_url, wait_until='domcontentloaded', timeout=60000)
-                    try:
-                        page.wait_for_load_state('networkidle', timeout=15000)
-                    except Exception:
-                        pass
-                    page.wait_for_timeout(2500)
+                    wait_for_category_ready(page)
                     found = extract_product_urls_from_category_page(page)
-                    new_on_page = 0
-                    for product_url in found:
-                        pid = _product_id(product_url)
-                        if product_url in seen or (pid and pid in seen_ids):
-                            continue
-                        seen.add(product_url)
-                        if pid:
-                            seen_ids.add(pid)
-                        all_urls.append(product_url)
-                        new_on_page += 1
-                    page_summaries.append({
-                        'page': page_number,
-                        'url': page_url,
-                        'count': len(found),
-                        'unique_new': new_on_page,
-                    })
-                    if not found:
-                        errors.append(f'Page {page_number}: no product URLs found')
+                    page_results.append((page_number, page_url, found, None, 'browser'))
                 except Exception as exc:
-                    errors.append(f'Page {page_number}: {exc}')
-                    page_summaries.append({
-                        'page': page_number,
-                        'url': page_url,
-                        'count': 0,
-                        'unique_new': 0,
-                        'error': str(exc),
-                    })
+                    page_results.append((page_number, page_url, [], exc, 'browser'))
                 finally:
                     if context:
                         try:
                             context.close()
                         except Exception:
                             pass
-    except Exception as exc:
-        return {
-            'status': f'Error: {exc}',
-            'urls': all_urls,
-            'pages': page_summaries,
-            'errors': errors + [str(exc)],
-        }
     finally:
         if browser:
             try:
@@ -914,17 +2175,193 @@ def scrape_category_product_urls(category_url, start_page=1, end_page=1):
             except Exception:
                 pass
 
-    if not all_urls:
+
+def _crawl_category_pages(category_url, page_numbers, page_results, concurrency, strategy):
+    """Append per-page results for ``page_numbers`` to ``page_results``.
+
+    Raises when the browser crawl fails; pages collected so far stay in
+    ``page_results``.
+    """
+    if strategy != 'scroll':
+        from markaz_http_scraper import crawl_category_pages_from_payload
+
+        for page_result in crawl_category_pages_from_payload(category_url, page_numbers):
+            if page_result[2] or strategy == 'payload':
+                page_results.append(page_result)
+        done = {page_result[0] for page_result in page_results}
+        page_numbers = [number for number in page_numbers if number not in done]
+
+    if not page_numbers:
+        return
+    if concurrency > 1 and len(page_numbers) > 1:
+        from markaz_async_scraper import crawl_category_pages_concurrently
+
+        crawl_category_pages_concurrently(category_url, page_numbers, page_results, concurrency=concurrency)
+    else:
+        _crawl_category_pages_serial(category_url, page_numbers, page_results)
+
+
+def scrape_category_product_urls(category_url, start_page=1, end_page=1, concurrency=None, strategy=None):
+    """
+    Collect all product URLs from Markaz category page(s).
+
+    Uses ?page=N pagination. ``strategy`` (default MARKAZ_CATEGORY_STRATEGY):
+    'payload' reads the embedded Next.js / JSON data over HTTP without a
+    browser, 'scroll' renders and scrolls each page, and 'auto' uses the
+    payload and scroll-crawls only the pages where it found nothing. Scroll
+    crawls of several pages run in parallel when ``concurrency`` > 1 (default
+    MARKAZ_CATEGORY_CONCURRENCY). Returns:
+    {
+      'status': 'success' | 'error: ...',
+      'urls': [...],
+      'pages': [{'page': 1, 'url': '...', 'count': N, 'source': 'payload'}, ...],
+      'errors': [...],
+    }
+    """
+    start_page = max(1, int(start_page or 1))
+    end_page = max(start_page, int(end_page or start_page))
+    category_url = (category_url or '').strip()
+    if not category_url:
         return {
-            'status': 'Error: No product URLs found on selected page(s)',
+            'status': 'Error: Category URL is empty',
             'urls': [],
+            'pages': [],
+            'errors': ['Category URL is empty'],
+        }
+
+    strategy = (strategy or DEFAULT_CATEGORY_STRATEGY).strip().lower()
+    if strategy not in CATEGORY_CRAWL_STRATEGIES:
+        raise ValueError(f'Unknown category crawl strategy: {strategy!r}')
+    concurrency = DEFAULT_CATEGORY_CONCURRENCY if concurrency is None else int(concurrency or 1)
+    page_numbers = list(range(start_page, end_page + 1))
+
+    page_results = []
+    try:
+        _crawl_category_pages(category_url, page_numbers, page_results, concurrency, strategy)
+    except Exception as exc:
+        all_urls, page_summaries, errors = merge_category_pages(page_results)
+        return {
+            'status': f'Error: {exc}',
+            'urls': all_urls,
             'pages': page_summaries,
-            'errors': errors,
+            'errors': errors + [str(exc)],
+        }
+
+    return _category_crawl_result(*merge_category_pages(page_results))
+
+
+# Incremental crawls stop after this many consecutive pages with no new product ids.
+DEFAULT_CATEGORY_STOP_AFTER_KNOWN_PAGES = int(os.getenv('MARKAZ_CATEGORY_STOP_AFTER_KNOWN_PAGES', '1'))
+DEFAULT_CATEGORY_MAX_PAGES = int(os.getenv('MARKAZ_CATEGORY_MAX_PAGES', '30'))
+
+
+def scrape_category_product_urls_incremental(
+    category_url,
+    known_product_ids,
+    start_page=1,
+    end_page=None,
+    stop_after_known_pages=DEFAULT_CATEGORY_STOP_AFTER_KNOWN_PAGES,
+    concurrency=None,
+    strategy=None,
+):
+    """
+    Walk a category from ``start_page`` and return only products not yet known.
+
+    ``known_product_ids`` are Markaz product ids already tracked (see
+    supabase_store.list_tracked_product_ids). Pagination stops after
+    ``stop_after_known_pages`` consecutive pages without a new id, at an empty
+    page, or at ``end_page`` (default start_page + MARKAZ_CATEGORY_MAX_PAGES - 1).
+    Pages are fetched ``concurrency`` at a time, so up to that many pages past
+    the stopping point may be read and ignored. Returns the
+    scrape_category_product_urls dict with ``urls`` limited to new products,
+    ``'new'`` / ``'known'`` counts per page, ``known_skipped`` and
+    ``stopped_early``.
+    """
+    start_page = max(1, int(start_page or 1))
+    if end_page is None:
+        end_page = start_page + DEFAULT_CATEGORY_MAX_PAGES - 1
+    end_page = max(start_page, int(end_page))
+    category_url = (category_url or '').strip()
+    if not category_url:
+        return {
+            'status': 'Error: Category URL is empty',
+            'urls': [],
+            'pages': [],
+            'errors': ['Category URL is empty'],
+            'known_skipped': 0,
+            'stopped_early': False,
         }
 
+    strategy = (strategy or DEFAULT_CATEGORY_STRATEGY).strip().lower()
+    if strategy not in CATEGORY_CRAWL_STRATEGIES:
+        raise ValueError(f'Unknown category crawl strategy: {strategy!r}')
+    concurrency = max(1, DEFAULT_CATEGORY_CONCURRENCY if concurrency is None else int(concurrency or 1))
+    stop_after_known_pages = max(1, int(stop_after_known_pages or 1))
+    known = {str(product_id) for product_id in known_product_ids or [] if product_id}
+
+    new_urls = []
+    seen = set()
+    seen_ids = set()
+    page_summaries = []
+    errors = []
+    known_skipped = 0
+    quiet_pages = 0
+    stopped_early = False
+    finished = False
+    next_page = start_page
+
+    while not finished and next_page <= end_page:
+        page_numbers = list(range(next_page, min(end_page, next_page + concurrency - 1) + 1))
+        next_page = page_numbers[-1] + 1
+        page_results = []
+        try:
+            _crawl_category_pages(category_url, page_numbers, page_results, concurrency, strategy)
+        except Exception as exc:
+            errors.append(str(exc))
+            finished = True
+
+        for page_number, page_url, found, error, *extra in sorted(page_results, key=lambda item: item[0]):
+            summary = {'page': page_number, 'url': page_url, 'count': len(found), 'new': 0, 'known': 0}
+            if extra:
+                summary['source'] = extra[0]
+            if error is not None:
+                errors.append(f'Page {page_number}: {error}')
+                summary['error'] = str(error)
+                page_summaries.append(summary)
+                continue
+
+            for product_url in found:
+                pid = _category_product_id(product_url)
+                if product_url in seen or (pid and pid in seen_ids):
+                    continue
+                seen.add(product_url)
+                if pid:
+                    seen_ids.add(pid)
+                if pid and pid in known:
+                    summary['known'] += 1
+                    known_skipped += 1
+                    continue
+                new_urls.append(product_url)
+                summary['new'] += 1
+            page_summaries.append(summary)
+
+            if not found:
+                finished = True
+                break
+            quiet_pages = 0 if summary['new'] else quiet_pages + 1
+            if quiet_pages >= stop_after_known_pages:
+                stopped_early = page_number < end_page
+                finished = True
+                break
+
+    status = 'success'
+    if not new_urls and errors and not any('error' not in page for page in page_summaries):
+        status = f'Error: {errors[-1]}'
     return {
-        'status': 'success',
-        'urls': all_urls,
+        'status': status,
+        'urls': new_urls,
         'pages': page_summaries,
         'errors': errors,
+        'known_skipped': known_skipped,
+        'stopped_early': stopped_early,
     }
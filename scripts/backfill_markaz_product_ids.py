@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Fill tracked_products.markaz_product_id for rows saved before it was kept.
+
+Usage:
+  python scripts/backfill_markaz_product_ids.py
+
+Needs the column from supabase/04_dedupe_markaz_products.sql. Running
+supabase/07_markaz_product_id_trigger.sql backfills in SQL and keeps the
+column in sync afterwards; this script is for projects that cannot run it yet.
+Requires SUPABASE_URL + SUPABASE_KEY (or .streamlit/secrets.toml).
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from supabase_store import _column_available, backfill_tracked_product_ids  # noqa: E402
+
+
+def main() -> int:
+    if not _column_available('markaz_product_id'):
+        print('markaz_product_id column is missing. Run supabase/04_dedupe_markaz_products.sql first.')
+        return 1
+    updated = backfill_tracked_product_ids()
+    print(f'Backfilled markaz_product_id on {updated} row(s).')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
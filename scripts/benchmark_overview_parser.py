@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Compare the regex and streaming overview formatters (and which one is picked).
+
+Usage:
+  python scripts/benchmark_overview_parser.py
+  python scripts/benchmark_overview_parser.py --corpus path/to/captured_html --repeat 20
+
+``--corpus`` takes a directory of ``*.html`` files holding either overview
+innerHTML or whole product pages (the overview is cut out of those). Without
+it a synthetic corpus of Tailwind-style overviews from ~2 KB to ~600 KB plus two
+malformed documents is used.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from markaz_scraper import (  # noqa: E402
+    _format_product_overview_html_regex,
+    _format_product_overview_html_streaming,
+    format_product_overview_html,
+)
+
+_format_streaming = _format_product_overview_html_streaming
+# The public formatter is memoized; time the dispatch + parse itself.
+_format_picked = format_product_overview_html.__wrapped__
+
+_CARD_CLASS = (
+    'flex flex-col gap-1 rounded-lg border border-gray-200 bg-white px-3 py-2 '
+    'text-sm text-gray-700 shadow-sm hover:shadow-md transition-shadow duration-200'
+)
+
+
+def synthetic_overview(cards: int) -> str:
+    rows = []
+    for index in range(cards):
+        rows.append(
+            f'<div class="{_CARD_CLASS}"><dt class="text-xs text-gray-500">Feature {index}</dt>'
+            f'<dd class="font-medium">Value {index} &amp; detail</dd></div>'
+        )
+        if index % 10 == 0:
+            rows.append(f'<p class="mt-2 text-gray-600">Paragraph {index} with <b>bold</b> text.</p>')
+    items = ''.join(f'<li class="{_CARD_CLASS}">Point {index}</li>' for index in range(cards // 4))
+    return (
+        '<h2 class="text-lg font-semibold">Product Overview</h2>'
+        f'<div class="relative overflow-hidden {_CARD_CLASS} max-h-[480px]">'
+        '<p>Highlights</p>'
+        f'<dl class="grid grid-cols-2 gap-2">{"".join(rows)}</dl>'
+        f'<ul class="list-disc">{items}</ul>'
+        '<p>Specifications</p><dl><div><dt>Brand</dt><dd>Seller</dd></div></dl>'
+        '</div>'
+        '<div data-overview-fade class="absolute inset-x-0 bottom-0"><button>Show more</button></div>'
+    )
+
+
+def malformed_overviews() -> list[tuple[str, str]]:
+    # Truncated / unpaired markup makes the lazy .*? block patterns rescan to the end.
+    return [
+        ('malformed-unclosed-p', '<p>Soft lawn fabric ' * 1500),
+        ('malformed-unpaired-dt', '<dl>' + '<dt>Fabric</dt><span>Lawn</span>' * 1500 + '</dl>'),
+    ]
+
+
+def load_corpus(directory: Path | None) -> list[tuple[str, str]]:
+    if directory is None:
+        synthetic = [(f'synthetic-{cards}', synthetic_overview(cards)) for cards in (5, 50, 500, 2000)]
+        return synthetic + malformed_overviews()
+
+    from markaz_http_scraper import product_snapshot_from_html
+
+    corpus = []
+    for path in sorted(directory.glob('*.html')):
+        source = path.read_text(encoding='utf-8', errors='replace')
+        if 'desktop-product-overview' in source:
+            source = product_snapshot_from_html(source).get('overview_html') or ''
+        if source:
+            corpus.append((path.name, source))
+    return corpus
+
+
+def time_ms(formatter, source: str, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        formatter(source)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', type=Path, default=None, help='Directory of captured *.html files.')
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per document and parser.')
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print('No overview HTML found in the corpus.')
+        return 1
+
+    mismatches = 0
+    totals = {'regex': 0.0, 'streaming': 0.0, 'picked': 0.0}
+    print(f'{"document":<40} {"KB":>8} {"regex ms":>10} {"stream ms":>10} {"picked ms":>10}  same')
+    for name, source in corpus:
+        regex_ms = statistics.median(time_ms(_format_product_overview_html_regex, source, args.repeat))
+        streaming_ms = statistics.median(time_ms(_format_streaming, source, args.repeat))
+        picked_ms = statistics.median(time_ms(_format_picked, source, args.repeat))
+        same = _format_product_overview_html_regex(source) == _format_streaming(source)
+        mismatches += not same
+        totals['regex'] += regex_ms
+        totals['streaming'] += streaming_ms
+        totals['picked'] += picked_ms
+        print(
+            f'{name[:40]:<40} {len(source) / 1024:>8.1f} {regex_ms:>10.2f} {streaming_ms:>10.2f} '
+            f'{picked_ms:>10.2f}  {"yes" if same else "NO"}'
+        )
+
+    print(
+        f'\n{len(corpus)} documents: regex {totals["regex"]:.1f} ms, '
+        f'streaming {totals["streaming"]:.1f} ms, picked {totals["picked"]:.1f} ms '
+        f'(median per document, summed); {mismatches} with different output.'
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Offline scraper benchmark: replay recorded fixtures and report p50 / p95 per phase.
+
+Usage:
+  python scripts/benchmark_scraper.py
+  python scripts/benchmark_scraper.py --fixtures fixtures/markaz --repeat 10 --kind product
+
+Record fixtures first with scripts/record_fixtures.py. No network is used:
+pages are served from 127.0.0.1 and every other request is aborted.
+Exits non-zero when a replayed page no longer extracts what was recorded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from markaz_fixtures import FIXTURE_KINDS, FIXTURES_DIR, run_benchmark  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Fixture directory.')
+    parser.add_argument('--repeat', type=int, default=5, help='Replays per fixture.')
+    parser.add_argument('--kind', choices=FIXTURE_KINDS, action='append', help='Only this kind (repeatable).')
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    report = run_benchmark(args.fixtures, repeat=args.repeat, kinds=tuple(args.kind or FIXTURE_KINDS))
+    if not report:
+        print(f'No fixtures in {args.fixtures}; record some with scripts/record_fixtures.py.')
+        return 1
+
+    failed = False
+    for kind, summary in report.items():
+        print(f'\n{kind}')
+        print(f'  {"phase":<10} {"p50 s":>8} {"p95 s":>8} {"runs":>6}')
+        for phase, stats in summary['phases'].items():
+            print(f'  {phase:<10} {stats["p50"]:>8.3f} {stats["p95"]:>8.3f} {stats["runs"]:>6}')
+        for url in summary['mismatches']:
+            failed = True
+            print(f'  ✗ output changed: {url}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
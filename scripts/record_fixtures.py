@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Save live Markaz pages as offline fixtures for scripts/benchmark_scraper.py.
+
+Usage:
+  python scripts/record_fixtures.py https://www.markaz.app/shop/product/some-slug/733730 ...
+  python scripts/record_fixtures.py --category https://www.markaz.app/shop/category/... --pages 1-3
+  python scripts/record_fixtures.py --from-file urls.txt --out fixtures/markaz
+
+Needs network access and Playwright Chromium; everything after this runs offline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from markaz_fixtures import FIXTURES_DIR, record_fixtures  # noqa: E402
+from markaz_scraper import build_category_page_url  # noqa: E402
+
+
+def page_range(value: str) -> range:
+    start, _, end = value.partition('-')
+    return range(int(start), int(end or start) + 1)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('urls', nargs='*', help='Product URLs to record.')
+    parser.add_argument('--from-file', type=Path, help='File with one product URL per line.')
+    parser.add_argument('--category', help='Category URL to record (see --pages).')
+    parser.add_argument('--pages', type=page_range, default=range(1, 2), help='Category pages, e.g. 1-3.')
+    parser.add_argument('--out', default=FIXTURES_DIR, help='Fixture directory.')
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    product_urls = list(args.urls)
+    if args.from_file:
+        product_urls.extend(line.strip() for line in args.from_file.read_text().splitlines() if line.strip())
+
+    errors = []
+    if product_urls:
+        recorded, failed = record_fixtures(product_urls, kind='product', directory=args.out)
+        print(f'Recorded {recorded} product page(s) → {args.out}')
+        errors.extend(failed)
+    if args.category:
+        category_urls = [build_category_page_url(args.category, number) for number in args.pages]
+        recorded, failed = record_fixtures(category_urls, kind='category', directory=args.out)
+        print(f'Recorded {recorded} category page(s) → {args.out}')
+        errors.extend(failed)
+    if not product_urls and not args.category:
+        print('Nothing to record: pass product URLs, --from-file or --category.')
+        return 1
+
+    for error in errors:
+        print(f'  ✗ {error}')
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -5,7 +5,7 @@ from html import escape
 
 from requests.exceptions import RequestException, Timeout
 
-from markaz_scraper import normalize_markaz_image_url
+from markaz_images import ProductImages, image_key
 from pricing_rules import get_default_price_adjustments
 from shopify_config import is_shopify_configured
 from shopify_sync import DEFAULT_IN_STOCK_QTY, ShopifyAPIError, get_shopify_client
@@ -258,29 +258,28 @@ def apply_default_product_category(client, product_id):
     return f'Product Category skipped: {detail}'
 
 
-def normalize_product_image_urls(product):
-    urls = []
-    for url in product.get('image_urls') or []:
-        normalized = normalize_markaz_image_url(url)
-        if normalized and normalized not in urls:
-            urls.append(normalized)
-    return urls
+def product_images(product):
+    """Canonical, deduplicated images of a scraped product (keys reused from the scrape)."""
+    return ProductImages.from_product(product)
 
 
-def sync_product_images(client, product_id, image_urls, existing_images=None):
+def sync_product_images(client, product_id, images, existing_images=None):
+    """Upload images whose key is not already on the Shopify product.
+
+    Shopify re-hosts uploads on its CDN under the original file name, so
+    existing images are matched by ``image_key`` rather than by URL.
+    """
+    if not isinstance(images, ProductImages):
+        images = ProductImages.from_product({'image_urls': images})
     existing_images = existing_images or []
-    existing_bases = {
-        (img.get('src') or '').split('?')[0].rstrip('/')
-        for img in existing_images
-    }
+    existing_keys = {image_key(img.get('src')) for img in existing_images if img.get('src')}
     added = 0
     skipped = 0
     errors = []
     position = len(existing_images)
 
-    for url in image_urls:
-        base = url.split('?')[0].rstrip('/')
-        if base in existing_bases:
+    for url, key in images:
+        if key in existing_keys:
             continue
         position += 1
         try:
@@ -290,7 +289,7 @@ def sync_product_images(client, product_id, image_urls, existing_images=None):
                 json={'image': {'src': url, 'position': position}},
                 timeout=(15, 90),
             )
-            existing_bases.add(base)
+            existing_keys.add(key)
             added += 1
         except Exception as exc:
             skipped += 1
@@ -418,7 +417,7 @@ def assign_variant_images(client, shopify_product, force=False):
     }
 
 
-def ensure_images_and_variant_images(client, shopify_product, image_urls):
+def ensure_images_and_variant_images(client, shopify_product, scraped_images):
     """Upload missing product images, then assign images onto variants."""
     if not shopify_product or not shopify_product.get('id'):
         return shopify_product, {
@@ -431,11 +430,11 @@ def ensure_images_and_variant_images(client, shopify_product, image_urls):
 
     product_id = shopify_product['id']
     image_sync = {'added': 0, 'skipped': 0, 'errors': []}
-    if image_urls:
+    if scraped_images:
         image_sync = sync_product_images(
             client,
             product_id,
-            image_urls,
+            scraped_images,
             existing_images=shopify_product.get('images', []),
         )
 
@@ -610,7 +609,7 @@ def build_shopify_product_payload(product, handle, include_images=False):
         })
 
     tags, product_type = _product_tags_and_type(product)
-    image_urls = normalize_product_image_urls(product)
+    scraped_images = product_images(product)
 
     payload = {
         'title': product.get('title') or 'Untitled Product',
@@ -625,8 +624,8 @@ def build_shopify_product_payload(product, handle, include_images=False):
 
     # Prefer attaching images after create — Shopify fetching many remote images
     # inline can exceed read timeouts even though the product was saved.
-    if include_images and image_urls:
-        payload['images'] = [{'src': url} for url in image_urls]
+    if include_images and scraped_images:
+        payload['images'] = [{'src': url} for url in scraped_images.urls]
 
     if has_real_variants:
         payload['options'] = [{'name': option1_name}]
@@ -646,13 +645,13 @@ def _recover_published_product(client, handle, title, product, exc, action_hint=
     if not existing:
         return None
 
-    image_urls = normalize_product_image_urls(product)
+    scraped_images = product_images(product)
     images_added = 0
     image_sync = {'added': 0, 'skipped': 0, 'errors': [], 'variants_assigned': 0, 'variant_errors': []}
     try:
-        if image_urls or (existing.get('images') and existing.get('variants')):
+        if scraped_images or (existing.get('images') and existing.get('variants')):
             existing, image_sync = ensure_images_and_variant_images(
-                client, existing, image_urls,
+                client, existing, scraped_images,
             )
             images_added = image_sync.get('added', 0) if isinstance(image_sync, dict) else image_sync
     except Exception:
@@ -701,7 +700,7 @@ def publish_product_to_shopify(product, client=None, fallback_index=0):
         fallback_index=fallback_index,
     )
     title = product.get('title') or handle
-    image_urls = normalize_product_image_urls(product)
+    scraped_images = product_images(product)
 
     try:
         existing = client.get_product_by_handle(handle)
@@ -734,9 +733,9 @@ def publish_product_to_shopify(product, client=None, fallback_index=0):
             images_added = 0
             image_errors = []
             variants_assigned = 0
-            if image_urls or existing.get('images'):
+            if scraped_images or existing.get('images'):
                 refreshed, image_sync = ensure_images_and_variant_images(
-                    client, existing, image_urls,
+                    client, existing, scraped_images,
                 )
                 images_added = image_sync.get('added', 0)
                 image_errors = (image_sync.get('errors') or []) + (
@@ -818,9 +817,9 @@ def publish_product_to_shopify(product, client=None, fallback_index=0):
         image_errors = []
         variants_assigned = 0
 
-        if product_id and (image_urls or created.get('variants')):
+        if product_id and (scraped_images or created.get('variants')):
             refreshed, image_sync = ensure_images_and_variant_images(
-                client, created, image_urls,
+                client, created, scraped_images,
             )
             images_added = image_sync.get('added', 0)
             image_errors = (image_sync.get('errors') or []) + (
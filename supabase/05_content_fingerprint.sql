@@ -0,0 +1,10 @@
+-- ============================================================
+-- Content fingerprint (skip unchanged products on Publish)
+-- Supabase -> SQL Editor -> paste -> Run
+-- Safe to re-run.
+-- ============================================================
+
+-- sha256 of title / price / variants / images / stock at the last publish.
+-- Publish skips products whose freshly scraped fingerprint still matches.
+alter table public.tracked_products
+    add column if not exists content_fingerprint text;
@@ -0,0 +1,220 @@
+-- ============================================================
+-- Bulk upsert keyed on markaz_product_id (Refresh All / Publish)
+-- Run AFTER 04_dedupe_markaz_products.sql (needs markaz_product_id).
+-- Supabase -> SQL Editor -> paste -> Run
+-- Safe to re-run.
+-- ============================================================
+
+-- p_items: [{"markaz_url":"...","markaz_product_id":"733730","stock_status":"in_stock",
+--            "title":"...","shopify_handle":"...","shopify_product_id":"...","user_id":null}]
+--
+-- Per product id: keeps the best existing row (same ranking as 04), deletes the
+-- other rows for that id, updates the keeper (including its canonical URL) and
+-- inserts products that are not tracked yet. Set-based: one statement per step
+-- for the whole batch, not one round trip per product.
+create or replace function public.bulk_upsert_tracked_products_rpc(p_items jsonb)
+returns json
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_results json;
+begin
+    if p_items is null or jsonb_typeof(p_items) <> 'array' then
+        return '[]'::json;
+    end if;
+
+    create temporary table if not exists _bulk_items (
+        ord integer,
+        markaz_url text,
+        markaz_product_id text,
+        stock_status text,
+        title text,
+        shopify_handle text,
+        shopify_product_id text,
+        user_id uuid,
+        keeper_id uuid
+    ) on commit drop;
+    truncate _bulk_items;
+
+    -- Last item wins when the batch repeats a product id (or URL without an id).
+    insert into _bulk_items
+    select distinct on (coalesce(item.markaz_product_id, item.markaz_url))
+        item.ord::integer,
+        btrim(item.markaz_url),
+        item.markaz_product_id,
+        case
+            when item.stock_status in ('in_stock', 'out_of_stock', 'unknown') then item.stock_status
+            else 'unknown'
+        end,
+        nullif(btrim(item.title), ''),
+        nullif(btrim(item.shopify_handle), ''),
+        nullif(btrim(item.shopify_product_id), ''),
+        item.user_id,
+        null
+    from (
+        select
+            t.ordinality as ord,
+            r.markaz_url,
+            coalesce(
+                nullif(btrim(r.markaz_product_id), ''),
+                substring(r.markaz_url from '/shop/product/(?:[^/]+/)?([0-9]+)(?:\?|$|/)?')
+            ) as markaz_product_id,
+            r.stock_status,
+            r.title,
+            r.shopify_handle,
+            r.shopify_product_id,
+            r.user_id
+        from jsonb_array_elements(p_items) with ordinality as t(value, ordinality)
+        cross join lateral jsonb_to_record(t.value) as r(
+            markaz_url text,
+            markaz_product_id text,
+            stock_status text,
+            title text,
+            shopify_handle text,
+            shopify_product_id text,
+            user_id uuid
+        )
+        where coalesce(btrim(r.markaz_url), '') <> ''
+    ) as item
+    order by coalesce(item.markaz_product_id, item.markaz_url), item.ord desc;
+
+    analyze _bulk_items;
+
+    -- 0) Rows saved by the 03 RPCs before 07's trigger have no markaz_product_id.
+    --    Collect them with their URL-derived id (an index scan over the NULL
+    --    entries of 07's index; empty once 07 ran) so every match below is an
+    --    equality join.
+    --    Not backfilled here: a derived id can collide with 04's unique index.
+    create temporary table if not exists _unkeyed_rows (
+        id uuid,
+        markaz_product_id text
+    ) on commit drop;
+    truncate _unkeyed_rows;
+
+    insert into _unkeyed_rows
+    select t.id, substring(t.markaz_url from '/shop/product/(?:[^/]+/)?([0-9]+)(?:\?|$|/)?')
+    from public.tracked_products t
+    where t.markaz_product_id is null
+      and t.markaz_url ~ '/shop/product/';
+    analyze _unkeyed_rows;
+
+    -- 1) Best existing row per item: same product id, else same exact URL.
+    --    Indexed equality branches (UNION) instead of an OR the planner cannot index.
+    with matches as (
+        select b.ord, t.id
+        from _bulk_items b
+        join public.tracked_products t on t.markaz_product_id = b.markaz_product_id
+        where b.markaz_product_id is not null
+        union
+        select b.ord, u.id
+        from _bulk_items b
+        join _unkeyed_rows u on u.markaz_product_id = b.markaz_product_id
+        union
+        select b.ord, t.id
+        from _bulk_items b
+        join public.tracked_products t on t.markaz_url = b.markaz_url
+    ),
+    candidates as (
+        select
+            b.ord,
+            t.id,
+            row_number() over (
+                partition by b.ord
+                order by
+                    (t.shopify_product_id is not null and t.shopify_product_id <> '') desc,
+                    (t.shopify_handle is not null and t.shopify_handle <> '') desc,
+                    (t.markaz_url = b.markaz_url) desc,
+                    t.last_checked_at desc nulls last,
+                    t.created_at desc nulls last
+            ) as rn
+        from matches m
+        join _bulk_items b on b.ord = m.ord
+        join public.tracked_products t on t.id = m.id
+    )
+    update _bulk_items b
+    set keeper_id = c.id
+    from candidates c
+    where c.ord = b.ord
+      and c.rn = 1;
+
+    -- 2) Remove the other rows for those products (and exact-URL leftovers).
+    delete from public.tracked_products t
+    using (
+        select d.id
+        from _bulk_items b
+        join public.tracked_products d on d.markaz_product_id = b.markaz_product_id
+        where b.keeper_id is not null
+          and b.markaz_product_id is not null
+          and d.id <> b.keeper_id
+        union
+        select u.id
+        from _bulk_items b
+        join _unkeyed_rows u on u.markaz_product_id = b.markaz_product_id
+        where b.keeper_id is not null
+          and u.id <> b.keeper_id
+        union
+        select d.id
+        from _bulk_items b
+        join public.tracked_products d on d.markaz_url = b.markaz_url
+        where b.keeper_id is not null
+          and d.id <> b.keeper_id
+    ) as extra
+    where t.id = extra.id;
+
+    -- 3) Merge into the keepers; blank fields never overwrite stored ones.
+    update public.tracked_products t
+    set
+        markaz_url = b.markaz_url,
+        markaz_product_id = coalesce(b.markaz_product_id, t.markaz_product_id),
+        stock_status = b.stock_status,
+        title = coalesce(b.title, t.title),
+        shopify_handle = coalesce(b.shopify_handle, t.shopify_handle),
+        shopify_product_id = coalesce(b.shopify_product_id, t.shopify_product_id),
+        last_checked_at = now()
+    from _bulk_items b
+    where t.id = b.keeper_id;
+
+    -- 4) Insert products that are not tracked yet.
+    with inserted as (
+        insert into public.tracked_products (
+            markaz_url,
+            markaz_product_id,
+            stock_status,
+            title,
+            shopify_handle,
+            shopify_product_id,
+            user_id,
+            last_checked_at
+        )
+        select
+            b.markaz_url,
+            b.markaz_product_id,
+            b.stock_status,
+            b.title,
+            b.shopify_handle,
+            b.shopify_product_id,
+            b.user_id,
+            now()
+        from _bulk_items b
+        where b.keeper_id is null
+        order by b.ord
+        returning id, markaz_url
+    )
+    update _bulk_items b
+    set keeper_id = i.id
+    from inserted i
+    where b.keeper_id is null
+      and i.markaz_url = b.markaz_url;
+
+    select coalesce(json_agg(row_to_json(t) order by b.ord), '[]'::json)
+    into v_results
+    from _bulk_items b
+    join public.tracked_products t on t.id = b.keeper_id;
+
+    return v_results;
+end;
+$$;
+
+grant execute on function public.bulk_upsert_tracked_products_rpc(jsonb) to service_role;
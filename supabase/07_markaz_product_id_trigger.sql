@@ -0,0 +1,85 @@
+-- ============================================================
+-- Keep markaz_product_id in sync with markaz_url (indexed lookups)
+-- Run AFTER 04_dedupe_markaz_products.sql.
+-- Supabase -> SQL Editor -> paste -> Run
+-- Safe to re-run.
+-- ============================================================
+
+-- 1) Column + lookup index (04 adds a partial unique index; this one also
+--    serves plain equality lookups when that index could not be created)
+alter table public.tracked_products
+    add column if not exists markaz_product_id text;
+
+create index if not exists tracked_products_markaz_product_id_idx
+    on public.tracked_products (markaz_product_id);
+
+-- 2) Same id rule as the app (.../shop/product/slug/123456 or .../123456)
+create or replace function public.tracked_products_set_markaz_product_id()
+returns trigger
+language plpgsql
+set search_path = public
+as $$
+begin
+    new.markaz_product_id := coalesce(
+        substring(new.markaz_url from '/shop/product/(?:[^/]+/)?([0-9]+)(?:\?|$|/)?'),
+        nullif(btrim(new.markaz_product_id), '')
+    );
+    return new;
+end;
+$$;
+
+drop trigger if exists tracked_products_markaz_product_id_trg on public.tracked_products;
+
+create trigger tracked_products_markaz_product_id_trg
+    before insert or update of markaz_url, markaz_product_id
+    on public.tracked_products
+    for each row
+    execute function public.tracked_products_set_markaz_product_id();
+
+-- 3) Backfill rows saved before the trigger existed. One row per id, and only
+--    ids no other row holds yet (04's unique index); the rest are duplicates
+--    left for the dedupe in 04 / the app.
+with derived as (
+    select distinct on (product_id) id, product_id
+    from (
+        select
+            id,
+            substring(markaz_url from '/shop/product/(?:[^/]+/)?([0-9]+)(?:\?|$|/)?') as product_id,
+            last_checked_at,
+            created_at
+        from public.tracked_products
+        where markaz_product_id is null
+          and markaz_url ~ '/shop/product/'
+    ) as unkeyed
+    where product_id is not null
+    order by product_id, last_checked_at desc nulls last, created_at desc nulls last
+)
+update public.tracked_products t
+set markaz_product_id = d.product_id
+from derived d
+where t.id = d.id
+  and not exists (
+      select 1
+      from public.tracked_products other
+      where other.markaz_product_id = d.product_id
+  );
+
+-- 4) Lets the app detect the trigger: until it exists, rows saved by the 03
+--    RPCs have no markaz_product_id and lookups must also match by URL.
+create or replace function public.markaz_product_id_trigger_installed()
+returns boolean
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select exists (
+        select 1
+        from pg_trigger
+        where tgname = 'tracked_products_markaz_product_id_trg'
+          and tgrelid = 'public.tracked_products'::regclass
+          and not tgisinternal
+    );
+$$;
+
+grant execute on function public.markaz_product_id_trigger_installed() to service_role;
@@ -0,0 +1,81 @@
+-- ============================================================
+-- updated_at watermark + delete tombstones (Reload list = delta fetch)
+-- Supabase -> SQL Editor -> paste -> Run
+-- Safe to re-run.
+-- ============================================================
+
+-- 1) updated_at on every row, bumped by a trigger on each update
+alter table public.tracked_products
+    add column if not exists updated_at timestamptz;
+
+update public.tracked_products
+set updated_at = coalesce(last_checked_at, created_at, now())
+where updated_at is null;
+
+alter table public.tracked_products
+    alter column updated_at set default now(),
+    alter column updated_at set not null;
+
+create index if not exists tracked_products_updated_at_idx
+    on public.tracked_products (updated_at, id);
+
+-- clock_timestamp(), not now(): a long transaction must not stamp rows with
+-- a time older than rows other sessions already read.
+create or replace function public.tracked_products_touch_updated_at()
+returns trigger
+language plpgsql
+set search_path = public
+as $$
+begin
+    new.updated_at := clock_timestamp();
+    return new;
+end;
+$$;
+
+drop trigger if exists tracked_products_updated_at_trg on public.tracked_products;
+
+create trigger tracked_products_updated_at_trg
+    before insert or update
+    on public.tracked_products
+    for each row
+    execute function public.tracked_products_touch_updated_at();
+
+-- 2) Tombstones: one row per deleted tracked product, kept 30 days
+--    (the app does a full reload when its watermark is older than that)
+create table if not exists public.tracked_products_deletions (
+    row_id uuid not null,
+    markaz_url text,
+    deleted_at timestamptz not null default clock_timestamp()
+);
+
+create index if not exists tracked_products_deletions_deleted_at_idx
+    on public.tracked_products_deletions (deleted_at, row_id);
+
+alter table public.tracked_products_deletions enable row level security;
+
+create or replace function public.tracked_products_log_deletions()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    insert into public.tracked_products_deletions (row_id, markaz_url)
+    select id, markaz_url
+    from deleted_rows;
+
+    delete from public.tracked_products_deletions
+    where deleted_at < now() - interval '30 days';
+
+    return null;
+end;
+$$;
+
+drop trigger if exists tracked_products_deletions_trg on public.tracked_products;
+
+create trigger tracked_products_deletions_trg
+    after delete
+    on public.tracked_products
+    referencing old table as deleted_rows
+    for each statement
+    execute function public.tracked_products_log_deletions();
@@ -4,13 +4,16 @@ create table if not exists public.tracked_products (
     id uuid primary key default gen_random_uuid(),
     user_id uuid references auth.users (id) on delete cascade,
     markaz_url text not null,
+    markaz_product_id text,
     title text,
     stock_status text not null default 'unknown'
         check (stock_status in ('in_stock', 'out_of_stock', 'unknown')),
     last_checked_at timestamptz not null default now(),
     shopify_product_id text,
     shopify_handle text,
+    content_fingerprint text,
     created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now(),
     unique (user_id, markaz_url)
 );
 
@@ -26,6 +29,11 @@ create index if not exists tracked_products_user_id_idx
 create index if not exists tracked_products_shopify_handle_idx
     on public.tracked_products (shopify_handle);
 
+-- markaz_product_id is kept in sync by supabase/07_markaz_product_id_trigger.sql;
+-- updated_at and delete tombstones by supabase/08_updated_at_delta_sync.sql
+create index if not exists tracked_products_markaz_product_id_idx
+    on public.tracked_products (markaz_product_id);
+
 alter table public.tracked_products enable row level security;
 
 -- Authenticated users can only access their own rows.
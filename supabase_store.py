@@ -1,17 +1,38 @@
 import json
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from markaz_scraper import (
     canonicalize_markaz_product_url,
     extract_markaz_product_id,
+    product_fingerprint,
 )
 from supabase_config import get_supabase_credentials, is_supabase_configured
 
 TABLE_NAME = 'tracked_products'
+DELETIONS_TABLE_NAME = 'tracked_products_deletions'
 VALID_STATUSES = {'in_stock', 'out_of_stock', 'unknown'}
+# Columns the Tracked Products tab renders / acts on; optional migration
+# columns (markaz_product_id, content_fingerprint) are added when present.
+TRACKED_LIST_COLUMNS = (
+    'id', 'markaz_url', 'title', 'stock_status', 'shopify_handle',
+    'shopify_product_id', 'last_checked_at', 'created_at',
+)
+_OPTIONAL_LIST_COLUMNS = ('markaz_product_id', 'content_fingerprint', 'updated_at')
+# PostgREST caps one response at 1000 rows by default.
+LIST_PAGE_MAX = 1000
+# Delta fetches re-read this much before the watermark, so rows committed late
+# by a concurrent writer are not skipped (merging the same row twice is harmless).
+DELTA_OVERLAP_SECONDS = 10
+# Tombstones older than this are purged by supabase/08_updated_at_delta_sync.sql.
+TOMBSTONE_RETENTION_DAYS = 30
+# Items per bulk_upsert_tracked_products_rpc call (keeps request bodies well under PostgREST limits).
+BULK_UPSERT_CHUNK_SIZE = 500
 
 _CLIENT = None
 _USE_RPC = None  # None = auto-detect on first call
+_OPTIONAL_COLUMNS = {}  # (table, column) -> bool, detected on first use (migrations 04 / 05 / 08)
+_USE_BULK_RPC = None  # None = auto-detect on first batch upsert
+_USE_PRODUCT_ID_INDEX = None  # None = auto-detect (07 trigger) on first lookup
 
 
 def get_supabase_client():
@@ -34,9 +55,12 @@ def get_supabase_client():
 
 
 def clear_supabase_client_cache():
-    global _CLIENT, _USE_RPC
+    global _CLIENT, _USE_RPC, _USE_BULK_RPC, _USE_PRODUCT_ID_INDEX
     _CLIENT = None
     _USE_RPC = None
+    _USE_BULK_RPC = None
+    _USE_PRODUCT_ID_INDEX = None
+    _OPTIONAL_COLUMNS.clear()
 
 
 def _rpc_available():
@@ -54,6 +78,55 @@ def _rpc_available():
     return _USE_RPC
 
 
+def _bulk_rpc_available():
+    """Detect once whether supabase/06_bulk_upsert_by_product_id.sql has been run."""
+    global _USE_BULK_RPC
+    if _USE_BULK_RPC is not None:
+        return _USE_BULK_RPC
+
+    try:
+        _execute_rpc('bulk_upsert_tracked_products_rpc', {'p_items': []})
+        # An empty batch returns early, so also check the column it writes (04).
+        _USE_BULK_RPC = _column_available('markaz_product_id')
+    except Exception:
+        _USE_BULK_RPC = False
+    return _USE_BULK_RPC
+
+
+def _product_id_index_available():
+    """Detect once whether lookups may trust markaz_product_id alone.
+
+    The column exists from 04, but the 03 RPC upserts leave it NULL until
+    supabase/07_markaz_product_id_trigger.sql is run; before that, rows must
+    also be matched by URL.
+    """
+    global _USE_PRODUCT_ID_INDEX
+    if _USE_PRODUCT_ID_INDEX is not None:
+        return _USE_PRODUCT_ID_INDEX
+
+    try:
+        response = _execute_rpc('markaz_product_id_trigger_installed')
+        _USE_PRODUCT_ID_INDEX = response.data is True and _column_available('markaz_product_id')
+    except Exception:
+        _USE_PRODUCT_ID_INDEX = False
+    return _USE_PRODUCT_ID_INDEX
+
+
+def _column_available(column, table=TABLE_NAME):
+    """Detect once whether a migration-added column (e.g. markaz_product_id) exists."""
+    key = (table, column)
+    if key in _OPTIONAL_COLUMNS:
+        return _OPTIONAL_COLUMNS[key]
+
+    try:
+        client = get_supabase_client()
+        client.table(table).select(column).limit(1).execute()
+        _OPTIONAL_COLUMNS[key] = True
+    except Exception:
+        _OPTIONAL_COLUMNS[key] = False
+    return _OPTIONAL_COLUMNS[key]
+
+
 def _execute_rpc(function_name, params=None):
     client = get_supabase_client()
     request = client.rpc(function_name, params or {})
@@ -67,7 +140,7 @@ def _normalize_tracked_url(markaz_url):
 def _row_product_id(row):
     if not row:
         return None
-    return extract_markaz_product_id(row.get('markaz_url') or '')
+    return row.get('markaz_product_id') or extract_markaz_product_id(row.get('markaz_url') or '')
 
 
 def _row_sort_key(row):
@@ -230,28 +303,214 @@ def dedupe_tracked_products(rows=None):
     }
 
 
-def list_tracked_products():
-    """Fetch all tracked products — prefers 1 RPC call."""
-    if _rpc_available():
+def _list_columns(columns):
+    if not columns:
+        return '*'
+    columns = list(columns)
+    if columns == list(TRACKED_LIST_COLUMNS):
+        columns += [column for column in _OPTIONAL_LIST_COLUMNS if _column_available(column)]
+    return ','.join(dict.fromkeys(columns))
+
+
+def _apply_list_filters(query, stock_status=None, shopify_linked=None):
+    if stock_status:
+        query = query.eq('stock_status', stock_status)
+    if shopify_linked is True:
+        query = query.not_.is_('shopify_product_id', 'null').neq('shopify_product_id', '')
+    elif shopify_linked is False:
+        query = query.or_('shopify_product_id.is.null,shopify_product_id.eq.""')
+    return query
+
+
+def list_tracked_products_page(
+    limit=50,
+    cursor=None,
+    stock_status=None,
+    shopify_linked=None,
+    columns=TRACKED_LIST_COLUMNS,
+):
+    """One keyset page, newest first; returns (rows, next_cursor).
+
+    ``cursor`` is the (created_at, id) of the last row of the previous page
+    (None for the first page); ``next_cursor`` is None on the last page.
+    Filtering by stock status / Shopify linkage runs in Postgres.
+    """
+    limit = max(1, min(int(limit), LIST_PAGE_MAX))
+    client = get_supabase_client()
+    query = _apply_list_filters(
+        client.table(TABLE_NAME).select(_list_columns(columns)),
+        stock_status=stock_status,
+        shopify_linked=shopify_linked,
+    )
+    if cursor:
+        created_at, row_id = cursor
+        query = query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt.{row_id})'
+        )
+    response = (
+        query.order('created_at', desc=True)
+        .order('id', desc=True)
+        .limit(limit)
+        .execute()
+    )
+    rows = response.data or []
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = (rows[-1].get('created_at'), rows[-1].get('id'))
+    return rows, next_cursor
+
+
+def count_tracked_products(stock_status=None, shopify_linked=None):
+    """Row count for the given filters (no rows are transferred)."""
+    client = get_supabase_client()
+    query = _apply_list_filters(
+        client.table(TABLE_NAME).select('id', count='exact', head=True),
+        stock_status=stock_status,
+        shopify_linked=shopify_linked,
+    )
+    return int(query.execute().count or 0)
+
+
+def list_tracked_products(columns=None, stock_status=None, shopify_linked=None):
+    """Fetch tracked products — one RPC call for the whole table when available.
+
+    With a column projection or filters, rows come from keyset pages of
+    ``LIST_PAGE_MAX`` so only the requested slice leaves Postgres.
+    """
+    if columns is None and stock_status is None and shopify_linked is None and _rpc_available():
         response = _execute_rpc('list_tracked_products_rpc')
         data = response.data
         if isinstance(data, str):
             data = json.loads(data)
         return data or []
 
+    rows = []
+    cursor = None
+    while True:
+        page, cursor = list_tracked_products_page(
+            limit=LIST_PAGE_MAX,
+            cursor=cursor,
+            stock_status=stock_status,
+            shopify_linked=shopify_linked,
+            columns=columns,
+        )
+        rows.extend(page)
+        if not cursor:
+            return rows
+
+
+def _parse_timestamp(value):
+    try:
+        stamp = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)
+
+
+def _scan_since(table, columns, stamp_column, id_column, since):
+    """Every row with ``stamp_column`` > ``since``, oldest first, in keyset pages."""
     client = get_supabase_client()
-    response = (
-        client.table(TABLE_NAME)
-        .select('*')
-        .order('created_at', desc=True)
-        .execute()
-    )
-    return response.data or []
+    rows = []
+    cursor = None
+    while True:
+        query = client.table(table).select(columns).gt(stamp_column, since)
+        if cursor:
+            stamp, row_id = cursor
+            query = query.or_(
+                f'{stamp_column}.gt."{stamp}",'
+                f'and({stamp_column}.eq."{stamp}",{id_column}.gt.{row_id})'
+            )
+        page = (
+            query.order(stamp_column)
+            .order(id_column)
+            .limit(LIST_PAGE_MAX)
+            .execute()
+        ).data or []
+        rows.extend(page)
+        if len(page) < LIST_PAGE_MAX:
+            return rows
+        cursor = (page[-1].get(stamp_column), page[-1].get(id_column))
+
+
+def tracked_rows_watermark(rows, previous=None):
+    """Newest ``updated_at`` / ``deleted_at`` seen, as an ISO string (or ``previous``)."""
+    newest = _parse_timestamp(previous) if previous else None
+    for row in rows or []:
+        stamp = _parse_timestamp(row.get('updated_at') or row.get('deleted_at'))
+        if stamp and (newest is None or stamp > newest):
+            newest = stamp
+    return newest.isoformat() if newest else previous
+
+
+def list_tracked_products_since(watermark, columns=None):
+    """Rows changed and tombstones of rows deleted after ``watermark``.
+
+    Returns {'rows': [...], 'deleted': [{'id', 'markaz_url'}, ...], 'watermark': ...}
+    or None when the caller must reload everything: migration 08 is not
+    installed, there is no watermark yet, or it is older than the tombstones.
+    ``columns`` defaults to every column, like ``list_tracked_products()``, so
+    rows merged into a fully loaded list stay complete.
+    """
+    since = _parse_timestamp(watermark) if watermark else None
+    if since is None:
+        return None
+    if since < datetime.now(timezone.utc) - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+        return None
+    if not _column_available('updated_at') or not _column_available('row_id', table=DELETIONS_TABLE_NAME):
+        return None
+
+    since = (since - timedelta(seconds=DELTA_OVERLAP_SECONDS)).isoformat()
+    rows = _scan_since(TABLE_NAME, _list_columns(columns), 'updated_at', 'id', since)
+    tombstones = _scan_since(DELETIONS_TABLE_NAME, 'row_id,markaz_url,deleted_at', 'deleted_at', 'row_id', since)
+    return {
+        'rows': rows,
+        'deleted': [
+            {'id': tombstone.get('row_id'), 'markaz_url': tombstone.get('markaz_url')}
+            for tombstone in tombstones
+        ],
+        'watermark': tracked_rows_watermark([*rows, *tombstones], previous=watermark),
+    }
+
+
+def list_tracked_product_ids():
+    """Markaz product ids of all tracked rows (only the id / URL columns are fetched).
+
+    Read in keyset pages of ``LIST_PAGE_MAX``, so tables past PostgREST's
+    1000-row response cap are covered.
+    """
+    columns = ['id', 'created_at', 'markaz_url']
+    if _column_available('markaz_product_id'):
+        columns.append('markaz_product_id')
+    product_ids = set()
+    cursor = None
+    while True:
+        rows, cursor = list_tracked_products_page(limit=LIST_PAGE_MAX, cursor=cursor, columns=columns)
+        for row in rows:
+            product_id = _row_product_id(row)
+            if product_id:
+                product_ids.add(product_id)
+        if not cursor:
+            return product_ids
 
 
 def get_tracked_product_by_url(markaz_url):
     markaz_url = _normalize_tracked_url(markaz_url)
+    product_id = extract_markaz_product_id(markaz_url)
     client = get_supabase_client()
+
+    if product_id and _product_id_index_available():
+        # Indexed equality hit; covers slug / host variants of the same product.
+        response = (
+            client.table(TABLE_NAME)
+            .select('*')
+            .eq('markaz_product_id', product_id)
+            .execute()
+        )
+        rows = response.data or []
+        exact = [row for row in rows if row.get('markaz_url') == markaz_url]
+        return (exact or rows or [None])[0]
+
     response = (
         client.table(TABLE_NAME)
         .select('*')
@@ -263,7 +522,6 @@ def get_tracked_product_by_url(markaz_url):
     if rows:
         return rows[0]
 
-    product_id = extract_markaz_product_id(markaz_url)
     if not product_id:
         return None
 
@@ -322,7 +580,7 @@ def upsert_tracked_product(
     if not existing and shopify_handle:
         by_handle = get_tracked_product_by_handle(shopify_handle)
         if by_handle:
-            existing_id = extract_markaz_product_id(by_handle.get('markaz_url'))
+            existing_id = _row_product_id(by_handle)
             if not product_id or not existing_id or existing_id == product_id:
                 existing = by_handle
 
@@ -330,7 +588,7 @@ def upsert_tracked_product(
         (existing or {}).get('markaz_url') or canonical_url
     )
     # Prefer newest canonical URL when existing slug differs but id matches.
-    if existing and product_id and extract_markaz_product_id(existing.get('markaz_url')) == product_id:
+    if existing and product_id and _row_product_id(existing) == product_id:
         target_url = canonical_url or target_url
 
     if _rpc_available():
@@ -380,6 +638,8 @@ def upsert_tracked_product(
         payload['shopify_handle'] = shopify_handle
     if shopify_product_id:
         payload['shopify_product_id'] = str(shopify_product_id)
+    if product_id and _column_available('markaz_product_id'):
+        payload['markaz_product_id'] = product_id
 
     client = get_supabase_client()
 
@@ -424,23 +684,79 @@ def upsert_tracked_product(
     return rows[0] if rows else insert_payload
 
 
+def backfill_tracked_product_ids(chunk_size=500):
+    """Fill markaz_product_id on rows saved before it was maintained; returns rows updated.
+
+    Each chunk is written with one upsert keyed on id. Rows whose id is
+    already held by another row are duplicates of it (04's unique index would
+    reject them) and are left for dedupe. supabase/07_markaz_product_id_trigger.sql
+    does the same in SQL and keeps the column in sync afterwards; this path
+    works without running it.
+    """
+    if not _column_available('markaz_product_id'):
+        return 0
+
+    client = get_supabase_client()
+    updated = 0
+    last_id = None
+    while True:
+        query = (
+            client.table(TABLE_NAME)
+            .select('id,markaz_url')
+            .is_('markaz_product_id', 'null')
+            .order('id')
+            .limit(chunk_size)
+        )
+        if last_id:
+            query = query.gt('id', last_id)
+        rows = query.execute().data or []
+        if not rows:
+            return updated
+        last_id = rows[-1]['id']
+
+        derived = {}
+        for row in rows:
+            product_id = extract_markaz_product_id(row.get('markaz_url') or '')
+            if product_id and product_id not in derived:
+                derived[product_id] = row
+        if not derived:
+            continue
+        taken = (
+            client.table(TABLE_NAME)
+            .select('markaz_product_id')
+            .in_('markaz_product_id', list(derived))
+            .execute()
+        ).data or []
+        for row in taken:
+            derived.pop(row.get('markaz_product_id'), None)
+        payload = [
+            # markaz_url rides along only to satisfy its not-null constraint.
+            {'id': row['id'], 'markaz_url': row['markaz_url'], 'markaz_product_id': product_id}
+            for product_id, row in derived.items()
+        ]
+        if payload:
+            client.table(TABLE_NAME).upsert(payload, on_conflict='id').execute()
+            updated += len(payload)
+
+
 def _delete_other_rows_for_product_id(product_id, keep_url):
     if not product_id:
         return
     keep_url = _normalize_tracked_url(keep_url)
     client = get_supabase_client()
-    response = (
-        client.table(TABLE_NAME)
-        .select('markaz_url')
-        .like('markaz_url', f'%/{product_id}')
-        .execute()
-    )
+    indexed = _product_id_index_available()
+    query = client.table(TABLE_NAME).select('markaz_url')
+    if indexed:
+        query = query.eq('markaz_product_id', product_id)
+    else:
+        query = query.like('markaz_url', f'%/{product_id}')
+    response = query.execute()
     to_delete = []
     for row in response.data or []:
         url = row.get('markaz_url')
         if not url:
             continue
-        if extract_markaz_product_id(url) != product_id:
+        if not indexed and extract_markaz_product_id(url) != product_id:
             continue
         if _normalize_tracked_url(url) != keep_url:
             to_delete.append(url)
@@ -467,22 +783,8 @@ def batch_upsert_tracked_products(items):
 
     normalized_items = list(collapsed.values())
 
-    if _rpc_available():
-        # Still upsert one-by-one via smart upsert so product-id merge works.
-        # (Batch RPC matches exact URL only.)
-        results = []
-        for item in normalized_items:
-            row = upsert_tracked_product(
-                markaz_url=item.get('markaz_url'),
-                stock_status=item.get('stock_status', 'unknown'),
-                title=item.get('title'),
-                shopify_handle=item.get('shopify_handle'),
-                shopify_product_id=item.get('shopify_product_id'),
-                user_id=item.get('user_id'),
-            )
-            if row:
-                results.append(row)
-        return results
+    if _bulk_rpc_available():
+        return bulk_upsert_tracked_products(normalized_items)
 
     results = []
     for item in normalized_items:
@@ -499,6 +801,106 @@ def batch_upsert_tracked_products(items):
     return results
 
 
+def bulk_upsert_tracked_products(items, chunk_size=BULK_UPSERT_CHUNK_SIZE):
+    """Upsert canonical items server-side, ``chunk_size`` per RPC call.
+
+    The RPC merges by markaz_product_id: it keeps the best existing row per
+    product, deletes the others, updates the keeper and inserts new products.
+    """
+    payload = []
+    for item in items or []:
+        markaz_url = _normalize_tracked_url(item.get('markaz_url'))
+        if not markaz_url:
+            continue
+        stock_status = item.get('stock_status', 'unknown')
+        payload.append({
+            'markaz_url': markaz_url,
+            'markaz_product_id': extract_markaz_product_id(markaz_url),
+            'stock_status': stock_status if stock_status in VALID_STATUSES else 'unknown',
+            'title': item.get('title'),
+            'shopify_handle': item.get('shopify_handle'),
+            'shopify_product_id': str(item['shopify_product_id']) if item.get('shopify_product_id') else None,
+            'user_id': item.get('user_id'),
+        })
+
+    chunk_size = max(1, int(chunk_size))
+    results = []
+    for start in range(0, len(payload), chunk_size):
+        response = _execute_rpc(
+            'bulk_upsert_tracked_products_rpc',
+            {'p_items': payload[start:start + chunk_size]},
+        )
+        data = response.data
+        if isinstance(data, str):
+            data = json.loads(data)
+        results.extend(data or [])
+    return results
+
+
+def tracked_row_changed(row, result):
+    """True when a successful scrape differs from what the tracked row holds.
+
+    Full product results are compared by content fingerprint (a precomputed
+    ``result['content_fingerprint']`` wins); ``check_stock`` results only carry
+    title and stock, so those two columns are compared.
+    """
+    row = row or {}
+    result = result or {}
+    if result.get('content_fingerprint'):
+        return result['content_fingerprint'] != row.get('content_fingerprint')
+    if any(key in result for key in ('price', 'variants', 'image_urls')):
+        return product_fingerprint(result) != row.get('content_fingerprint')
+    if (result.get('stock_status') or 'unknown') != (row.get('stock_status') or 'unknown'):
+        return True
+    title = ' '.join(str(result.get('title') or '').split())
+    return bool(title) and title != ' '.join(str(row.get('title') or '').split())
+
+
+def update_tracked_content_fingerprints(items):
+    """Store content fingerprints; returns the updated rows.
+
+    items: [{'markaz_url': ..., 'content_fingerprint': ...}, ...]
+    Without the column (migration not run) nothing is written and every
+    product keeps counting as changed.
+    """
+    items = [
+        item for item in items or []
+        if (item or {}).get('markaz_url') and item.get('content_fingerprint')
+    ]
+    if not items or not _column_available('content_fingerprint'):
+        return []
+
+    fingerprints = {
+        _normalize_tracked_url(item['markaz_url']): item['content_fingerprint']
+        for item in items
+    }
+    urls = list(fingerprints)
+    client = get_supabase_client()
+    updated_rows = []
+    chunk_size = 100
+    for start in range(0, len(urls), chunk_size):
+        # Two requests per chunk: resolve ids, then one upsert keyed on id
+        # (markaz_url rides along only to satisfy its not-null constraint).
+        response = (
+            client.table(TABLE_NAME)
+            .select('id,markaz_url')
+            .in_('markaz_url', urls[start:start + chunk_size])
+            .execute()
+        )
+        payload = [
+            {
+                'id': row['id'],
+                'markaz_url': row['markaz_url'],
+                'content_fingerprint': fingerprints[row['markaz_url']],
+            }
+            for row in response.data or []
+        ]
+        if payload:
+            response = client.table(TABLE_NAME).upsert(payload, on_conflict='id').execute()
+            updated_rows.extend(response.data or [])
+    return updated_rows
+
+
 def update_tracked_stock_status(markaz_url, stock_status, title=None, shopify_handle=None):
     return upsert_tracked_product(
         markaz_url=markaz_url,
@@ -0,0 +1,106 @@
+"""Process-wide cache of tracked product rows and their Shopify status snapshot.
+
+Streamlit serves every browser session from threads of one process, so a
+single ``TrackedRowsCache`` lets all operators share one copy of the tracked
+table and one Shopify status map instead of a full Supabase / Shopify fetch
+per session. (It lives in its own module because app.py is re-executed on
+every rerun.)
+
+Published lists and maps are never mutated: each change swaps in a new
+object and bumps ``version``, so a session can keep rendering the snapshot it
+read while another session writes, and per-session derived data (list
+pages, filters) can tell when it went stale.
+"""
+
+import threading
+
+
+class TrackedRowsCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # Changes made while a full fetch is in flight, re-applied to its result.
+        self._pending = None
+        self._invalidations = 0
+        self.version = 0
+        self.rows = None
+        self.watermark = None
+        self.status_map = None
+
+    def load(self, loader):
+        """Cached rows, calling ``loader() -> (rows, watermark)`` once across sessions."""
+        rows = self.rows
+        if rows is not None:
+            return rows
+        return self._fetch(loader, only_if_empty=True)
+
+    def reload(self, loader):
+        """Replace the rows with a fresh ``loader()`` result."""
+        return self._fetch(loader, only_if_empty=False)
+
+    def _fetch(self, loader, only_if_empty):
+        with self._load_lock:
+            if only_if_empty and self.rows is not None:
+                return self.rows
+            with self._lock:
+                self._pending = []
+                invalidations = self._invalidations
+            try:
+                rows, watermark = loader()
+            finally:
+                with self._lock:
+                    pending, self._pending = self._pending, None
+            rows = list(rows or [])
+            with self._lock:
+                if self._invalidations != invalidations:
+                    # Invalidated mid-fetch: the result may predate that change.
+                    return rows
+                for change in pending:
+                    rows = list(change(rows))
+                self.rows = rows
+                self.watermark = watermark
+                self.version += 1
+                return rows
+
+    def update(self, change, watermark=None):
+        """Swap in ``change(rows)`` (skipped while no rows are cached); always bumps ``version``."""
+        with self._lock:
+            self.version += 1
+            if self._pending is not None:
+                self._pending.append(change)
+            if self.rows is None:
+                return None
+            self.rows = list(change(self.rows))
+            if watermark is not None:
+                self.watermark = watermark
+            return self.rows
+
+    def invalidate(self):
+        with self._lock:
+            self.rows = None
+            self.watermark = None
+            self._invalidations += 1
+            self.version += 1
+
+    def set_status_map(self, status_map):
+        with self._lock:
+            self.status_map = dict(status_map or {})
+            return self.status_map
+
+    def update_status_map(self, entries):
+        with self._lock:
+            self.status_map = {**(self.status_map or {}), **(entries or {})}
+            return self.status_map
+
+    def add_missing_status(self, entries):
+        """Add entries only for rows the map does not know yet (live snapshots win)."""
+        with self._lock:
+            self.status_map = {**(entries or {}), **(self.status_map or {})}
+            return self.status_map
+
+    def invalidate_status_map(self):
+        with self._lock:
+            self.status_map = None
+
+
+SHARED_TRACKED_ROWS_CACHE = TrackedRowsCache()